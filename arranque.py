@@ -0,0 +1,47 @@
+import importlib
+import sys
+import time
+
+import metricas
+
+# Tiempos de arranque
+# La línea de comandos la ejecuta grafico_ejecucion.php en cada consulta cuando el servicio
+# no responde, así que cada importación se paga por gráfico. Las pesadas (plotly en el
+# camino HTML, matplotlib en los reportes estáticos) se difieren con ModuloDiferido hasta
+# el primer atributo que se use: con la caché llena un gráfico no importa plotly.
+# Con --tiempos se imprime en stderr cada etapa (metricas.tramo) e importación diferida con
+# el mismo formato que python -X importtime (tiempo propio | acumulado | etapa, en
+# microsegundos, las etapas anidadas con sangría y antes que la que las contiene).
+
+# Momento en que se importó este módulo, el primero de curvas_de_crecimiento
+INICIO = time.perf_counter()
+
+
+def marcar(etapa):
+    # Etapa que empezó con este módulo, por ejemplo las importaciones al iniciar, con el
+    # tiempo de CPU del proceso hasta ahora. Se anota siempre porque ocurre antes de leer
+    # los argumentos, una vez por proceso
+    metricas.anotar(etapa, time.perf_counter() - INICIO, time.process_time())
+
+
+class ModuloDiferido:
+    # Se importa el módulo la primera vez que se pide uno de sus atributos
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            with metricas.tramo(f"import {self._nombre}"):
+                self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+
+def informe(archivo=None):
+    archivo = archivo or sys.stderr
+    print("arranque: propio [us] | acumulado [us] | etapa", file=archivo)
+    for medida in metricas.tramos():
+        print(f"arranque: {medida.propio * 1e6:>11.0f} | {medida.pared * 1e6:>14.0f} | "
+              f"{'  ' * medida.profundidad}{medida.etapa}", file=archivo)
+    print(f"arranque: total {(time.perf_counter() - INICIO) * 1e3:.1f} ms desde la primera importación", file=archivo)
@@ -0,0 +1,175 @@
+import configparser
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import arranque
+
+# psycopg2 se importa con la primera conexión, no al importar los módulos que registran
+# sus consultas: --sintetico, --exportar-plotlyjs o las capas de referencia no lo usan
+psycopg2 = arranque.ModuloDiferido('psycopg2')
+sql = arranque.ModuloDiferido('psycopg2.sql')
+extensiones = arranque.ModuloDiferido('psycopg2.extensions')
+pool_psycopg2 = arranque.ModuloDiferido('psycopg2.pool')
+
+# Acceso a la base de datos para los modos de larga duración (servicio y lotes)
+# Un pool acotado de conexiones reutilizadas: cada conexión fija su statement_timeout y
+# prepara en el servidor las consultas registradas una sola vez, al abrirse. Quien pide
+# una conexión espera a que haya una libre (hasta espera_maxima) y esa espera se mide
+# para poder dimensionar el pool frente a max_connections de Postgres.
+# config.ini, sección opcional:
+#   [pool]
+#   minimo = 1
+#   maximo = 4
+#   espera_maxima = 10          ; segundos esperando una conexión libre
+#   timeout_sentencia = 30000   ; milisegundos, 0 desactiva el límite
+
+POOL_MINIMO = 1
+POOL_MAXIMO = 4
+ESPERA_MAXIMA = 10
+TIMEOUT_SENTENCIA = 30000
+
+# Consultas que se preparan en cada conexión nueva: nombre -> texto con %s
+SENTENCIAS = {}
+
+
+class PoolAgotado(Exception):
+    pass
+
+
+def registrar_sentencia(nombre, consulta):
+    # Cada módulo registra sus consultas al importarse, consulta es el texto con %s
+    SENTENCIAS[nombre] = consulta
+
+def texto_preparado(consulta):
+    # PREPARE usa $1, $2... en lugar de los %s de psycopg2
+    contador = iter(range(1, consulta.count('%s') + 1))
+    return re.sub(r'%s', lambda _: f'${next(contador)}', consulta.strip().rstrip(';'))
+
+def preparar_conexion(conn, timeout_sentencia=TIMEOUT_SENTENCIA):
+    # Solo se hacen lecturas, en autocommit no queda una transacción abierta entre consultas
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET statement_timeout = %s", (int(timeout_sentencia),))
+        for nombre, consulta in SENTENCIAS.items():
+            cursor.execute(sql.SQL("PREPARE {} AS ").format(sql.Identifier(nombre)) + sql.SQL(texto_preparado(consulta)))
+    finally:
+        cursor.close()
+    conn.sentencias_preparadas = frozenset(SENTENCIAS)
+    return conn
+
+def ejecutar(cursor, nombre, consulta, parametros):
+    # Usa la sentencia preparada si la conexión la tiene, si no la consulta normal
+    if nombre in getattr(cursor.connection, 'sentencias_preparadas', ()):
+        marcadores = sql.SQL(', ').join(sql.Placeholder() * len(parametros))
+        cursor.execute(sql.SQL("EXECUTE {} ({})").format(sql.Identifier(nombre), marcadores), parametros)
+    else:
+        cursor.execute(consulta, parametros)
+
+
+@lru_cache(maxsize=None)
+def clase_pool():
+    # Las subclases de psycopg2 se definen al crear el primer pool, definirlas al importar
+    # este módulo obligaría a importar psycopg2
+
+    class ConexionPreparada(extensiones.connection):
+        # Conexión que recuerda qué sentencias tiene preparadas en su sesión
+        sentencias_preparadas = frozenset()
+
+    class PoolPreparado(pool_psycopg2.ThreadedConnectionPool):
+
+        def __init__(self, minimo, maximo, timeout_sentencia, **db_config):
+            self.timeout_sentencia = timeout_sentencia
+            super().__init__(minimo, maximo, connection_factory=ConexionPreparada, **db_config)
+
+        def _connect(self, key=None):
+            conn = super()._connect(key)
+            preparar_conexion(conn, self.timeout_sentencia)
+            return conn
+
+    return PoolPreparado
+
+
+class PoolConexiones:
+
+    def __init__(self, db_config, minimo=POOL_MINIMO, maximo=POOL_MAXIMO, espera_maxima=ESPERA_MAXIMA,
+                 timeout_sentencia=TIMEOUT_SENTENCIA):
+        self.maximo = maximo
+        self.espera_maxima = espera_maxima
+        self.pool = clase_pool()(minimo, maximo, timeout_sentencia, **db_config)
+        # ThreadedConnectionPool falla en vez de esperar, el semáforo hace que se espere turno
+        self.libres = threading.BoundedSemaphore(maximo)
+        self.bloqueo = threading.Lock()
+        self.en_uso = 0
+        self.prestamos = 0
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.espera_maxima_observada = 0.0
+        self.agotados = 0
+        self.descartadas = 0
+
+    @contextmanager
+    def conexion(self):
+        inicio = time.perf_counter()
+        if not self.libres.acquire(timeout=self.espera_maxima):
+            with self.bloqueo:
+                self.agotados += 1
+            raise PoolAgotado(f"Sin conexiones libres tras {self.espera_maxima} s")
+        espera = time.perf_counter() - inicio
+        with self.bloqueo:
+            self.en_uso += 1
+            self.prestamos += 1
+            self.espera_total += espera
+            self.espera_maxima_observada = max(self.espera_maxima_observada, espera)
+            if espera > 0.001:
+                self.esperas += 1
+        conn = None
+        descartar = False
+        try:
+            conn = self.pool.getconn()
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # La conexión puede haber quedado inservible (reinicio de Postgres, timeout)
+            descartar = True
+            raise
+        finally:
+            if conn is not None:
+                descartar = descartar or bool(conn.closed)
+                self.pool.putconn(conn, close=descartar)
+            with self.bloqueo:
+                self.en_uso -= 1
+                self.descartadas += descartar
+            self.libres.release()
+
+    def estadisticas(self):
+        with self.bloqueo:
+            return {
+                'maximo': self.maximo,
+                'en_uso': self.en_uso,
+                'prestamos': self.prestamos,
+                'esperas': self.esperas,
+                'espera_media_ms': round(1000 * self.espera_total / self.prestamos, 3) if self.prestamos else 0.0,
+                'espera_maxima_ms': round(1000 * self.espera_maxima_observada, 3),
+                'agotados': self.agotados,
+                'descartadas': self.descartadas,
+            }
+
+    def cerrar(self):
+        self.pool.closeall()
+
+
+def crear_pool(db_config, maximo=None, ruta_config='config.ini'):
+    # La sección [pool] de config.ini es opcional
+    config = configparser.ConfigParser()
+    config.read(ruta_config)
+    maximo = maximo or config.getint('pool', 'maximo', fallback=POOL_MAXIMO)
+    return PoolConexiones(
+        db_config,
+        minimo=min(config.getint('pool', 'minimo', fallback=POOL_MINIMO), maximo),
+        maximo=maximo,
+        espera_maxima=config.getfloat('pool', 'espera_maxima', fallback=ESPERA_MAXIMA),
+        timeout_sentencia=config.getint('pool', 'timeout_sentencia', fallback=TIMEOUT_SENTENCIA),
+    )
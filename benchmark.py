@@ -0,0 +1,163 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+import clasificacion
+import colores
+import curvas_de_crecimiento as curvas
+import ingesta
+import referencias
+import sinteticos
+
+# Benchmark por etapas
+# Mide cada etapa del gráfico con pacientes sintéticos (sinteticos.py) servidos por la
+# conexión en memoria, sin base de datos: consulta, ingesta, carga de referencias,
+# interpolación de las curvas en las edades del paciente, clasificación (con las curvas y
+# con LMS), colores, figura y write_html. Cada etapa se repite hasta durar al menos
+# TIEMPO_MINIMO (como timeit) y se guarda la mediana y el mínimo por llamada de varias
+# repeticiones. Los resultados se guardan en JSON con el commit para comparar entre versiones.
+# Uso:
+#   python benchmark.py
+#   python benchmark.py --perfiles recien_nacido adolescente --repeticiones 7
+#   python benchmark.py --guardar benchmarks/$(git rev-parse --short HEAD).json
+#   python benchmark.py --comparar benchmarks/anterior.json
+
+REPETICIONES = 5
+TIEMPO_MINIMO = 0.2
+SEMILLA = 0
+
+
+def preparar(perfil, semilla=SEMILLA):
+    # Un paciente del perfil, su conexión simulada y lo que cada etapa recibe ya calculado
+    historias = sinteticos.historias(perfil, 1, semilla)
+    cedula, resultados = next(iter(historias.items()))
+    conn = sinteticos.ConexionSimulada(historias)
+    mediciones = ingesta.ingerir(resultados)
+    ref = curvas.cargar_referencias(mediciones.genero)
+    indicadores = {indicador: ingesta.indicador(mediciones, indicador) for indicador in ingesta.CODIGOS}
+    figura = curvas.construir_figura(resultados)
+    return conn, cedula, resultados, mediciones, ref, indicadores, figura
+
+def interpolar(ref, indicadores):
+    # Todas las curvas de desviación de la tabla de cada medición, en su edad
+    for indicador, (meses, _, _, _) in indicadores.items():
+        bandas = clasificacion.banda_edad(indicador, meses)
+        for indice, (rango, _, divisor) in enumerate(clasificacion.RANGOS[indicador]):
+            mascara = bandas == indice
+            if mascara.any():
+                clasificacion.lineas_desviacion(ref, indicador, rango, meses[mascara] / divisor)
+
+def etapas(perfil, semilla=SEMILLA):
+    conn, cedula, resultados, mediciones, ref, indicadores, figura = preparar(perfil, semilla)
+    todas = {
+        'consulta': lambda: curvas.consultar_signos_vitales(conn, cedula),
+        'ingesta': lambda: ingesta.ingerir(resultados),
+        'referencias': lambda: referencias.cargar(mediciones.genero),
+        'interpolacion': lambda: interpolar(ref, indicadores),
+        'clasificacion': lambda: [clasificacion.clasificar(ref, indicador, meses, valores, 'curvas', dias)
+                                  for indicador, (meses, valores, _, dias) in indicadores.items()],
+        'clasificacion_lms': lambda: [clasificacion.clasificar(ref, indicador, meses, valores, 'lms', dias)
+                                      for indicador, (meses, valores, _, dias) in indicadores.items()],
+        'colores': lambda: [colores.asignar_colores(ref, indicador, meses, valores, dias=dias)
+                            for indicador, (meses, valores, _, dias) in indicadores.items()],
+        'figura': lambda: curvas.construir_figura(resultados),
+        'write_html': lambda: curvas.pio.write_html(figura, file=io.StringIO(), auto_open=False,
+                                                    config={'displayModeBar': False}),
+    }
+    # El puntaje LMS solo se puede medir si las tablas traen L, M y S
+    return {etapa: funcion for etapa, funcion in todas.items() if ref.tiene_lms or etapa != 'clasificacion_lms'}
+
+
+def medir(funcion, repeticiones=REPETICIONES, tiempo_minimo=TIEMPO_MINIMO):
+    # Como timeit: se calcula cuántas llamadas duran tiempo_minimo y se repite esa tanda
+    temporizador = timeit.Timer(funcion)
+    numero = 1
+    while True:
+        if temporizador.timeit(numero) >= tiempo_minimo:
+            break
+        numero *= 2
+    tiempos = [tiempo / numero for tiempo in temporizador.repeat(repeticiones, numero)]
+    return {'mediana': statistics.median(tiempos), 'minimo': min(tiempos), 'numero': numero,
+            'repeticiones': repeticiones}
+
+def ejecutar(perfiles, seleccion=None, repeticiones=REPETICIONES, tiempo_minimo=TIEMPO_MINIMO, semilla=SEMILLA):
+    resultados = {}
+    for perfil in perfiles:
+        resultados[perfil] = {}
+        for etapa, funcion in etapas(perfil, semilla).items():
+            if seleccion and etapa not in seleccion:
+                continue
+            resultados[perfil][etapa] = medir(funcion, repeticiones, tiempo_minimo)
+            print(f"{perfil:14} {etapa:17} {resultados[perfil][etapa]['mediana'] * 1e3:10.3f} ms",
+                  file=sys.stderr)
+    return resultados
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return salida.stdout.strip() or None
+
+def entorno():
+    import plotly
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'plotly': plotly.__version__,
+            'maquina': platform.machine(), 'procesador': platform.processor(), 'nucleos': os.cpu_count()}
+
+def guardar(resultados, ruta, semilla=SEMILLA):
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    contenido = {'commit': commit_actual(), 'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 'semilla': semilla,
+                 'entorno': entorno(), 'resultados': resultados}
+    curvas.escribir_atomico(json.dumps(contenido, indent=2), ruta)
+    return ruta
+
+def tabla(resultados, anterior=None):
+    # Mediana por llamada y, si hay un resultado anterior, cuántas veces más rápido es el actual
+    lineas = [f"{'perfil':14} {'etapa':17} {'mediana':>12} {'mínimo':>12}" + (f" {'anterior':>12} {'mejora':>8}"
+                                                                                  if anterior else '')]
+    for perfil, medidas in resultados.items():
+        for etapa, medida in medidas.items():
+            linea = f"{perfil:14} {etapa:17} {medida['mediana'] * 1e3:9.3f} ms {medida['minimo'] * 1e3:9.3f} ms"
+            previa = (anterior or {}).get(perfil, {}).get(etapa)
+            if previa:
+                linea += f" {previa['mediana'] * 1e3:9.3f} ms {previa['mediana'] / medida['mediana']:7.2f}x"
+            lineas.append(linea)
+    return '\n'.join(lineas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark por etapas con pacientes sintéticos')
+    parser.add_argument('--perfiles', nargs='+', choices=list(sinteticos.PERFILES), default=list(sinteticos.PERFILES))
+    parser.add_argument('--etapas', nargs='+', metavar='ETAPA',
+                        help='Solo estas etapas: consulta, ingesta, referencias, interpolacion, clasificacion, '
+                             'clasificacion_lms, colores, figura, write_html')
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES)
+    parser.add_argument('--tiempo-minimo', type=float, default=TIEMPO_MINIMO, help='Segundos por tanda')
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--guardar', metavar='RUTA', help='Guarda los resultados en JSON con el commit actual')
+    parser.add_argument('--comparar', metavar='RUTA', help='JSON de una ejecución anterior para comparar')
+    args = parser.parse_args(argv)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)['resultados']
+    resultados = ejecutar(args.perfiles, args.etapas, args.repeticiones, args.tiempo_minimo, args.semilla)
+    print(tabla(resultados, anterior))
+    if args.guardar:
+        print(guardar(resultados, args.guardar, args.semilla), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
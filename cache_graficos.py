@@ -0,0 +1,169 @@
+import configparser
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from functools import lru_cache
+
+import base_datos
+import referencias
+
+# Caché de gráficos
+# Guarda en disco el resultado de cada paciente. La clave combina la cédula, el sexo, la
+# última consulta (fecha, PK y número de signos vitales), la versión de las tablas de
+# referencia y la versión del código, así un paciente sin consultas nuevas se sirve desde
+# disco tras una sola consulta de agregados. Al superar la capacidad se borran las
+# entradas usadas hace más tiempo (LRU, la fecha de modificación marca el último uso).
+
+CAPACIDAD_POR_DEFECTO = 1000
+
+# Consulta barata para saber si el gráfico guardado sigue vigente. Filtra igual que
+# curvas_de_crecimiento.consulta_sql: cuando el paciente cumple 19 años deja de devolver
+# filas, la clave cambia y no se sirve el gráfico viejo
+consulta_frescura = """
+    SELECT sud."FK_sexo", MAX(mc."con_fecha"), MAX(mc."PK_consulta"), COUNT(mcsv."FK_signo_vital")
+    FROM seg_usuario_detalles sud
+    JOIN med_consultas mc ON mc."FK_paciente" = sud."PK_identificacion"
+    JOIN med_consulta_signos_vitales mcsv ON mcsv."PK_consulta" = mc."PK_consulta"
+    WHERE sud."PK_identificacion" = %s
+    AND sud."usd_fecha_nacimiento" >= current_date - interval '19 years'
+    AND mcsv."FK_signo_vital" IN (3, 5, 7)
+    GROUP BY sud."FK_sexo";
+"""
+base_datos.registrar_sentencia('frescura', consulta_frescura)
+
+# Módulos que influyen en el gráfico, si cambia alguno cambia la versión del código
+MODULOS_CODIGO = ('curvas_de_crecimiento.py', 'clasificacion.py', 'colores.py', 'ingesta.py', 'referencias.py',
+                  'rejilla.py')
+
+
+def calcular_version_codigo():
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    sha = hashlib.sha256()
+    for modulo in MODULOS_CODIGO:
+        with open(os.path.join(directorio, modulo), 'rb') as archivo:
+            sha.update(archivo.read())
+    return sha.hexdigest()[:16]
+
+VERSION_CODIGO = calcular_version_codigo()
+
+
+@lru_cache(maxsize=None)
+def version_referencias(genero):
+    # Cargar las referencias abre el npz y revisa los archivos de origen, una vez por proceso
+    return referencias.cargar(genero).version
+
+
+def consultar_frescura(conn, cedula):
+    cursor = conn.cursor()
+    try:
+        base_datos.ejecutar(cursor, 'frescura', consulta_frescura, (cedula,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+class CacheGraficos:
+
+    def __init__(self, directorio, capacidad=CAPACIDAD_POR_DEFECTO):
+        self.directorio = directorio
+        self.capacidad = capacidad
+        # El servicio atiende cada consulta en un hilo, los contadores se actualizan con el bloqueo
+        self.bloqueo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, conn, cedula, formato='html', variante=''):
+        fila = consultar_frescura(conn, cedula)
+        sexo, ultima_fecha, ultima_consulta, signos = fila if fila else (None, None, None, 0)
+        genero = 2 if sexo == 2 else 1
+        partes = (cedula, sexo, ultima_fecha, ultima_consulta, signos, version_referencias(genero), VERSION_CODIGO,
+                  formato, variante)
+        return hashlib.sha256('|'.join(str(parte) for parte in partes).encode('utf-8')).hexdigest()
+
+    def ruta(self, clave, formato='html'):
+        return os.path.join(self.directorio, f"{clave}.{formato}")
+
+    def obtener(self, clave, formato='html'):
+        ruta = self.ruta(clave, formato)
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                contenido = archivo.read()
+        except FileNotFoundError:
+            with self.bloqueo:
+                self.fallos += 1
+            return None
+        # Se marca como usado recientemente
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            pass
+        with self.bloqueo:
+            self.aciertos += 1
+        return contenido
+
+    def guardar(self, clave, contenido, formato='html'):
+        # Temporal + renombrado: otro proceso nunca lee una entrada a medias
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            os.replace(temporal, self.ruta(clave, formato))
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        self.desalojar()
+
+    def entradas(self):
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if not re.fullmatch(r'[0-9a-f]{64}\.\w+', nombre):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                entradas.append((os.stat(ruta).st_mtime_ns, ruta))
+            except FileNotFoundError:
+                pass
+        return entradas
+
+    def desalojar(self):
+        entradas = self.entradas()
+        sobrantes = len(entradas) - self.capacidad
+        if sobrantes <= 0:
+            return
+        for _, ruta in sorted(entradas)[:sobrantes]:
+            try:
+                os.remove(ruta)
+                with self.bloqueo:
+                    self.desalojos += 1
+            except FileNotFoundError:
+                pass
+
+    def estadisticas(self):
+        with self.bloqueo:
+            aciertos, fallos, desalojos = self.aciertos, self.fallos, self.desalojos
+        consultas = aciertos + fallos
+        return {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'desalojos': desalojos,
+            'tasa_aciertos': round(aciertos / consultas, 4) if consultas else 0.0,
+            'entradas': len(self.entradas()),
+            'capacidad': self.capacidad,
+        }
+
+
+def crear_cache(directorio=None, capacidad=None, ruta_config='config.ini'):
+    # La sección [cache] de config.ini es opcional, sin directorio no se usa caché
+    config = configparser.ConfigParser()
+    config.read(ruta_config)
+    directorio = directorio or config.get('cache', 'directorio', fallback=None)
+    if not directorio:
+        return None
+    if capacidad is None:
+        capacidad = config.getint('cache', 'capacidad', fallback=CAPACIDAD_POR_DEFECTO)
+    return CacheGraficos(directorio, capacidad)
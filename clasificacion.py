@@ -0,0 +1,200 @@
+import configparser
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from referencias import SUFIJOS_DESVIACION
+
+# Clasificación vectorizada del estado nutricional
+# Recibe arreglos de edades (en meses) y valores de un indicador, evalúa cada curva de
+# desviación estándar una sola vez por banda de edad y devuelve el código de estado y el
+# puntaje z continuo de todos los puntos a la vez.
+# Con el método 'lms' el puntaje usa los parámetros L, M y S que publica la OMS (columnas
+# _L, _M y _S de las tablas) interpolados en la edad y la fórmula de Box-Cox, en una sola
+# tabla por indicador para todas las bandas de edad, con la regla de la OMS más allá de +-3
+# para peso e IMC. El estado sale del puntaje. Sin esas columnas el método no se permite.
+# Si la referencia trae su rejilla diaria (ref.rejilla, ver rejilla.py) las curvas y los
+# parámetros de todas las mediciones se leen de una vez por índice de día, sin bandas. Con
+# dias (las edades enteras de ingesta) el índice es directo, sin volver a pasar de meses.
+# config.ini, sección opcional:
+#   [clasificacion]
+#   metodo = curvas      ; o lms
+
+NORMAL = 0
+ALERTA = 1
+ALTO = 2
+BAJO = 3
+DESCONOCIDO = -1
+
+NOMBRES_ESTADO = {
+    'peso': {NORMAL: "Normal", ALERTA: "Alerta", ALTO: "Sobrepeso", BAJO: "Desnutricion", DESCONOCIDO: "Desconocido"},
+    'talla': {NORMAL: "Normal", ALERTA: "Alerta", ALTO: "Gigantismo", BAJO: "Enanismo", DESCONOCIDO: "Desconocido"},
+    'imc': {NORMAL: "Normal", ALERTA: "Alerta", ALTO: "IMC Alto", BAJO: "IMC Bajo", DESCONOCIDO: "Desconocido"},
+}
+
+METODOS = ('curvas', 'lms')
+
+# Indicadores con la cola restringida de la OMS: más allá de +-3 el puntaje se mide en
+# unidades de la distancia entre las curvas 2 y 3, no con la fórmula de Box-Cox
+COLA_RESTRINGIDA = ('peso', 'imc')
+
+# Bandas de edad por indicador: (rango de la tabla, límite superior en meses, divisor a las unidades de la tabla)
+# Cada banda incluye su límite superior, igual que los filtros de los paneles (6 < meses <= 24)
+RANGOS = {
+    'peso': (('0_6', 6, 1), ('6_24', 24, 1), ('24_60', 60, 1), ('5_10a', 120, 12)),
+    'talla': (('0_6', 6, 1), ('6_24', 24, 1), ('24_60', 60, 1), ('5_19a', 228, 12)),
+    'imc': (('0_24', 24, 1), ('24_60', 60, 1), ('5_19', 228, 12)),
+}
+
+
+@lru_cache(maxsize=None)
+def leer_metodo(ruta='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    metodo = config.get('clasificacion', 'metodo', fallback='curvas')
+    if metodo not in METODOS:
+        raise ValueError(f"[clasificacion] metodo desconocido: {metodo} (válidos: {', '.join(METODOS)})")
+    return metodo
+
+
+def banda_edad(indicador, meses):
+    # Índice de la banda de cada edad, len(RANGOS[indicador]) si queda fuera de las tablas
+    limites = [limite for _, limite, _ in RANGOS[indicador]]
+    return np.searchsorted(limites, meses, side='left')
+
+
+def lineas_desviacion(ref, indicador, rango, x):
+    # Evalúa todas las curvas disponibles de la tabla en x, una llamada por curva
+    desviaciones = []
+    lineas = []
+    for desviacion, sufijo in sorted(SUFIJOS_DESVIACION.items()):
+        polinomio = getattr(ref, f"polinomio_{indicador}{sufijo}_{rango}", None)
+        if polinomio is not None:
+            desviaciones.append(desviacion)
+            lineas.append(polinomio(x))
+    return np.array(desviaciones, dtype=float), np.vstack(lineas)
+
+
+def puntaje_z(desviaciones, lineas, valores):
+    # Interpolación lineal entre las curvas que rodean a cada valor, fuera de +-3 se
+    # extrapola con la separación entre las dos últimas curvas
+    debajo = (lineas <= valores).sum(axis=0)
+    superior = np.clip(debajo, 1, len(desviaciones) - 1)
+    inferior = superior - 1
+    columnas = np.arange(valores.shape[0])
+    linea_inferior = lineas[inferior, columnas]
+    linea_superior = lineas[superior, columnas]
+    fraccion = (valores - linea_inferior) / (linea_superior - linea_inferior)
+    return desviaciones[inferior] + fraccion * (desviaciones[superior] - desviaciones[inferior])
+
+
+def comprobar_lms(ref):
+    if not getattr(ref, 'tiene_lms', False):
+        raise ValueError("[clasificacion] metodo = lms necesita las columnas <indicador>_L, _M y _S de la OMS "
+                         "en todas las tablas de datos/")
+
+def tabla_lms(ref, indicador):
+    # Nodos en meses y L, M, S de todas las bandas del indicador unidos en una tabla. Cada
+    # banda aporta sus nodos hasta su límite superior, como en banda_edad. Donde cambia de
+    # archivo (a los 5 años) las tablas no empalman: el primer nodo de la banda siguiente
+    # se corre una fracción de día para que justo después del límite ya se use la nueva
+    if indicador not in ref.lms:
+        edades = []
+        parametros = []
+        inferior = -np.inf
+        for rango, limite, divisor in RANGOS[indicador]:
+            nodos, lms = getattr(ref, f"lms_{indicador}_{rango}")
+            meses = nodos * divisor
+            mascara = (meses >= inferior) & (meses <= limite)
+            edades.append(np.where(meses[mascara] == inferior, inferior + 1e-6, meses[mascara]))
+            parametros.append(lms[:, mascara])
+            inferior = limite
+        ref.lms[indicador] = (np.concatenate(edades), np.hstack(parametros))
+    return ref.lms[indicador]
+
+def valor_lms(l, m, s, z):
+    # Valor con puntaje z, la curva z de la tabla
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(l == 0, m * np.exp(s * z), m * (1 + l * s * z) ** (1 / np.where(l == 0, 1, l)))
+
+def puntaje_lms(ref, indicador, meses, valores, dias=None):
+    # Puntaje z LMS de cada medición, NaN fuera de las tablas
+    comprobar_lms(ref)
+    meses = np.asarray(meses, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+    rejilla = getattr(ref, 'rejilla', None)
+    if rejilla is not None:
+        l, m, s = rejilla.lms(indicador, meses, dias)
+    else:
+        edades, (tabla_l, tabla_m, tabla_s) = tabla_lms(ref, indicador)
+        l = np.interp(meses, edades, tabla_l)
+        m = np.interp(meses, edades, tabla_m)
+        s = np.interp(meses, edades, tabla_s)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(l == 0, np.log(valores / m) / s,
+                     ((valores / m) ** l - 1) / (np.where(l == 0, 1, l) * s))
+    if indicador in COLA_RESTRINGIDA:
+        mas3 = valor_lms(l, m, s, 3)
+        menos3 = valor_lms(l, m, s, -3)
+        z = np.where(z > 3, 3 + (valores - mas3) / (mas3 - valor_lms(l, m, s, 2)), z)
+        z = np.where(z < -3, -3 + (valores - menos3) / (valor_lms(l, m, s, -2) - menos3), z)
+    if rejilla is not None:
+        return z
+    # La primera banda incluye las edades menores, como banda_edad
+    return np.where(meses <= edades[-1], z, np.nan)
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+def percentil(puntajes):
+    # Percentil (0 a 100) de la normal estándar
+    return 50 * (1 + _erf(np.asarray(puntajes, dtype=float) / math.sqrt(2)).astype(float))
+
+def estados_puntaje(puntajes):
+    # Mismos cortes que las curvas: normal entre -2 y 2, alerta hasta +-3
+    absoluto = np.abs(puntajes)
+    condiciones = [absoluto <= 2, absoluto <= 3, puntajes > 3, puntajes < -3]
+    return np.select(condiciones, [NORMAL, ALERTA, ALTO, BAJO], DESCONOCIDO).astype(np.int8)
+
+
+def clasificar(ref, indicador, meses, valores, metodo=None, dias=None):
+    meses = np.asarray(meses, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+    estados = np.full(meses.shape, DESCONOCIDO, dtype=np.int8)
+    puntajes = np.full(meses.shape, np.nan)
+    if meses.size == 0:
+        return estados, puntajes
+    if (metodo or leer_metodo()) == 'lms':
+        puntajes = puntaje_lms(ref, indicador, meses, valores, dias)
+        return estados_puntaje(puntajes), puntajes
+    rejilla = getattr(ref, 'rejilla', None)
+    if rejilla is not None:
+        desviaciones, lineas = rejilla.lineas(indicador, meses, dias)
+        return estados_lineas(desviaciones, lineas, valores), puntaje_z(desviaciones, lineas, valores)
+
+    bandas = banda_edad(indicador, meses)
+    for indice, (rango, _, divisor) in enumerate(RANGOS[indicador]):
+        mascara = bandas == indice
+        if not mascara.any():
+            continue
+        v = valores[mascara]
+        desviaciones, lineas = lineas_desviacion(ref, indicador, rango, meses[mascara] / divisor)
+        estados[mascara] = estados_lineas(desviaciones, lineas, v)
+        puntajes[mascara] = puntaje_z(desviaciones, lineas, v)
+    return estados, puntajes
+
+def estados_lineas(desviaciones, lineas, v):
+    linea = dict(zip(desviaciones.astype(int).tolist(), lineas))
+    # Mismo orden de prioridad que las condiciones originales punto a punto
+    condiciones = [
+        (linea[-2] <= v) & (v <= linea[2]),
+        ((linea[2] <= v) & (v <= linea[3])) | ((linea[-3] <= v) & (v <= linea[-2])),
+        v > linea[3],
+        v < linea[-3],
+    ]
+    return np.select(condiciones, [NORMAL, ALERTA, ALTO, BAJO], DESCONOCIDO)
+
+
+def nombres_estado(indicador, estados):
+    nombres = NOMBRES_ESTADO[indicador]
+    return [nombres[int(estado)] for estado in estados]
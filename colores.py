@@ -0,0 +1,74 @@
+import numpy as np
+
+from clasificacion import RANGOS, banda_edad, leer_metodo, puntaje_lms
+
+# Colores de los puntos del paciente
+# Cada punto se ubica entre sus curvas -2, 0 y +2: la posición 0 es la curva -2, 0.5 la
+# mediana y 1 la curva +2. Con esa posición se indexa un degradado precalculado, así no
+# hay que construir un colormap por punto. Con el método 'lms' la posición sale del puntaje
+# z LMS: -2 es 0, 0 es 0.5 y +2 es 1.
+
+# Define los colores del degradado
+start_color = '#8f0101'
+color_inferior = '#918f14'
+mid_color = '#008000'  # green
+color_superior = '#918f14'
+end_color = '#8f0101'
+
+# Color para puntos sin referencia (edad fuera de las tablas o valor vacío)
+color_sin_referencia = "rgba(0, 0, 0, 0.75)"
+
+# Mismo número de niveles que los colormap de matplotlib
+NIVELES = 256
+
+
+def _rgb(color_hex):
+    return [int(color_hex[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+
+def construir_degradado(paradas, niveles=NIVELES):
+    # Interpolación lineal en RGB entre colores igualmente espaciados, como LinearSegmentedColormap
+    posiciones = np.linspace(0, 1, len(paradas))
+    rgb = np.array([_rgb(color) for color in paradas])
+    x = np.linspace(0, 1, niveles)
+    canales = np.column_stack([np.interp(x, posiciones, rgb[:, canal]) for canal in range(3)])
+    return np.array(["#{:02x}{:02x}{:02x}".format(*(int(c * 255) for c in fila)) for fila in canales])
+
+DEGRADADO = construir_degradado([start_color, color_inferior, mid_color, color_superior, end_color])
+
+
+def posicion_normalizada(ref, indicador, meses, valores, metodo=None, dias=None):
+    meses = np.asarray(meses, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+    if (metodo or leer_metodo()) == 'lms':
+        return 0.5 + puntaje_lms(ref, indicador, meses, valores, dias) / 4
+    rejilla = getattr(ref, 'rejilla', None)
+    if rejilla is not None:
+        # Curvas -2, 0 y +2 de todas las mediciones de una vez (columnas 1, 3 y 5)
+        _, lineas = rejilla.lineas(indicador, meses, dias)
+        return mitades(valores, lineas[1], lineas[3], lineas[5])
+    posicion = np.full(meses.shape, np.nan)
+    bandas = banda_edad(indicador, meses)
+    for indice, (rango, _, divisor) in enumerate(RANGOS[indicador]):
+        mascara = bandas == indice
+        if not mascara.any():
+            continue
+        x = meses[mascara] / divisor
+        v = valores[mascara]
+        ideal = getattr(ref, f"polinomio_{indicador}_{rango}")(x)
+        inferior = getattr(ref, f"polinomio_{indicador}_menos2_{rango}")(x)
+        superior = getattr(ref, f"polinomio_{indicador}_mas2_{rango}")(x)
+        posicion[mascara] = mitades(v, inferior, ideal, superior)
+    return posicion
+
+def mitades(v, inferior, ideal, superior):
+    # Cada mitad del degradado cubre su tramo, -2 a 0 y 0 a +2
+    return np.where(v <= ideal,
+                    0.5 * (v - inferior) / (ideal - inferior),
+                    0.5 + 0.5 * (v - ideal) / (superior - ideal))
+
+
+def asignar_colores(ref, indicador, meses, valores, metodo=None, dias=None):
+    posicion = posicion_normalizada(ref, indicador, meses, valores, metodo, dias)
+    validos = ~np.isnan(posicion)
+    indices = np.clip((np.nan_to_num(posicion) * NIVELES).astype(int), 0, NIVELES - 1)
+    return np.where(validos, DEGRADADO[indices], color_sin_referencia).tolist()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import curvas_de_crecimiento as curvas
+
+# Comparación de la consulta de signos vitales
+# Ejecuta la consulta original (AGE(...) y una fila por signo vital) y la actual (fecha de
+# corte y una fila por consulta) sobre las mismas cédulas, muestra el plan de cada una con
+# EXPLAIN ANALYZE y la latencia de varias repeticiones. Pensado para una base local
+# sembrada, antes y después de aplicar migraciones/001_indices_signos_vitales.sql.
+# Uso:
+#   python comparar_consultas.py --muestra 50 --repeticiones 20
+#   python comparar_consultas.py 1234567890 0987654321
+
+consulta_original = """
+    SELECT mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mcsv."FK_signo_vital", mcsv."sigv_resultado", mc."con_fecha", sud."usd_fecha_nacimiento"
+    FROM med_consulta_signos_vitales mcsv
+    JOIN med_consultas mc ON mcsv."PK_consulta" = mc."PK_consulta"
+    JOIN seg_usuario_detalles sud ON mc."FK_paciente" = sud."PK_identificacion"
+    WHERE AGE(current_date, sud."usd_fecha_nacimiento") <= interval '19 years'
+    AND ("FK_signo_vital" = 3 OR "FK_signo_vital" = 5 OR "FK_signo_vital" = 7)
+    AND sud."PK_identificacion" = %s
+    ORDER BY mc."con_fecha";
+"""
+
+CONSULTAS = {
+    'original': consulta_original,
+    'actual': curvas.consulta_sql,
+}
+
+consulta_muestra = """
+    SELECT "FK_paciente" FROM (SELECT DISTINCT "FK_paciente" FROM med_consultas) pacientes
+    ORDER BY random() LIMIT %s;
+"""
+
+
+def elegir_cedulas(conn, muestra):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(consulta_muestra, (muestra,))
+        return [str(fila[0]) for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def explicar(conn, consulta, cedula):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + consulta, (cedula,))
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+
+def nodos(plan, profundidad=0):
+    # Recorre el plan mostrando tipo de nodo, relación e índice usado
+    yield profundidad, plan
+    for hijo in plan.get('Plans', ()):
+        yield from nodos(hijo, profundidad + 1)
+
+def medir(conn, consulta, cedulas, repeticiones):
+    cursor = conn.cursor()
+    tiempos = []
+    filas = 0
+    try:
+        for _ in range(repeticiones):
+            for cedula in cedulas:
+                inicio = time.perf_counter()
+                cursor.execute(consulta, (cedula,))
+                filas += len(cursor.fetchall())
+                tiempos.append(time.perf_counter() - inicio)
+    finally:
+        cursor.close()
+    tiempos.sort()
+    return {
+        'mediana_ms': 1000 * statistics.median(tiempos),
+        'p95_ms': 1000 * tiempos[int(0.95 * (len(tiempos) - 1))],
+        'filas_por_paciente': filas / len(tiempos),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara planes y latencia de la consulta de signos vitales')
+    parser.add_argument('cedulas', nargs='*', help='Cédulas a consultar (por defecto una muestra al azar)')
+    parser.add_argument('--muestra', type=int, default=20)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    conn = curvas.conectar()
+    conn.autocommit = True
+    try:
+        cedulas = args.cedulas or elegir_cedulas(conn, args.muestra)
+        if not cedulas:
+            print('No hay pacientes en la base de datos', file=sys.stderr)
+            return 1
+        for nombre, consulta in CONSULTAS.items():
+            plan = explicar(conn, consulta, cedulas[0])
+            print(f"== {nombre}: planificación {plan['Planning Time']:.3f} ms, ejecución {plan['Execution Time']:.3f} ms")
+            for profundidad, nodo in nodos(plan['Plan']):
+                detalle = ' '.join(f"{clave}={nodo[clave]}" for clave in ('Relation Name', 'Index Name') if clave in nodo)
+                print(f"   {'  ' * profundidad}{nodo['Node Type']} {detalle} (filas {nodo.get('Actual Rows')}, "
+                      f"bloques leídos {nodo.get('Shared Read Blocks', 0)})")
+        print()
+        for nombre, consulta in CONSULTAS.items():
+            resultado = medir(conn, consulta, cedulas, args.repeticiones)
+            print(f"{nombre}: mediana {resultado['mediana_ms']:.3f} ms, p95 {resultado['p95_ms']:.3f} ms, "
+                  f"{resultado['filas_por_paciente']:.1f} filas por paciente ({len(cedulas)} pacientes)")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
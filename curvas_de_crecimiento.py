@@ -1,492 +1,112 @@
+# Primero, para medir el resto de las importaciones con --tiempos
+import arranque
 import configparser
-import psycopg2
-from psycopg2 import sql
-import plotly.graph_objs as go
-import plotly.io as pio
-from plotly.subplots import make_subplots
-import matplotlib.colors as mcolors
 import numpy as np
-from scipy.interpolate import PchipInterpolator
-import sys
+from functools import lru_cache
+import argparse
 import json
+import os
+import re
+import sys
+import tempfile
+import time
+import uuid
+
+import base_datos
+import cache_graficos
+import clasificacion
+import colores
+import ingesta
+import metricas
+import referencias
+import rejilla
+
+# plotly se importa al construir la primera figura, no al iniciar (ver arranque.py)
+go = arranque.ModuloDiferido('plotly.graph_objs')
+pio = arranque.ModuloDiferido('plotly.io')
+plotly_subplots = arranque.ModuloDiferido('plotly.subplots')
+plotly_utils = arranque.ModuloDiferido('plotly.utils')
+# psycopg2 al conectar, la misma instancia diferida de base_datos
+psycopg2 = base_datos.psycopg2
+arranque.marcar('importaciones al iniciar')
 
 # Curvas de crecimiento
 # Autor: Daniel Sánchez
 # Fecha: 2024-01-20
 
-# Obtener argumentos de la línea de comandos
-cedula = sys.argv[1] if len(sys.argv) > 1 else ''
+# Nombre por defecto del archivo generado por la línea de comandos
+filename = 'grafico_curvas_plotly.html'
 
 # Configuración de la base de datos
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-db_config = {
-    'host': config.get('database', 'host'),
-    'database': config.get('database', 'name'),
-    'user': config.get('database', 'user'),
-    'password': config.get('database', 'password'),
-}
+def leer_configuracion(ruta='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(ruta)
+
+    db_config = {
+        'host': config.get('database', 'host'),
+        'database': config.get('database', 'name'),
+        'user': config.get('database', 'user'),
+        'password': config.get('database', 'password'),
+    }
+    return db_config
 
 # Conectar a la base de datos
-conn = psycopg2.connect(**db_config)
-
-# Crear un objeto cursor
-cursor = conn.cursor()
+def conectar(db_config=None):
+    return psycopg2.connect(**(db_config or leer_configuracion()))
 
 # Ejecutar una consulta SELECT
 # Consulta SQL
-consulta_sql = sql.SQL("""
-    SELECT mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mcsv."FK_signo_vital", mcsv."sigv_resultado", mc."con_fecha", sud."usd_fecha_nacimiento"
-    FROM med_consulta_signos_vitales mcsv
-    JOIN med_consultas mc ON mcsv."PK_consulta" = mc."PK_consulta"
-    JOIN seg_usuario_detalles sud ON mc."FK_paciente" = sud."PK_identificacion"
-    WHERE AGE(current_date, sud."usd_fecha_nacimiento") <= interval '19 years'
-    AND ("FK_signo_vital" = 3 OR "FK_signo_vital" = 5 OR "FK_signo_vital" = 7)
-    AND sud."PK_identificacion" = %s
+# Una fila por consulta con peso (3), talla (5) e IMC (7) en columnas. La edad se filtra
+# contra una fecha de corte para que Postgres pueda usar índices (AGE(...) no lo permite),
+# los índices están en migraciones/001_indices_signos_vitales.sql
+# Si una consulta tiene el mismo signo registrado dos veces (una corrección) se usa el
+# último guardado, el de "sigv_registro" mayor (migraciones/002_orden_signos_vitales.sql).
+# MAX no sirve: sigv_resultado es texto y compara como texto ('9.8' > '10.2').
+# Las mismas columnas usan lote.py y extraccion.py, un paciente tiene los mismos valores
+# sin importar por dónde se lea
+SIGNOS_POR_CONSULTA = """
+        (ARRAY_AGG(mcsv."sigv_resultado" ORDER BY mcsv."sigv_registro" DESC)
+            FILTER (WHERE mcsv."FK_signo_vital" = 3 AND mcsv."sigv_resultado" IS NOT NULL))[1],
+        (ARRAY_AGG(mcsv."sigv_resultado" ORDER BY mcsv."sigv_registro" DESC)
+            FILTER (WHERE mcsv."FK_signo_vital" = 5 AND mcsv."sigv_resultado" IS NOT NULL))[1],
+        (ARRAY_AGG(mcsv."sigv_resultado" ORDER BY mcsv."sigv_registro" DESC)
+            FILTER (WHERE mcsv."FK_signo_vital" = 7 AND mcsv."sigv_resultado" IS NOT NULL))[1]"""
+consulta_sql = f"""
+    SELECT mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mc."con_fecha", sud."usd_fecha_nacimiento",{SIGNOS_POR_CONSULTA}
+    FROM seg_usuario_detalles sud
+    JOIN med_consultas mc ON mc."FK_paciente" = sud."PK_identificacion"
+    JOIN med_consulta_signos_vitales mcsv ON mcsv."PK_consulta" = mc."PK_consulta"
+    WHERE sud."PK_identificacion" = %s
+    AND sud."usd_fecha_nacimiento" >= current_date - interval '19 years'
+    AND mcsv."FK_signo_vital" IN (3, 5, 7)
+    GROUP BY mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mc."con_fecha", sud."usd_fecha_nacimiento"
     ORDER BY mc."con_fecha";
-""")
-# Ejecutar la consulta con el parámetro
-cursor.execute(consulta_sql, (cedula,))
-
-# Obtener los resultados
-resultados = cursor.fetchall()
-
-# Creamos nuestras variables para graficar los datos
-
-fecha_peso = []
-fecha_talla = []
-fecha_imc = []
-valor_peso = []
-valor_talla = []
-valor_imc = []
-
-display_fecha_peso_0_6 = []
-display_fecha_peso_6_24 = []
-display_fecha_peso_24_60 = []
-display_fecha_peso_5_10a = []
-
-display_fecha_talla_0_6 = []
-display_fecha_talla_6_24 = []
-display_fecha_talla_24_60 = []
-display_fecha_talla_5_19a = []
-
-display_fecha_imc_0_5 = []
-display_fecha_imc_5_19 = []
-
-genero = 1
-
-for resultado in resultados:
-
-    # Desempaquetar la tupla en variables
-    PK_consulta, FK_paciente, FK_sexo, FK_signo_vital, sigv_resultado, con_fecha, usd_fecha_nacimiento = resultado
-
-    if (FK_sexo == 1):
-        genero = 1
-    elif (FK_sexo == 2):
-        genero = 2
-    else:
-        genero = 1
-
-    # Verificar si el valor del signo vital es None
-    if sigv_resultado is None:
-        continue  # Salta a la siguiente iteración del bucle si es None
-
-    # Obtenemos el índice de el signo vital, siendo 3 = Peso y 5 = Talla
-    signo_vital = int(FK_signo_vital)
-    # Obtenemos el valor
-    valor_signo_vital = float(sigv_resultado)
-
-    # Python ya interpreta las fechas como datetime
-    diferencia = (con_fecha - usd_fecha_nacimiento).days
-
-    # Constante de días calculada visualmente, en 1 día hay 65/1988 meses
-    constante = 65/1988
-
-    mes_consulta = diferencia * constante
-    # Vamos a generar una condición, dependiendo de que signo vital sea incrustara su valor en uno u otro array
-    if (signo_vital == 3):
-        valor_peso.append(valor_signo_vital)
-        fecha_peso.append(mes_consulta)
-        # Dividimos el texto de las fechas
-        if 0 <= mes_consulta <= 6:
-            display_fecha_peso_0_6.append(con_fecha)
-        elif 6 < mes_consulta <= 24:
-            display_fecha_peso_6_24.append(con_fecha)
-        elif 24 < mes_consulta <=60:
-            display_fecha_peso_24_60.append(con_fecha)
-        elif 60 < mes_consulta < 120:
-            display_fecha_peso_5_10a.append(con_fecha)
-    elif (signo_vital == 5):
-        if valor_signo_vital < 3:  # Si es menor que 1, asumimos que está en metros
-            valor_signo_vital = valor_signo_vital * 100  # Convertir de metros a centímetros
-            valor_signo_vital = round(valor_signo_vital, 2)  # Redondear a dos decimales
-        valor_talla.append(valor_signo_vital)
-        fecha_talla.append(mes_consulta)
-        # Dividimos el texto de las fechas
-        if 0 <= mes_consulta <= 6:
-            display_fecha_talla_0_6.append(con_fecha)
-        elif 6 < mes_consulta <= 24:
-            display_fecha_talla_6_24.append(con_fecha)
-        elif 24 < mes_consulta <=60:
-            display_fecha_talla_24_60.append(con_fecha)
-        elif 60 < mes_consulta < 228:
-            display_fecha_talla_5_19a.append(con_fecha)
-    elif(signo_vital == 7):
-        if valor_signo_vital == 0:
-            continue # Si el valor del signo vital es cero, se continua a la siguiente interacción.
-        valor_imc.append(valor_signo_vital)
-        fecha_imc.append(mes_consulta)
-        # Dividimos el texto de las fechas
-        if 0 <= mes_consulta <= 60:
-            display_fecha_imc_0_5.append(con_fecha)
-        elif 60 < mes_consulta <= 228:
-            display_fecha_imc_5_19.append(con_fecha)
-
-# Cerrar el cursor y la conexión
-cursor.close()
-conn.close()
-
-texto_titulo = "Niños" if genero == 1 else "Niñas"
-
-# Construir el nombre base del archivo
-base_filename = "datos_hombre" if genero == 1 else "datos_mujer"
-
-# Función para extraer datos específicos
-def extraer_datos(filename):
-    with open(filename, "r") as file:
-        return json.load(file)["datos"]
-
-# Extraer la lista de datos del JSON
-datos = extraer_datos(f"datos/{base_filename}.json")  # Peso y talla de 0 a 5 años
-datos_5_10a = extraer_datos(f"datos/{base_filename}_peso_5_10.json")  # Peso de 5 a 10 años
-datos_5_19a = extraer_datos(f"datos/{base_filename}_talla_5_19.json")  # Talla de 5 a 19 años
-datos_imc = extraer_datos(f"datos/imc_{base_filename}_0_5.json")  # Índice de masa corporal de 0 a 5 años
-datos_imc_5_19 = extraer_datos(f"datos/imc_{base_filename}_5_19.json")  # Índice de masa corporal de 5 a 19 años
-
-# Se debe escoger los valores límite dado que la siguiente curva comienza en el límite
-def filtrar_datos(datos_a_filtrar, edad_min, edad_max=None):
-    if edad_max is None:
-        return [dato for dato in datos_a_filtrar if dato["edad"] <= edad_min]
-    else:
-        return [dato for dato in datos_a_filtrar if edad_min <= dato["edad"] <= edad_max]
-
-def obtener_array_clave(datos_filtrados, clave):
-    return np.array([dato[clave] for dato in datos_filtrados])
-    
-# Filtramos datos de 0-6 meses
-datos_0_6 = filtrar_datos(datos, 6)
-
-meses_0_6 = obtener_array_clave(datos_0_6, "edad")
-peso_0_6 = obtener_array_clave(datos_0_6, "peso")
-peso_mas_dos_0_6 = obtener_array_clave(datos_0_6, "peso_max")
-peso_menos_dos_0_6 = obtener_array_clave(datos_0_6, "peso_min")
-peso_mas_tres_0_6 = obtener_array_clave(datos_0_6, "peso_max3")
-peso_menos_tres_0_6 = obtener_array_clave(datos_0_6, "peso_min3")
-
-talla_0_6 = obtener_array_clave(datos_0_6, "talla")
-talla_mas_dos_0_6 = obtener_array_clave(datos_0_6, "talla_max")
-talla_menos_dos_0_6 = obtener_array_clave(datos_0_6, "talla_min")
-talla_mas_tres_0_6 = obtener_array_clave(datos_0_6, "talla_max3")
-talla_menos_tres_0_6 = obtener_array_clave(datos_0_6, "talla_min3")
-
-# Filtramos datos de 6-24 meses
-datos_6_24 = filtrar_datos(datos, 6, 24)
-
-meses_6_24 = obtener_array_clave(datos_6_24, "edad")
-
-peso_6_24 = obtener_array_clave(datos_6_24, "peso")
-peso_mas_dos_6_24 = obtener_array_clave(datos_6_24, "peso_max")
-peso_menos_dos_6_24 = obtener_array_clave(datos_6_24, "peso_min")
-peso_mas_tres_6_24 = obtener_array_clave(datos_6_24, "peso_max3")
-peso_menos_tres_6_24 = obtener_array_clave(datos_6_24, "peso_min3")
-
-talla_6_24 = obtener_array_clave(datos_6_24, "talla")
-talla_mas_dos_6_24 = obtener_array_clave(datos_6_24, "talla_max")
-talla_menos_dos_6_24 = obtener_array_clave(datos_6_24, "talla_min")
-talla_mas_tres_6_24 = obtener_array_clave(datos_6_24, "talla_max3")
-talla_menos_tres_6_24 = obtener_array_clave(datos_6_24, "talla_min3")
-
-# Filtramos los datos de 24-60 meses
-datos_24_60 = filtrar_datos(datos, 24, 60)
-
-meses_24_60 = obtener_array_clave(datos_24_60, "edad")
-
-peso_24_60 = obtener_array_clave(datos_24_60, "peso")
-peso_mas_dos_24_60 = obtener_array_clave(datos_24_60, "peso_max")
-peso_menos_dos_24_60 = obtener_array_clave(datos_24_60, "peso_min")
-peso_mas_tres_24_60 = obtener_array_clave(datos_24_60, "peso_max3")
-peso_menos_tres_24_60 = obtener_array_clave(datos_24_60, "peso_min3")
-
-talla_24_60 = obtener_array_clave(datos_24_60, "talla")
-talla_mas_dos_24_60 = obtener_array_clave(datos_24_60, "talla_max")
-talla_menos_dos_24_60 = obtener_array_clave(datos_24_60, "talla_min")
-talla_mas_tres_24_60 = obtener_array_clave(datos_24_60, "talla_max3")
-talla_menos_tres_24_60 = obtener_array_clave(datos_24_60, "talla_min3")
-
-# Filtramos los datos de peso 5-10 años
-datos_5_10a = filtrar_datos(datos_5_10a, 5, 10)
-# Filtrammos los datos de talla para 5-19 años
-datos_5_19a = filtrar_datos(datos_5_19a, 5, 19)
-
-# Asignamos los datos del peso para años 5 al 10
-year_5_10 = obtener_array_clave(datos_5_10a, "edad")
-peso_5_10a = obtener_array_clave(datos_5_10a, "peso")
-peso_mas_uno_5_10a = obtener_array_clave(datos_5_10a, "peso_mas1")
-peso_menos_uno_5_10a = obtener_array_clave(datos_5_10a, "peso_menos1")
-peso_mas_dos_5_10a = obtener_array_clave(datos_5_10a, "peso_mas2")
-peso_menos_dos_5_10a = obtener_array_clave(datos_5_10a, "peso_menos2")
-peso_mas_tres_5_10a = obtener_array_clave(datos_5_10a, "peso_mas3")
-peso_menos_tres_5_10a = obtener_array_clave(datos_5_10a, "peso_menos3")
-
-# Asignamos los datos del talla para años 5 al 19
-year_5_19 = obtener_array_clave(datos_5_19a, "edad")
-talla_5_19a = obtener_array_clave(datos_5_19a, "talla")
-talla_mas_uno_5_19a = obtener_array_clave(datos_5_19a, "talla_mas1")
-talla_menos_uno_5_19a = obtener_array_clave(datos_5_19a, "talla_menos1")
-talla_mas_dos_5_19a = obtener_array_clave(datos_5_19a, "talla_mas2")
-talla_menos_dos_5_19a = obtener_array_clave(datos_5_19a, "talla_menos2")
-talla_mas_tres_5_19a = obtener_array_clave(datos_5_19a, "talla_mas3")
-talla_menos_tres_5_19a = obtener_array_clave(datos_5_19a, "talla_menos3")
-
-# Filtramos los datos para el imc de 0 a 2 años
-datos_imc_0_24 = filtrar_datos(datos_imc, 24)
-
-# Filtramos los datos para el imc de 2 a 5 años
-datos_imc_24_60 = filtrar_datos(datos_imc, 24, 60)
-
-# Asignamos los datos del índice de masa corporal, tiene su propio método
-meses_imc_0_24 = obtener_array_clave(datos_imc_0_24, "edad")
-imc_0_24 = obtener_array_clave(datos_imc_0_24, "imc")
-imc_mas1_0_24 = obtener_array_clave(datos_imc_0_24, "imc_mas1")
-imc_menos1_0_24 = obtener_array_clave(datos_imc_0_24, "imc_menos1")
-imc_mas2_0_24 = obtener_array_clave(datos_imc_0_24, "imc_mas2")
-imc_menos2_0_24 = obtener_array_clave(datos_imc_0_24, "imc_menos2")
-imc_mas3_0_24 = obtener_array_clave(datos_imc_0_24, "imc_mas3")
-imc_menos3_0_24 = obtener_array_clave(datos_imc_0_24, "imc_menos3")
-
-meses_imc_24_60 = obtener_array_clave(datos_imc_24_60, "edad")
-imc_24_60 = obtener_array_clave(datos_imc_24_60, "imc")
-imc_mas1_24_60 = obtener_array_clave(datos_imc_24_60, "imc_mas1")
-imc_menos1_24_60 = obtener_array_clave(datos_imc_24_60, "imc_menos1")
-imc_mas2_24_60 = obtener_array_clave(datos_imc_24_60, "imc_mas2")
-imc_menos2_24_60 = obtener_array_clave(datos_imc_24_60, "imc_menos2")
-imc_mas3_24_60 = obtener_array_clave(datos_imc_24_60, "imc_mas3")
-imc_menos3_24_60 = obtener_array_clave(datos_imc_24_60, "imc_menos3")
-
-# Los datos de curvas de imc para 5 a 19 años vienen en años
-
-meses_imc_5_19 = obtener_array_clave(datos_imc_5_19, "edad")
-imc_5_19 = obtener_array_clave(datos_imc_5_19, "imc")
-imc_mas1_5_19 = obtener_array_clave(datos_imc_5_19, "imc_mas1")
-imc_menos1_5_19 = obtener_array_clave(datos_imc_5_19, "imc_menos1")
-imc_mas2_5_19 = obtener_array_clave(datos_imc_5_19, "imc_mas2")
-imc_menos2_5_19 = obtener_array_clave(datos_imc_5_19, "imc_menos2")
-imc_mas3_5_19 = obtener_array_clave(datos_imc_5_19, "imc_mas3")
-imc_menos3_5_19 = obtener_array_clave(datos_imc_5_19, "imc_menos3")
-
-
-# Función para ajustar una función polinómica y obtener polinomio y curva
-def ajustar_curva(meses, datos, grado_polinomio):
-    coeficientes = np.polyfit(meses, datos, grado_polinomio)
-    polinomio = np.poly1d(coeficientes)
-    curva = polinomio(meses)
-    return polinomio, curva
-
-def interpolacion(x_values, y_values):
-    interp_func = PchipInterpolator(x_values, y_values)
-    return interp_func
-
-# Ajustar una función polinómica de grado 3
-grado_polinomio = 3
-
-# region Obtención de ajustes, interpolaciones y curvas
-
-# Interpolación curvas para el peso 0-6 meses
-polinomio_peso_0_6 = interpolacion(meses_0_6, peso_0_6)
-polinomio_peso_menos2_0_6 = interpolacion(meses_0_6, peso_menos_dos_0_6)
-polinomio_peso_mas2_0_6 = interpolacion(meses_0_6, peso_mas_dos_0_6)
-polinomio_peso_mas3_0_6 = interpolacion(meses_0_6, peso_mas_tres_0_6)
-polinomio_peso_menos3_0_6 = interpolacion(meses_0_6, peso_menos_tres_0_6)
-
-# Interpolación curvas para la talla 0-6 meses
-polinomio_talla_0_6 = interpolacion(meses_0_6, talla_0_6)
-polinomio_talla_mas2_0_6 = interpolacion(meses_0_6, talla_mas_dos_0_6)
-polinomio_talla_menos2_0_6 = interpolacion(meses_0_6, talla_menos_dos_0_6)
-polinomio_talla_mas3_0_6 = interpolacion(meses_0_6, talla_mas_tres_0_6)
-polinomio_talla_menos3_0_6 = interpolacion(meses_0_6, talla_menos_tres_0_6)
-
-# Interpolación curvas para el 6-24 meses
-polinomio_peso_6_24 = interpolacion(meses_6_24, peso_6_24)
-polinomio_peso_mas2_6_24 = interpolacion(meses_6_24, peso_mas_dos_6_24)
-polinomio_peso_menos2_6_24 = interpolacion(meses_6_24, peso_menos_dos_6_24)
-polinomio_peso_mas3_6_24 = interpolacion(meses_6_24, peso_mas_tres_6_24)
-polinomio_peso_menos3_6_24 = interpolacion(meses_6_24, peso_menos_tres_6_24)
-
-# Interpolación curvas para la talla 6-24 meses
-polinomio_talla_6_24 = interpolacion(meses_6_24, talla_6_24)
-polinomio_talla_menos2_6_24 = interpolacion(meses_6_24, talla_menos_dos_6_24)
-polinomio_talla_mas2_6_24 = interpolacion(meses_6_24, talla_mas_dos_6_24)
-polinomio_talla_mas3_6_24 = interpolacion(meses_6_24, talla_mas_tres_6_24)
-polinomio_talla_menos3_6_24 = interpolacion(meses_6_24, talla_menos_tres_6_24)
-
-# Interpolación curvas para el peso 24-60 meses
-polinomio_peso_24_60 = interpolacion(meses_24_60, peso_24_60)
-polinomio_peso_mas2_24_60 = interpolacion(meses_24_60, peso_mas_dos_24_60)
-polinomio_peso_menos2_24_60 = interpolacion(meses_24_60, peso_menos_dos_24_60)
-polinomio_peso_mas3_24_60 = interpolacion(meses_24_60, peso_mas_tres_24_60)
-polinomio_peso_menos3_24_60 = interpolacion(meses_24_60, peso_menos_tres_24_60)
-
-# Interpolación curvas para la talla 24-60 meses
-polinomio_talla_24_60 = interpolacion(meses_24_60, talla_24_60)
-polinomio_talla_menos2_24_60 = interpolacion(meses_24_60, talla_menos_dos_24_60)
-polinomio_talla_mas2_24_60 = interpolacion(meses_24_60, talla_mas_dos_24_60)
-polinomio_talla_mas3_24_60 = interpolacion(meses_24_60, talla_mas_tres_24_60)
-polinomio_talla_menos3_24_60 = interpolacion(meses_24_60, talla_menos_tres_24_60)
-
-# Interpolación curvas para el peso 5-10 años
-polinomio_peso_5_10a = interpolacion(year_5_10, peso_5_10a)
-polinomio_peso_mas1_5_10a = interpolacion(year_5_10, peso_mas_uno_5_10a)
-polinomio_peso_menos1_5_10a = interpolacion(year_5_10, peso_menos_uno_5_10a)
-polinomio_peso_mas2_5_10a = interpolacion(year_5_10, peso_mas_dos_5_10a)
-polinomio_peso_menos2_5_10a = interpolacion(year_5_10, peso_menos_dos_5_10a)
-polinomio_peso_mas3_5_10a = interpolacion(year_5_10, peso_mas_tres_5_10a)
-polinomio_peso_menos3_5_10a = interpolacion(year_5_10, peso_menos_tres_5_10a)
-
-# Interpolación para la talla de 5 a 19 años
-polinomio_talla_5_19a = interpolacion(year_5_19, talla_5_19a)
-polinomio_talla_mas1_5_19a = interpolacion(year_5_19, talla_mas_uno_5_19a)
-polinomio_talla_menos1_5_19a = interpolacion(year_5_19, talla_menos_uno_5_19a)
-polinomio_talla_mas2_5_19a = interpolacion(year_5_19, talla_mas_dos_5_19a)
-polinomio_talla_menos2_5_19a = interpolacion(year_5_19, talla_menos_dos_5_19a)
-polinomio_talla_mas3_5_19a = interpolacion(year_5_19, talla_mas_tres_5_19a)
-polinomio_talla_menos3_5_19a = interpolacion(year_5_19, talla_menos_tres_5_19a)
-
-# Interpolación para el índice de masa corporal de 0 a 2 años y de 2 a 5 años
-polinomio_imc_0_24 = interpolacion(meses_imc_0_24, imc_0_24)
-polinomio_imc_mas1_0_24 = interpolacion(meses_imc_0_24, imc_mas1_0_24)
-polinomio_imc_menos1_0_24 = interpolacion(meses_imc_0_24, imc_menos1_0_24)
-polinomio_imc_mas2_0_24 = interpolacion(meses_imc_0_24, imc_mas2_0_24)
-polinomio_imc_menos2_0_24 = interpolacion(meses_imc_0_24, imc_menos2_0_24)
-polinomio_imc_mas3_0_24 = interpolacion(meses_imc_0_24, imc_mas3_0_24)
-polinomio_imc_menos3_0_24 = interpolacion(meses_imc_0_24, imc_menos3_0_24)
-
-polinomio_imc_24_60 = interpolacion(meses_imc_24_60, imc_24_60)
-polinomio_imc_mas1_24_60 = interpolacion(meses_imc_24_60, imc_mas1_24_60)
-polinomio_imc_menos1_24_60 = interpolacion(meses_imc_24_60, imc_menos1_24_60)
-polinomio_imc_mas2_24_60 = interpolacion(meses_imc_24_60, imc_mas2_24_60)
-polinomio_imc_menos2_24_60 = interpolacion(meses_imc_24_60, imc_menos2_24_60)
-polinomio_imc_mas3_24_60 = interpolacion(meses_imc_24_60, imc_mas3_24_60)
-polinomio_imc_menos3_24_60 = interpolacion(meses_imc_24_60, imc_menos3_24_60)
-
-# Interpolación imc de 5 a 19 años
-
-polinomio_imc_5_19 = interpolacion(meses_imc_5_19, imc_5_19)
-polinomio_imc_mas1_5_19 = interpolacion(meses_imc_5_19, imc_mas1_5_19)
-polinomio_imc_menos1_5_19 = interpolacion(meses_imc_5_19, imc_menos1_5_19)
-polinomio_imc_mas2_5_19 = interpolacion(meses_imc_5_19, imc_mas2_5_19)
-polinomio_imc_menos2_5_19 = interpolacion(meses_imc_5_19, imc_menos2_5_19)
-polinomio_imc_mas3_5_19 = interpolacion(meses_imc_5_19, imc_mas3_5_19)
-polinomio_imc_menos3_5_19 = interpolacion(meses_imc_5_19, imc_menos3_5_19)
-
-# endregion
-
-# Control de pesos
-umbral_peso_superior = 60
-umbral_peso_inferior = 1
-umbral_talla_superior = 200
-umbral_talla_inferior = 40
-umbral_imc_inferior = 9
-umbral_imc_superior = 40
-
-# Dividir los datos en dos conjuntos según la condición de la fecha
-datos_peso_menor_6 = [(fecha, peso) for fecha, peso in zip(fecha_peso, valor_peso) if fecha <= 6 and umbral_peso_inferior <= peso <= umbral_peso_superior]
-datos_talla_menor_6 = [(fecha, talla) for fecha, talla in zip(fecha_talla, valor_talla) if fecha <= 6 and umbral_talla_inferior <= talla <= umbral_talla_superior]
-
-datos_peso_entre_6_24 = [(fecha, peso) for fecha, peso in zip(fecha_peso, valor_peso) if 6 < fecha <= 24 and umbral_peso_inferior <= peso <= umbral_peso_superior]
-datos_talla_entre_6_24 = [(fecha, talla) for fecha, talla in zip(fecha_talla, valor_talla) if 6 < fecha <= 24 and umbral_talla_inferior <= talla <= umbral_talla_superior]
-
-datos_peso_entre_24_60 = [(fecha, peso) for fecha, peso in zip(fecha_peso, valor_peso) if 24 < fecha <= 60 and umbral_peso_inferior <= peso <= umbral_peso_superior]
-datos_talla_entre_24_60 = [(fecha, talla) for fecha, talla in zip(fecha_talla, valor_talla) if 24 < fecha <= 60 and umbral_talla_inferior <= talla <= umbral_talla_superior]
-
-datos_peso_entre_5_10a = [(fecha, peso) for fecha, peso in zip(fecha_peso, valor_peso) if 60 < fecha <= 120 and umbral_peso_inferior <= peso <= umbral_peso_superior]
-datos_talla_entre_5_19a = [(fecha, talla) for fecha, talla in zip(fecha_talla, valor_talla) if 60 < fecha <= 228 and umbral_talla_inferior <= talla <= umbral_talla_superior]
-
-datos_imc_entre_0_5 = [(fecha, imc) for fecha, imc in zip(fecha_imc, valor_imc) if fecha <= 60 and umbral_imc_inferior <= imc <= umbral_imc_superior]
-datos_imc_entre_5_19 = [(fecha, imc) for fecha, imc in zip(fecha_imc, valor_imc) if 60 < fecha <= 228 and umbral_imc_inferior <= imc <= umbral_imc_superior]
-
-# Define los colores del colormap personalizado
-start_color = '#8f0101'
-color_inferior = '#918f14'
-mid_color = 'green'
-color_superior = '#918f14'
-end_color = '#8f0101'
-
-def asignar_color(x, y, tipo):
-
-    if tipo == "peso":
-        if x <= 6:
-            valor_ideal = polinomio_peso_0_6(x)
-            limite_inferior = polinomio_peso_menos2_0_6(x)
-            limite_superior = polinomio_peso_mas2_0_6(x)
-        elif 6 < x <= 24:
-            valor_ideal = polinomio_peso_6_24(x)
-            limite_inferior = polinomio_peso_menos2_6_24(x)
-            limite_superior = polinomio_peso_mas2_6_24(x)
-        elif 24 < x <= 60:
-            valor_ideal = polinomio_peso_24_60(x)
-            limite_inferior = polinomio_peso_menos2_24_60(x)
-            limite_superior = polinomio_peso_mas2_24_60(x)
-        elif 60 < x <= 120:
-            # Se divide para 12 pues entra como meses y graficamos años
-            valor_ideal = polinomio_peso_5_10a(x / 12)
-            limite_inferior = polinomio_peso_menos2_5_10a(x / 12)
-            limite_superior = polinomio_peso_mas2_5_10a(x / 12)
-        else: # No debería haber más datos pero controlamos asignaciones incorrectas
-            valor_ideal = 1
-            limite_inferior = 1
-            limite_superior = 2
-    if tipo == "talla":
-        if x <= 6:
-            valor_ideal = polinomio_talla_0_6(x)
-            limite_inferior = polinomio_talla_menos2_0_6(x)
-            limite_superior = polinomio_talla_mas2_0_6(x)
-        elif 6 < x <= 24:
-            valor_ideal = polinomio_talla_6_24(x)
-            limite_inferior = polinomio_talla_menos2_6_24(x)
-            limite_superior = polinomio_talla_mas2_6_24(x)
-        elif 24 < x <= 60:
-            valor_ideal = polinomio_talla_24_60(x)
-            limite_inferior = polinomio_talla_menos2_24_60(x)
-            limite_superior = polinomio_talla_mas2_24_60(x)
-        elif 60 < x <= 228:
-            # Se divide para 12 pues entra como meses y graficamos años
-            valor_ideal = polinomio_talla_5_19a(x / 12)
-            limite_inferior = polinomio_talla_menos2_5_19a(x / 12)
-            limite_superior = polinomio_talla_mas2_5_19a(x / 12)
-        else: # No debería haber más datos pero controlamos asignaciones incorrectas
-            valor_ideal = 1
-            limite_inferior = 1
-            limite_superior = 2
-    # Calcular el porcentaje del valor_ideal entre los límites inferior y superior
-    porcentaje_ideal = (valor_ideal - limite_inferior) / (limite_superior - limite_inferior)
-
-    # Crea el colormap personalizado directamente
-    custom_cmap = mcolors.LinearSegmentedColormap.from_list(
-        "custom_colormap",
-        [(0.0, start_color), (porcentaje_ideal / 2, color_inferior), (porcentaje_ideal, mid_color), ( (porcentaje_ideal + 1) / 2, color_superior), (1.0, end_color)]
-    )
-
-    # Normalizar los valores de peso para mapear a una escala de colores
-    norma = mcolors.Normalize(vmin=limite_inferior, vmax=limite_superior)
-
-    # Calcular colores en función de la proximidad a los límites
-    color = custom_cmap(norma(y))
-    
-    # Convertir el color de formato RGBA a formato hexadecimal para Plotly
-    color_hex = "#{:02x}{:02x}{:02x}".format(int(color[0]*255), int(color[1]*255), int(color[2]*255))
-    
-    return color_hex
+"""
+base_datos.registrar_sentencia('signos_vitales', consulta_sql)
+
+def consultar_signos_vitales(conn, cedula):
+    # Crear un objeto cursor
+    cursor = conn.cursor()
+    try:
+        # Ejecutar la consulta con el parámetro
+        base_datos.ejecutar(cursor, 'signos_vitales', consulta_sql, (cedula,))
+        # Obtener los resultados
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+# Las tablas de referencia y sus interpolaciones solo dependen del sexo, se cargan una vez por proceso
+# junto con su rejilla diaria para clasificar y colorear (ver rejilla.py)
+@lru_cache(maxsize=None)
+def cargar_referencias(genero):
+    with metricas.tramo("referencias"):
+        ref = referencias.cargar(genero)
+        # Sin los L, M y S de la OMS el método lms falla aquí, antes del primer gráfico
+        if clasificacion.leer_metodo() == 'lms':
+            clasificacion.comprobar_lms(ref)
+        if rejilla.leer_activa():
+            ref.rejilla = rejilla.cargar(genero, ref)
+        return ref
 
 # Constantes para los textos en los gráficos
 texto_grafico_peso = "Peso/edad - "
@@ -495,6 +115,7 @@ texto_grafico_talla = "Longitud/edad - "
 # Definimos las constantes de la impresión de detalles
 formato_impresion_peso = '%{y:.2f} kg'
 formato_impresion_talla = '%{y:.2f} cm'
+formato_impresion_imc = '%{y:.2f} imc'
 
 # Definimos las constantes del texto de las curvas
 texto_curva_mas_uno = "Alerta superior"
@@ -509,61 +130,161 @@ color_ayuda_central = 'green'
 color_ayuda_limite = '#c21919'
 color_relleno = 'rgba(255,255,255,0)'
 color_relleno_completo = 'rgba(0,100,80,0.3)'
+color_relleno_alerta = 'rgba(252, 194, 3, 0.3)'
+
+# Colores de cada línea de desviación estándar y de su etiqueta en el borde derecho
+COLORES_DESVIACION = {0: color_ayuda_central, 1: 'orange', 2: color_ayuda_limite, 3: 'black'}
+COLORES_ETIQUETA = {0: color_ayuda_central, 1: 'rgba(209, 150, 0, 1)', 2: color_ayuda_limite, 3: 'black'}
+NOMBRES_DESVIACION = {
+    1: texto_curva_mas_uno, -1: texto_curva_menos_uno,
+    2: texto_curva_mas_dos, -2: texto_curva_menos_dos,
+    3: texto_curva_mas_tres, -3: texto_curva_menos_tres,
+}
 
-
-# Crear subgráficos
-fig = make_subplots(
-    rows=5, cols=2,
-    vertical_spacing = 0.05, # Valores entre 0 y 1 
-    horizontal_spacing = 0.1,  # Valores entre 0 y 1
-    subplot_titles=(
-        texto_grafico_peso + texto_titulo + " de 0 a 6 meses",
-        texto_grafico_talla + texto_titulo + " de 0 a 6 meses",
-        texto_grafico_peso + texto_titulo + " de 6 a 23 meses",
-        texto_grafico_talla + texto_titulo + " de 6 a 23 meses",
-        texto_grafico_peso + texto_titulo + " de 2 a 5 años",
-        texto_grafico_talla + texto_titulo + " de 2 a 5 años",
-        texto_grafico_peso + texto_titulo + " de 5 a 10 años",
-        texto_grafico_talla + texto_titulo + "/adolescentes de 5 a 19 años",
-        "IMC " + texto_titulo + " de 0 a 5 años",
-        "IMC " + texto_titulo + "/adolescentes de 5 a 19 años",)
+FORMATOS_IMPRESION = {'peso': formato_impresion_peso, 'talla': formato_impresion_talla, 'imc': formato_impresion_imc}
+TEXTOS_HOVER = {'peso': "Peso: {} kg", 'talla': "Talla: {} cm", 'imc': "IMC: {}"}
+TITULOS_EJE_Y = {'peso': "Peso (Kg)", 'talla': "Talla (cm)", 'imc': "Índice de masa corporal (kg/m^2)"}
+
+# Las tablas de 0 a 5 años tienen las curvas 0, +-2 y +-3, las de 5 a 19 años también +-1
+DESVIACIONES_0_5 = (0, 2, -2, 3, -3)
+DESVIACIONES_5_19 = (0, 1, -1, 2, -2, 3, -3)
+BANDAS_0_5 = ((-2, 2, color_relleno_completo),)
+BANDAS_5_19 = ((-1, 1, color_relleno_completo), (1, 2, color_relleno_alerta), (-2, -1, color_relleno_alerta))
+
+def marcas_anuales(anios, y):
+    # Texto con flecha en cada cumpleaños, sobre el eje x de un panel en meses
+    return tuple(("1 año" if anio == 1 else f"{anio} años", 12 * anio, y) for anio in anios)
+
+def divisiones_anuales(anios, y0, y1):
+    # Línea vertical en cada cumpleaños
+    return tuple((12 * anio, y0, y1) for anio in anios)
+
+# Paneles del gráfico en el orden en que se dibujan, de izquierda a derecha y de arriba
+# abajo (dos por fila):
+#   indicador, rango  -> mediciones del panel (ingesta.PANELES), el id es indicador_rango
+#   titulo            -> {} se reemplaza por Niños o Niñas
+#   tablas            -> (edades en ref.x_curvas, rango de las curvas, límite en meses), el
+#                        IMC de 0 a 5 años junta dos tablas
+#   unidad            -> eje x en meses o en años (las edades se dividen para 12)
+#   desviaciones      -> líneas dibujadas, bandas -> (inferior, superior, color) rellenas
+#   eje_x, eje_y      -> rangos de los ejes
+#   divisiones        -> líneas verticales (x, y0, y1), marcas -> textos (texto, x, y)
+PANELES_GRAFICO = (
+    dict(indicador='peso', rango='0_6', titulo=texto_grafico_peso + "{} de 0 a 6 meses",
+         nombre="Peso 0-6 meses", datos='Datos peso 0-6 meses', tablas=(('meses_0_6', '0_6', 6),), unidad='meses',
+         desviaciones=DESVIACIONES_0_5, bandas=BANDAS_0_5, eje_x=(-0.1, 6.1), eje_y=(1, 12),
+         divisiones=(), marcas=()),
+    dict(indicador='talla', rango='0_6', titulo=texto_grafico_talla + "{} de 0 a 6 meses",
+         nombre="Talla 0-6 meses", datos='Datos talla 0-6 meses', tablas=(('meses_0_6', '0_6', 6),), unidad='meses',
+         desviaciones=DESVIACIONES_0_5, bandas=BANDAS_0_5, eje_x=(-0.1, 6.1), eje_y=(42, 75),
+         divisiones=(), marcas=()),
+    dict(indicador='peso', rango='6_24', titulo=texto_grafico_peso + "{} de 6 a 23 meses",
+         nombre="Peso 6-24 meses", datos='Datos peso 6-24 meses', tablas=(('meses_6_24', '6_24', 24),), unidad='meses',
+         desviaciones=DESVIACIONES_0_5, bandas=BANDAS_0_5, eje_x=(5.9, 24.1), eje_y=(5, 17.5),
+         divisiones=divisiones_anuales((1, 2), 5, 18), marcas=marcas_anuales((1, 2), 5)),
+    dict(indicador='talla', rango='6_24', titulo=texto_grafico_talla + "{} de 6 a 23 meses",
+         nombre="Talla 6-24 meses", datos='Datos talla 6-24 meses', tablas=(('meses_6_24', '6_24', 24),), unidad='meses',
+         desviaciones=DESVIACIONES_0_5, bandas=BANDAS_0_5, eje_x=(5.9, 24.1), eje_y=(55, 100),
+         divisiones=divisiones_anuales((1, 2), 55, 100), marcas=marcas_anuales((1, 2), 55)),
+    dict(indicador='peso', rango='24_60', titulo=texto_grafico_peso + "{} de 2 a 5 años",
+         nombre="Peso 2-5 años", datos='Datos peso 2-5 años', tablas=(('meses_24_60', '24_60', 60),), unidad='meses',
+         desviaciones=DESVIACIONES_0_5, bandas=BANDAS_0_5, eje_x=(23.9, 60.1), eje_y=(7, 30),
+         divisiones=divisiones_anuales((2, 3, 4, 5), 6, 31), marcas=marcas_anuales((2, 3, 4, 5), 7)),
+    dict(indicador='talla', rango='24_60', titulo=texto_grafico_talla + "{} de 2 a 5 años",
+         nombre="Talla 2-5 años", datos='Datos talla 2-5 años', tablas=(('meses_24_60', '24_60', 60),), unidad='meses',
+         desviaciones=DESVIACIONES_0_5, bandas=BANDAS_0_5, eje_x=(23.9, 60.1), eje_y=(75, 125),
+         divisiones=divisiones_anuales((2, 3, 4, 5), 75, 125), marcas=marcas_anuales((2, 3, 4, 5), 75)),
+    dict(indicador='peso', rango='5_10a', titulo=texto_grafico_peso + "{} de 5 a 10 años",
+         nombre="Peso 5-10 años", datos='Datos peso 5-10 años', tablas=(('year_5_10', '5_10a', 120),), unidad='años',
+         desviaciones=DESVIACIONES_5_19, bandas=BANDAS_5_19, eje_x=(4.9, 10.1), eje_y=(11, 60),
+         divisiones=(), marcas=()),
+    dict(indicador='talla', rango='5_19a', titulo=texto_grafico_talla + "{}/adolescentes de 5 a 19 años",
+         nombre="Talla 5 a 19 años", datos='Datos talla 5-19 años', tablas=(('year_5_19', '5_19a', 228),), unidad='años',
+         desviaciones=DESVIACIONES_5_19, bandas=BANDAS_5_19, eje_x=(4.95, 19.05), eje_y=(90, 190),
+         divisiones=(), marcas=()),
+    dict(indicador='imc', rango='0_5', titulo="IMC {} de 0 a 5 años",
+         nombre="IMC 0 a 5 años", datos='Datos imc 0-5 años',
+         tablas=(('meses_imc_0_24', '0_24', 24), ('meses_imc_24_60', '24_60', 60)), unidad='meses',
+         desviaciones=DESVIACIONES_5_19, bandas=BANDAS_5_19, eje_x=(-0.1, 60.1), eje_y=(9, 23),
+         divisiones=divisiones_anuales((1, 2, 3, 4, 5), 9, 23), marcas=marcas_anuales((1, 2, 3, 4, 5), 9)),
+    dict(indicador='imc', rango='5_19', titulo="IMC {}/adolescentes de 5 a 19 años",
+         nombre="IMC 5 a 19 años", datos='Datos imc 5-19 años', tablas=(('meses_imc_5_19', '5_19', 228),), unidad='años',
+         desviaciones=DESVIACIONES_5_19, bandas=BANDAS_5_19, eje_x=(4.9, 19.1), eje_y=(10, 40),
+         divisiones=(), marcas=()),
 )
 
-# Creamos las variables para controlar las posiciones de manera rápida
-
-fila_peso_0_6 = 1
-columna_peso_0_6 = 1
-
-fila_talla_0_6 = 1
-columna_talla_0_6 = 2
-
-fila_peso_6_24 = 2
-columna_peso_6_24 = 1
-
-fila_talla_6_24 = 2
-columna_talla_6_24 = 2
-
-fila_peso_24_60 = 3
-columna_peso_24_60 = 1
-
-fila_talla_24_60 = 3
-columna_talla_24_60 = 2
-
-fila_peso_5_10a = 4
-columna_peso_5_10a = 1
-
-fila_talla_5_19a = 4
-columna_talla_5_19a = 2
-
-fila_imc_0_5 = 5
-columna_imc_0_5 = 1
-
-fila_imc_5_19 = 5
-columna_imc_5_19 = 2
+# Alto de cada fila de paneles y separación vertical total entre filas (fracción de una fila)
+ALTO_FILA = 480
+SEPARACION_FILAS = 0.25
+
+# Con más mediciones que este umbral (hermanos, cohortes, historias largas) las trazas se
+# dibujan con WebGL (Scattergl) en vez de SVG. config.ini, sección opcional:
+#   [salida]
+#   webgl = 1000        ; vacío para no usar nunca WebGL
+UMBRAL_WEBGL = 1000
+
+# Guías ocultas de cada medición: desviación, color y nombre
+GUIAS = ((0, color_ayuda_central, 'Valor ideal'), (-2, color_ayuda_limite, 'Límite inferior'),
+         (2, color_ayuda_limite, 'Límite superior'))
+
+def id_panel(panel):
+    return f"{panel['indicador']}_{panel['rango']}"
+
+IDS_PANELES = tuple(id_panel(panel) for panel in PANELES_GRAFICO)
+
+# Las trazas con los datos del paciente se marcan para separarlas de la capa de referencia
+CAPA_PACIENTE = 'paciente'
+CAPA_REFERENCIA = 'referencia'
+
+def ejes_subgrafico(row, col, columnas=2):
+    # Mismos nombres de ejes que make_subplots: x, x2, x3... por filas
+    indice = (row - 1) * columnas + col
+    sufijo = '' if indice == 1 else str(indice)
+    return 'x' + sufijo, 'y' + sufijo
+
+class CapaPaciente:
+    # Ocupa el lugar de la figura cuando solo se quieren los puntos del paciente: guarda
+    # sus trazas e ignora curvas, rellenos, anotaciones y ejes, que trae la capa de
+    # referencia estática del sexo
+    def __init__(self, genero, version_referencias):
+        self.genero = genero
+        self.version_referencias = version_referencias
+        self.data = []
+
+    def add_trace(self, trace, row=None, col=None):
+        if trace.meta != CAPA_PACIENTE:
+            return
+        trace.xaxis, trace.yaxis = ejes_subgrafico(row, col)
+        self.data.append(trace)
+
+    def add_shape(self, *args, **kwargs):
+        pass
+
+    def add_annotation(self, *args, **kwargs):
+        pass
+
+    def update_xaxes(self, *args, **kwargs):
+        pass
+
+    def update_yaxes(self, *args, **kwargs):
+        pass
+
+    def update_layout(self, *args, **kwargs):
+        pass
+
+    def to_json(self):
+        contenido = {
+            'referencia': nombre_capa_referencia(self.genero, self.version_referencias),
+            'data': [traza.to_plotly_json() for traza in self.data],
+        }
+        # Se escapa </ para poder incrustar el JSON dentro de una etiqueta <script>
+        return json.dumps(contenido, cls=plotly_utils.PlotlyJSONEncoder, separators=(',', ':')).replace('</', '<\\/')
 # Agregar trazos a los subgráficos correspondientes
+# traza es go.Scatter (SVG, también si es None) o go.Scattergl (WebGL) con los mismos atributos,
+# ver UMBRAL_WEBGL
 
-def add_grafico_curva(fig, x, y, nombre, color_curva, hover_template, row, col):
-    trace = go.Scatter(
+def add_grafico_curva(fig, x, y, nombre, color_curva, hover_template, row, col, traza=None):
+    trace = (traza or go.Scatter)(
         x=x,
         y=y,
         mode='lines',
@@ -580,8 +301,8 @@ def add_grafico_curva(fig, x, y, nombre, color_curva, hover_template, row, col):
     )
     fig.add_trace(trace, row=row, col=col)
 
-def add_puntos_datos(fig, x_data, y_data, color_map, line_color, name, text_data, row, col):
-    trace = go.Scatter(
+def add_puntos_datos(fig, x_data, y_data, color_map, line_color, name, text_data, row, col, traza=None):
+    trace = (traza or go.Scatter)(
         x=x_data,
         y=y_data,
         mode='lines+markers',
@@ -592,12 +313,13 @@ def add_puntos_datos(fig, x_data, y_data, color_map, line_color, name, text_data
         hoverlabel=dict(font_size=16, font_family="Calibri, sans-serif"),
         hovertemplate="<b>%{text}</b><extra></extra>",
         text=text_data,
-        showlegend=False
+        showlegend=False,
+        meta=CAPA_PACIENTE
     )
     fig.add_trace(trace, row=row, col=col)
 
-def add_puntos_datos_imc(fig, x_data, y_data, color_map, name, text_data, row, col):
-    trace = go.Scatter(
+def add_puntos_datos_imc(fig, x_data, y_data, color_map, name, text_data, row, col, traza=None):
+    trace = (traza or go.Scatter)(
         x=x_data,
         y=y_data,
         mode='markers',
@@ -606,12 +328,13 @@ def add_puntos_datos_imc(fig, x_data, y_data, color_map, name, text_data, row, c
         hoverlabel=dict(font_size=16, font_family="Calibri, sans-serif"),
         hovertemplate="<b>%{text}</b><extra></extra>",
         text=text_data,
-        showlegend=False
+        showlegend=False,
+        meta=CAPA_PACIENTE
     )
     fig.add_trace(trace, row=row, col=col)
 
-def add_puntos_ayuda(fig, x_data, y_data, color_linea, nombre, hover_template, row, col):
-    trace = go.Scatter(
+def add_puntos_ayuda(fig, x_data, y_data, color_linea, nombre, hover_template, row, col, traza=None):
+    trace = (traza or go.Scatter)(
         x=x_data,
         y=y_data,
         mode='markers',
@@ -620,896 +343,26 @@ def add_puntos_ayuda(fig, x_data, y_data, color_linea, nombre, hover_template, r
         hoverlabel=dict(font_size=14, font_family="sans-serif"),
         hovertemplate=hover_template,
         showlegend=False,
-        visible=False # Esta parte desactiva la función
+        visible=False, # Esta parte desactiva la función
+        meta=CAPA_PACIENTE
     )
     fig.add_trace(trace, row=row, col=col)
 
-# region Creación de curvas de 0-6 meses
-    
-# Peso
-# Generar una lista de 100 nuevos valores de x
-x_peso_0_6 = np.linspace(min(meses_0_6), max(meses_0_6), 500)
-curva_peso_0_6 = polinomio_peso_0_6(x_peso_0_6)
-curva_peso_mas2_0_6 = polinomio_peso_mas2_0_6(x_peso_0_6)
-curva_peso_menos2_0_6 = polinomio_peso_menos2_0_6(x_peso_0_6)
-curva_peso_mas3_0_6 = polinomio_peso_mas3_0_6(x_peso_0_6)
-curva_peso_menos3_0_6 = polinomio_peso_menos3_0_6(x_peso_0_6)
-
-add_grafico_curva(fig, x_peso_0_6, curva_peso_0_6, "Peso 0-6 meses", color_ayuda_central, formato_impresion_peso, 
-                  fila_peso_0_6, columna_peso_0_6)
-add_grafico_curva(fig, x_peso_0_6, curva_peso_mas2_0_6, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_0_6, columna_peso_0_6)
-add_grafico_curva(fig, x_peso_0_6, curva_peso_menos2_0_6, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_0_6, columna_peso_0_6)
-add_grafico_curva(fig, x_peso_0_6, curva_peso_mas3_0_6, texto_curva_mas_tres, "black", formato_impresion_peso,
-                  fila_peso_0_6, columna_peso_0_6)
-add_grafico_curva(fig, x_peso_0_6, curva_peso_menos3_0_6, texto_curva_menos_tres, "black", formato_impresion_peso,
-                  fila_peso_0_6, columna_peso_0_6)
-
-# Relleno 0-6 meses
-# Agregar primero la curva inferior sin relleno
-fig.add_trace(go.Scatter(x=x_peso_0_6, y=curva_peso_menos2_0_6, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_peso_0_6, col=columna_peso_0_6)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_peso_0_6, y=curva_peso_mas2_0_6, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_peso_0_6, col=columna_peso_0_6)
-
-# Puntos de datos e información 0-6 meses - Peso
-
-fechas_peso_0_6 = [fecha for fecha, _ in datos_peso_menor_6]
-valores_peso_0_6 = [peso for _, peso in datos_peso_menor_6]
-mapa_color_peso_0_6 = [asignar_color(x, y, "peso") for x, y in datos_peso_menor_6]
-texto_hover_peso_0_6 = []
-for fecha, peso, valor_fecha in zip(display_fecha_peso_0_6, valores_peso_0_6, fechas_peso_0_6):
-    if polinomio_peso_menos2_0_6(valor_fecha) <= peso <= polinomio_peso_mas2_0_6(valor_fecha):
-        estado = "Normal"
-    elif polinomio_peso_mas2_0_6(valor_fecha) <= peso <= polinomio_peso_mas3_0_6(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_peso_menos3_0_6(valor_fecha) <= peso <= polinomio_peso_menos2_0_6(valor_fecha):
-        estado = "Alerta"
-    elif peso > polinomio_peso_mas3_0_6(valor_fecha):
-        estado = "Sobrepeso"
-    elif peso < polinomio_peso_menos3_0_6(valor_fecha):
-        estado = "Desnutricion"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_peso_0_6.append(f"Fecha: {fecha}<br>Peso: {peso} kg<br>Estado: {estado}")
-
-# Puntos de datos de peso
-add_puntos_datos(fig, fechas_peso_0_6, valores_peso_0_6, mapa_color_peso_0_6, 'green', 'Datos peso 0-6 meses', 
-                 texto_hover_peso_0_6, fila_peso_0_6, columna_peso_0_6)
-
-# Guía central - Peso
-add_puntos_ayuda(fig, fechas_peso_0_6, [polinomio_peso_0_6(fecha) for fecha in fechas_peso_0_6], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_peso, fila_peso_0_6, columna_peso_0_6)
-
-# Guía inferior - Peso
-add_puntos_ayuda(fig, fechas_peso_0_6, [polinomio_peso_menos2_0_6(fecha) for fecha in fechas_peso_0_6],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_peso, fila_peso_0_6, columna_peso_0_6)
-
-# Guía superior - Peso
-add_puntos_ayuda(fig, fechas_peso_0_6, [polinomio_peso_mas2_0_6(fecha) for fecha in fechas_peso_0_6],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_peso, fila_peso_0_6, columna_peso_0_6)
-
-x_talla_0_6 = np.linspace(min(meses_0_6), max(meses_0_6), 500)
-curva_talla_0_6 = polinomio_talla_0_6(x_talla_0_6)
-curva_talla_mas2_0_6 = polinomio_talla_mas2_0_6(x_talla_0_6)
-curva_talla_menos2_0_6 = polinomio_talla_menos2_0_6(x_talla_0_6)
-curva_talla_mas3_0_6 = polinomio_talla_mas3_0_6(x_talla_0_6)
-curva_talla_menos3_0_6 = polinomio_talla_menos3_0_6(x_talla_0_6)
-
-# Talla
-add_grafico_curva(fig, x_talla_0_6, curva_talla_0_6, "Talla 0-6 meses", color_ayuda_central, formato_impresion_talla, 
-                  fila_talla_0_6, columna_talla_0_6)
-add_grafico_curva(fig, x_talla_0_6, curva_talla_mas2_0_6, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_talla, 
-                  fila_talla_0_6, columna_talla_0_6)
-add_grafico_curva(fig, x_talla_0_6, curva_talla_menos2_0_6, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_talla, 
-                  fila_talla_0_6, columna_talla_0_6)
-add_grafico_curva(fig, x_talla_0_6, curva_talla_mas3_0_6, texto_curva_mas_tres, "black", formato_impresion_talla, 
-                  fila_talla_0_6, columna_talla_0_6)
-add_grafico_curva(fig, x_talla_0_6, curva_talla_menos3_0_6, texto_curva_menos_tres, "black", formato_impresion_talla, 
-                  fila_talla_0_6, columna_talla_0_6)
-
-# Relleno 0-6 meses
-# Agregar primero la curva inferior sin relleno
-fig.add_trace(go.Scatter(x=x_talla_0_6, y=curva_talla_menos2_0_6, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_talla_0_6, col=columna_talla_0_6)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_talla_0_6, y=curva_talla_mas2_0_6, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_talla_0_6, col=columna_talla_0_6)
-
-# Puntos de datos e información 0-6 meses - Talla
-
-fechas_talla_0_6 = [fecha for fecha, _ in datos_talla_menor_6]
-valores_talla_0_6 = [talla for _, talla in datos_talla_menor_6]
-mapa_color_talla_0_6 = [asignar_color(x, y, "talla") for x, y in datos_talla_menor_6]
-texto_hover_talla_0_6 = []
-for fecha, talla, valor_fecha in zip(display_fecha_talla_0_6, valores_talla_0_6, fechas_talla_0_6):
-    if polinomio_talla_menos2_0_6(valor_fecha) <= talla <= polinomio_talla_mas2_0_6(valor_fecha):
-        estado = "Normal"
-    elif polinomio_talla_menos3_0_6(valor_fecha) <= talla <= polinomio_talla_menos2_0_6(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas2_0_6(valor_fecha) <= talla <= polinomio_talla_mas3_0_6(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas3_0_6(valor_fecha) <= talla:
-        estado = "Gigantismo"
-    elif talla < polinomio_talla_menos3_0_6(valor_fecha):
-        estado = "Enanismo"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_talla_0_6.append(f"Fecha: {fecha}<br>Talla: {talla} cm<br>Estado: {estado}")
-
-add_puntos_datos(fig, fechas_talla_0_6, valores_talla_0_6, mapa_color_talla_0_6, 'green', 'Datos talla 0-6 meses', 
-                 texto_hover_talla_0_6, fila_talla_0_6, columna_talla_0_6)
-
-# Guía central - Talla
-add_puntos_ayuda(fig, fechas_talla_0_6, [polinomio_talla_0_6(fecha) for fecha in fechas_talla_0_6], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_talla, fila_talla_0_6, columna_talla_0_6)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_0_6, [polinomio_talla_menos2_0_6(fecha) for fecha in fechas_talla_0_6], 
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_talla, fila_talla_0_6, columna_talla_0_6)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_0_6, [polinomio_talla_mas2_0_6(fecha) for fecha in fechas_talla_0_6], 
-                 color_ayuda_limite, 'Límite superior', formato_impresion_talla, fila_talla_0_6, columna_talla_0_6)
-# endregion
-
-# region Creación de curvas de 6-24 meses 
-# Peso
-
-x_peso_6_24 = np.linspace(min(meses_6_24), max(meses_6_24), 500)
-curva_peso_6_24 = polinomio_peso_6_24(x_peso_6_24)
-curva_peso_mas2_6_24 = polinomio_peso_mas2_6_24(x_peso_6_24)
-curva_peso_menos2_6_24 = polinomio_peso_menos2_6_24(x_peso_6_24)
-curva_peso_mas3_6_24 = polinomio_peso_mas3_6_24(x_peso_6_24)
-curva_peso_menos3_6_24 = polinomio_peso_menos3_6_24(x_peso_6_24)
-
-add_grafico_curva(fig, x_peso_6_24, curva_peso_6_24, "Peso 6-24 meses", color_ayuda_central, formato_impresion_peso, 
-                  fila_peso_6_24, columna_peso_6_24)
-add_grafico_curva(fig, x_peso_6_24, curva_peso_mas2_6_24, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_6_24, columna_peso_6_24)
-add_grafico_curva(fig, x_peso_6_24, curva_peso_menos2_6_24, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_6_24, columna_peso_6_24)
-add_grafico_curva(fig, x_peso_6_24, curva_peso_mas3_6_24, texto_curva_mas_tres, "black", formato_impresion_peso, 
-                  fila_peso_6_24, columna_peso_6_24)
-add_grafico_curva(fig, x_peso_6_24, curva_peso_menos3_6_24, texto_curva_menos_tres, "black", formato_impresion_peso, 
-                  fila_peso_6_24, columna_peso_6_24)
-
-# Relleno 6-24 meses
-fig.add_trace(go.Scatter(x=x_peso_6_24, y=curva_peso_menos2_6_24, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_peso_6_24, col=columna_peso_6_24)
-fig.add_trace(go.Scatter(x=x_peso_6_24, y=curva_peso_mas2_6_24, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_peso_6_24, col=columna_peso_6_24)
-
-# Puntos de datos e información 6-24 meses - Peso
-
-fechas_peso_6_24 = [fecha for fecha, _ in datos_peso_entre_6_24]
-valores_peso_6_24 = [peso for _, peso in datos_peso_entre_6_24]
-mapa_color_peso_6_24 = [asignar_color(x, y, "peso") for x, y in datos_peso_entre_6_24]
-texto_hover_peso_6_24 = []
-for fecha, peso, valor_fecha in zip(display_fecha_peso_6_24, valores_peso_6_24, fechas_peso_6_24):
-    if polinomio_peso_menos2_6_24(valor_fecha) <= peso <= polinomio_peso_mas2_6_24(valor_fecha):
-        estado = "Normal"
-    elif polinomio_peso_mas2_6_24(valor_fecha) <= peso <= polinomio_peso_mas3_6_24(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_peso_menos3_6_24(valor_fecha) <= peso <= polinomio_peso_menos2_6_24(valor_fecha):
-        estado = "Alerta"
-    elif peso > polinomio_peso_mas3_6_24(valor_fecha):
-        estado = "Sobrepeso"
-    elif peso < polinomio_peso_menos3_6_24(valor_fecha):
-        estado = "Desnutricion"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_peso_6_24.append(f"Fecha: {fecha}<br>Peso: {peso} kg<br>Estado: {estado}")
-
-# Puntos de datos de peso 6-24 meses
-add_puntos_datos(fig, fechas_peso_6_24, valores_peso_6_24, mapa_color_peso_6_24, 'green', 'Datos peso 6-24 meses', 
-                 texto_hover_peso_6_24, fila_peso_6_24, columna_peso_6_24)
-
-# Guía central - Peso
-add_puntos_ayuda(fig, fechas_peso_6_24, [polinomio_peso_6_24(fecha) for fecha in fechas_peso_6_24], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_peso, fila_peso_6_24, columna_peso_6_24)
-
-# Guía inferior - Peso
-add_puntos_ayuda(fig, fechas_peso_6_24, [polinomio_peso_menos2_6_24(fecha) for fecha in fechas_peso_6_24],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_peso, fila_peso_6_24, columna_peso_6_24)
-
-# Guía superior - Peso
-add_puntos_ayuda(fig, fechas_peso_6_24, [polinomio_peso_mas2_6_24(fecha) for fecha in fechas_peso_6_24],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_peso, fila_peso_6_24, columna_peso_6_24)
-
-# Talla
-
-x_talla_6_24 = np.linspace(min(meses_6_24), max(meses_6_24), 500)
-curva_talla_6_24 = polinomio_talla_6_24(x_talla_6_24)
-curva_talla_mas2_6_24 = polinomio_talla_mas2_6_24(x_talla_6_24)
-curva_talla_menos2_6_24 = polinomio_talla_menos2_6_24(x_talla_6_24)
-curva_talla_mas3_6_24 = polinomio_talla_mas3_6_24(x_talla_6_24)
-curva_talla_menos3_6_24 = polinomio_talla_menos3_6_24(x_talla_6_24)
-
-add_grafico_curva(fig, x_talla_6_24, curva_talla_6_24, "Talla 6-24 meses", color_ayuda_central, formato_impresion_talla, 
-                  fila_talla_6_24, columna_talla_6_24)
-add_grafico_curva(fig, x_talla_6_24, curva_talla_mas2_6_24, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_talla, 
-                  fila_talla_6_24, columna_talla_6_24)
-add_grafico_curva(fig, x_talla_6_24, curva_talla_menos2_6_24, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_talla, 
-                  fila_talla_6_24, columna_talla_6_24)
-add_grafico_curva(fig, x_talla_6_24, curva_talla_mas3_6_24, texto_curva_mas_tres, "black", formato_impresion_talla, 
-                  fila_talla_6_24, columna_talla_6_24)
-add_grafico_curva(fig, x_talla_6_24, curva_talla_menos3_6_24, texto_curva_menos_tres, "black", formato_impresion_talla, 
-                  fila_talla_6_24, columna_talla_6_24)
-
-# Relleno 6-24 meses
-fig.add_trace(go.Scatter(x=x_talla_6_24, y=curva_talla_menos2_6_24, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_talla_6_24, col=columna_talla_6_24)
-fig.add_trace(go.Scatter(x=x_talla_6_24, y=curva_talla_mas2_6_24, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_talla_6_24, col=columna_talla_6_24)
-
-# Puntos de datos e información 6-24 meses - Talla
-
-fechas_talla_6_24 = [fecha for fecha, _ in datos_talla_entre_6_24]
-valores_talla_6_24 = [talla for _, talla in datos_talla_entre_6_24]
-mapa_color_talla_6_24 = [asignar_color(x, y, "talla") for x, y in datos_talla_entre_6_24]
-texto_hover_talla_6_24 = []
-for fecha, talla, valor_fecha in zip(display_fecha_talla_6_24, valores_talla_6_24, fechas_talla_6_24):
-    if polinomio_talla_menos2_6_24(valor_fecha) <= talla <= polinomio_talla_mas2_6_24(valor_fecha):
-        estado = "Normal"
-    elif polinomio_talla_menos3_6_24(valor_fecha) <= talla <= polinomio_talla_menos2_6_24(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas2_6_24(valor_fecha) <= talla <= polinomio_talla_mas3_6_24(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas3_6_24(valor_fecha) <= talla:
-        estado = "Gigantismo"
-    elif talla < polinomio_talla_menos3_6_24(valor_fecha):
-        estado = "Enanismo"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_talla_6_24.append(f"Fecha: {fecha}<br>Talla: {talla} cm<br>Estado: {estado}")
-
-add_puntos_datos(fig, fechas_talla_6_24, valores_talla_6_24, mapa_color_talla_6_24, 'green', 'Datos talla 6-24 meses', 
-                 texto_hover_talla_6_24, fila_talla_6_24, columna_talla_6_24)
-
-# Guía central - Talla
-add_puntos_ayuda(fig, fechas_talla_6_24, [polinomio_talla_6_24(fecha) for fecha in fechas_talla_6_24], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_talla, fila_talla_6_24, columna_talla_6_24)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_6_24, [polinomio_talla_menos2_6_24(fecha) for fecha in fechas_talla_6_24], 
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_talla, fila_talla_6_24, columna_talla_6_24)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_6_24, [polinomio_talla_mas2_6_24(fecha) for fecha in fechas_talla_6_24], 
-                 color_ayuda_limite, 'Límite superior', formato_impresion_talla, fila_talla_6_24, columna_talla_6_24)
-# endregion
-
-# region Creación de curvas de 24-60 meses
-
-x_peso_24_60 = np.linspace(min(meses_24_60), max(meses_24_60), 500)
-curva_peso_24_60 = polinomio_peso_24_60(x_peso_24_60)
-curva_peso_mas2_24_60 = polinomio_peso_mas2_24_60(x_peso_24_60)
-curva_peso_menos2_24_60 = polinomio_peso_menos2_24_60(x_peso_24_60)
-curva_peso_mas3_24_60 = polinomio_peso_mas3_24_60(x_peso_24_60)
-curva_peso_menos3_24_60 = polinomio_peso_menos3_24_60(x_peso_24_60)
-
-add_grafico_curva(fig, x_peso_24_60, curva_peso_24_60, "Peso 2-5 años", color_ayuda_central, formato_impresion_peso, 
-                  fila_peso_24_60, columna_peso_24_60)
-add_grafico_curva(fig, x_peso_24_60, curva_peso_mas2_24_60, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_24_60, columna_peso_24_60)
-add_grafico_curva(fig, x_peso_24_60, curva_peso_menos2_24_60, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_24_60, columna_peso_24_60)
-add_grafico_curva(fig, x_peso_24_60, curva_peso_mas3_24_60, texto_curva_mas_tres, "black", formato_impresion_peso, 
-                  fila_peso_24_60, columna_peso_24_60)
-add_grafico_curva(fig, x_peso_24_60, curva_peso_menos3_24_60, texto_curva_menos_tres, "black", formato_impresion_peso, 
-                  fila_peso_24_60, columna_peso_24_60)
-
-# Relleno 24-60 meses
-# Agregar primero la curva inferior sin relleno
-fig.add_trace(go.Scatter(x=x_peso_24_60, y=curva_peso_menos2_24_60, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_peso_24_60, col=columna_peso_24_60)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_peso_24_60, y=curva_peso_mas2_24_60, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_peso_24_60, col=columna_peso_24_60)
-
-# Puntos de datos e información 24-60 meses - Peso
-
-fechas_peso_24_60 = [fecha for fecha, _ in datos_peso_entre_24_60]
-valores_peso_24_60 = [peso for _, peso in datos_peso_entre_24_60]
-mapa_color_peso_24_60 = [asignar_color(x, y, "peso") for x, y in datos_peso_entre_24_60]
-texto_hover_peso_24_60 = []
-for fecha, peso, valor_fecha in zip(display_fecha_peso_24_60, valores_peso_24_60, fechas_peso_24_60):
-    if polinomio_peso_menos2_24_60(valor_fecha) <= peso <= polinomio_peso_mas2_24_60(valor_fecha):
-        estado = "Normal"
-    elif polinomio_peso_mas2_24_60(valor_fecha) <= peso <= polinomio_peso_mas3_24_60(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_peso_menos3_24_60(valor_fecha) <= peso <= polinomio_peso_menos2_24_60(valor_fecha):
-        estado = "Alerta"
-    elif peso > polinomio_peso_mas3_24_60(valor_fecha):
-        estado = "Sobrepeso"
-    elif peso < polinomio_peso_menos3_24_60(valor_fecha):
-        estado = "Desnutricion"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_peso_24_60.append(f"Fecha: {fecha}<br>Peso: {peso} kg<br>Estado: {estado}")
-
-# Puntos de datos de peso 6-24 meses
-add_puntos_datos(fig, fechas_peso_24_60, valores_peso_24_60, mapa_color_peso_24_60, 'green', 'Datos peso 2-5 años', 
-                 texto_hover_peso_24_60, fila_peso_24_60, columna_peso_6_24)
-
-# Guía central - Peso
-add_puntos_ayuda(fig, fechas_peso_24_60, [polinomio_peso_24_60(fecha) for fecha in fechas_peso_24_60], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_peso, fila_peso_24_60, columna_peso_24_60)
-
-# Guía inferior - Peso
-add_puntos_ayuda(fig, fechas_peso_24_60, [polinomio_peso_menos2_24_60(fecha) for fecha in fechas_peso_24_60],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_peso, fila_peso_24_60, columna_peso_24_60)
-
-# Guía superior - Peso
-add_puntos_ayuda(fig, fechas_peso_24_60, [polinomio_peso_mas2_24_60(fecha) for fecha in fechas_peso_24_60],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_peso, fila_peso_24_60, columna_peso_24_60)
-
-# Talla
-
-x_talla_24_60 = np.linspace(min(meses_24_60), max(meses_24_60), 500)
-curva_talla_24_60 = polinomio_talla_24_60(x_talla_24_60)
-curva_talla_mas2_24_60 = polinomio_talla_mas2_24_60(x_talla_24_60)
-curva_talla_menos2_24_60 = polinomio_talla_menos2_24_60(x_talla_24_60)
-curva_talla_mas3_24_60 = polinomio_talla_mas3_24_60(x_talla_24_60)
-curva_talla_menos3_24_60 = polinomio_talla_menos3_24_60(x_talla_24_60)
-
-add_grafico_curva(fig, x_talla_24_60, curva_talla_24_60, "Talla 2-5 años", color_ayuda_central, formato_impresion_talla, 
-                  fila_talla_24_60, columna_talla_24_60)
-add_grafico_curva(fig, x_talla_24_60, curva_talla_mas2_24_60, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_talla, 
-                  fila_talla_24_60, columna_talla_24_60)
-add_grafico_curva(fig, x_talla_24_60, curva_talla_menos2_24_60, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_talla, 
-                  fila_talla_24_60, columna_talla_24_60)
-add_grafico_curva(fig, x_talla_24_60, curva_talla_mas3_24_60, texto_curva_mas_tres, "black", formato_impresion_talla, 
-                  fila_talla_24_60, columna_talla_24_60)
-add_grafico_curva(fig, x_talla_24_60, curva_talla_menos3_24_60, texto_curva_menos_tres, "black", formato_impresion_talla, 
-                  fila_talla_24_60, columna_talla_24_60)
-
-
-# Relleno 24-60 meses
-fig.add_trace(go.Scatter(x=x_talla_24_60, y=curva_talla_menos2_24_60, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_talla_24_60, col=columna_talla_24_60)
-fig.add_trace(go.Scatter(x=x_talla_24_60, y=curva_talla_mas2_24_60, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_talla_24_60, col=columna_talla_24_60)
-
-# Puntos de datos e información 24-60 meses - Talla
-
-fechas_talla_24_60 = [fecha for fecha, _ in datos_talla_entre_24_60]
-valores_talla_24_60 = [talla for _, talla in datos_talla_entre_24_60]
-mapa_color_talla_24_60 = [asignar_color(x, y, "talla") for x, y in datos_talla_entre_24_60]
-texto_hover_talla_24_60 = []
-for fecha, talla, valor_fecha in zip(display_fecha_talla_24_60, valores_talla_24_60, fechas_talla_24_60):
-    if polinomio_talla_menos2_24_60(valor_fecha) <= talla <= polinomio_talla_mas2_24_60(valor_fecha):
-        estado = "Normal"
-    elif polinomio_talla_menos3_24_60(valor_fecha) <= talla <= polinomio_talla_menos2_24_60(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas2_24_60(valor_fecha) <= talla <= polinomio_talla_mas3_24_60(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas3_24_60(valor_fecha) <= talla:
-        estado = "Gigantismo"
-    elif talla < polinomio_talla_menos3_24_60(valor_fecha):
-        estado = "Enanismo"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_talla_24_60.append(f"Fecha: {fecha}<br>Talla: {talla} cm<br>Estado: {estado}")
-
-add_puntos_datos(fig, fechas_talla_24_60, valores_talla_24_60, mapa_color_talla_24_60, 'green', 'Datos talla 2-5 años', 
-                 texto_hover_talla_24_60, fila_talla_24_60, columna_talla_24_60)
-
-# Guía central - Talla
-add_puntos_ayuda(fig, fechas_talla_24_60, [polinomio_talla_24_60(fecha) for fecha in fechas_talla_24_60], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_talla, fila_talla_24_60, columna_talla_24_60)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_24_60, [polinomio_talla_menos2_24_60(fecha) for fecha in fechas_talla_24_60], 
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_talla, fila_talla_24_60, columna_talla_24_60)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_24_60, [polinomio_talla_mas2_24_60(fecha) for fecha in fechas_talla_24_60], 
-                 color_ayuda_limite, 'Límite superior', formato_impresion_talla, fila_talla_24_60, columna_talla_24_60)
-
-# endregion
-
-# region Creación de curvas de peso 5 a 10 años
-
-x_peso_5_10 = np.linspace(min(year_5_10), max(year_5_10), 500)
-curva_peso_5_10a = polinomio_peso_5_10a(x_peso_5_10)
-curva_peso_mas1_5_10a = polinomio_peso_mas1_5_10a(x_peso_5_10)
-curva_peso_menos1_5_10a = polinomio_peso_menos1_5_10a(x_peso_5_10)
-curva_peso_mas2_5_10a = polinomio_peso_mas2_5_10a(x_peso_5_10)
-curva_peso_menos2_5_10a = polinomio_peso_menos2_5_10a(x_peso_5_10)
-curva_peso_mas3_5_10a = polinomio_peso_mas3_5_10a(x_peso_5_10)
-curva_peso_menos3_5_10a = polinomio_peso_menos3_5_10a(x_peso_5_10)
-
-add_grafico_curva(fig, x_peso_5_10, curva_peso_5_10a, "Peso 5-10 años", color_ayuda_central, formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-add_grafico_curva(fig, x_peso_5_10, curva_peso_mas1_5_10a, texto_curva_mas_uno, "orange", formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-add_grafico_curva(fig, x_peso_5_10, curva_peso_menos1_5_10a, texto_curva_mas_uno, "orange", formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-add_grafico_curva(fig, x_peso_5_10, curva_peso_mas2_5_10a, texto_curva_mas_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-add_grafico_curva(fig, x_peso_5_10, curva_peso_menos2_5_10a, texto_curva_menos_dos, color_ayuda_limite, formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-add_grafico_curva(fig, x_peso_5_10, curva_peso_mas3_5_10a, texto_curva_mas_tres, "black", formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-add_grafico_curva(fig, x_peso_5_10, curva_peso_menos3_5_10a, texto_curva_menos_tres, "black", formato_impresion_peso, 
-                  fila_peso_5_10a, columna_peso_5_10a)
-
-# Agregar primero la curva inferior sin relleno para -1 a +1
-fig.add_trace(go.Scatter(x=x_peso_5_10, y=curva_peso_menos1_5_10a, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_peso_5_10a, col=columna_peso_5_10a)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_peso_5_10, y=curva_peso_mas1_5_10a, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_peso_5_10a, col=columna_peso_5_10a)
-
-# Agregar primero la curva inferior sin relleno para +1 +2
-fig.add_trace(go.Scatter(x=x_peso_5_10, y=curva_peso_mas1_5_10a, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_peso_5_10a, col=columna_peso_5_10a)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_peso_5_10, y=curva_peso_mas2_5_10a, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_peso_5_10a, col=columna_peso_5_10a)
-
-# Agregar primero la curva inferior sin relleno para -2 -1
-fig.add_trace(go.Scatter(x=x_peso_5_10, y=curva_peso_menos2_5_10a, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_peso_5_10a, col=columna_peso_5_10a)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_peso_5_10, y=curva_peso_menos1_5_10a, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_peso_5_10a, col=columna_peso_5_10a)
-
-# Puntos de datos e información 5-10 años - Peso
-
-# Ojo, dividir para 12 las fechas pues se presentan en meses
-fechas_peso_5_10a = [fecha / 12 for fecha, _ in datos_peso_entre_5_10a]
-valores_peso_5_10a = [peso for _, peso in datos_peso_entre_5_10a]
-mapa_color_peso_5_10a = [asignar_color(x, y, "peso") for x, y in datos_peso_entre_5_10a]
-texto_hover_peso_5_10a = []
-for fecha, peso, valor_fecha in zip(display_fecha_peso_5_10a, valores_peso_5_10a, fechas_peso_5_10a):
-    if polinomio_peso_menos2_5_10a(valor_fecha) <= peso <= polinomio_peso_mas2_5_10a(valor_fecha):
-        estado = "Normal"
-    elif polinomio_peso_mas2_5_10a(valor_fecha) <= peso <= polinomio_peso_mas3_5_10a(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_peso_menos3_5_10a(valor_fecha) <= peso <= polinomio_peso_menos2_5_10a(valor_fecha):
-        estado = "Alerta"
-    elif peso > polinomio_peso_mas3_5_10a(valor_fecha):
-        estado = "Sobrepeso"
-    elif peso < polinomio_peso_menos3_5_10a(valor_fecha):
-        estado = "Desnutricion"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_peso_5_10a.append(f"Fecha: {fecha}<br>Peso: {peso} kg<br>Estado: {estado}")
-
-# Puntos de datos de peso 6-24 meses
-add_puntos_datos(fig, fechas_peso_5_10a, valores_peso_5_10a, mapa_color_peso_5_10a, 'green', 'Datos peso 5-10 años', 
-                 texto_hover_peso_5_10a, fila_peso_5_10a, columna_peso_5_10a)
-
-# Guía central - Peso
-add_puntos_ayuda(fig, fechas_peso_5_10a, [polinomio_peso_5_10a(fecha) for fecha in fechas_peso_5_10a], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_peso, fila_peso_5_10a, columna_peso_5_10a)
-
-# Guía inferior - Peso
-add_puntos_ayuda(fig, fechas_peso_5_10a, [polinomio_peso_menos2_5_10a(fecha) for fecha in fechas_peso_5_10a],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_peso, fila_peso_5_10a, columna_peso_5_10a)
-
-# Guía superior - Peso
-add_puntos_ayuda(fig, fechas_peso_5_10a, [polinomio_peso_mas2_5_10a(fecha) for fecha in fechas_peso_5_10a],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_peso, fila_peso_5_10a, columna_peso_5_10a)
-
-# endregion
-
-# region Creación de curvas de talla 5 a 19 años
-
-# Generar una lista de 100 nuevos valores de x
-x_talla_5_19 = np.linspace(min(year_5_19), max(year_5_19), 500)
-curva_talla_5_19 = polinomio_talla_5_19a(x_talla_5_19)
-curva_talla_mas1_5_19 = polinomio_talla_mas1_5_19a(x_talla_5_19)
-curva_talla_menos1_5_19 = polinomio_talla_menos1_5_19a(x_talla_5_19)
-curva_talla_mas2_5_19 = polinomio_talla_mas2_5_19a(x_talla_5_19)
-curva_talla_menos2_5_19 = polinomio_talla_menos2_5_19a(x_talla_5_19)
-curva_talla_mas3_5_19 = polinomio_talla_mas3_5_19a(x_talla_5_19)
-curva_talla_menos3_5_19 = polinomio_talla_menos3_5_19a(x_talla_5_19)
-
-add_grafico_curva(fig, x_talla_5_19, curva_talla_5_19, "Talla 5 a 19 años", 
-                  color_ayuda_central, formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-add_grafico_curva(fig, x_talla_5_19, curva_talla_mas1_5_19, texto_curva_mas_uno, 
-                  "orange", formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-add_grafico_curva(fig, x_talla_5_19, curva_talla_menos1_5_19, texto_curva_menos_uno, 
-                  "orange", formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-add_grafico_curva(fig, x_talla_5_19, curva_talla_mas2_5_19, texto_curva_mas_dos, 
-                  color_ayuda_limite, formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-add_grafico_curva(fig, x_talla_5_19, curva_talla_menos2_5_19, texto_curva_menos_dos, 
-                  color_ayuda_limite, formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-add_grafico_curva(fig, x_talla_5_19, curva_talla_mas3_5_19, texto_curva_mas_tres, 
-                  "black", formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-add_grafico_curva(fig, x_talla_5_19, curva_talla_menos3_5_19, texto_curva_menos_tres, 
-                  "black", formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-
-# Agregar primero la curva inferior sin relleno para -1 a +1
-fig.add_trace(go.Scatter(x=x_talla_5_19, y=curva_talla_menos1_5_19, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_talla_5_19a, col=columna_talla_5_19a)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_talla_5_19, y=curva_talla_mas1_5_19, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_talla_5_19a, col=columna_talla_5_19a)
-
-# Agregar primero la curva inferior sin relleno para +1 +2
-fig.add_trace(go.Scatter(x=x_talla_5_19, y=curva_talla_mas1_5_19, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_talla_5_19a, col=columna_talla_5_19a)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_talla_5_19, y=curva_talla_mas2_5_19, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_talla_5_19a, col=columna_talla_5_19a)
-
-# Agregar primero la curva inferior sin relleno para -2 -1
-fig.add_trace(go.Scatter(x=x_talla_5_19, y=curva_talla_menos2_5_19, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_talla_5_19a, col=columna_talla_5_19a)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=x_talla_5_19, y=curva_talla_menos1_5_19, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_talla_5_19a, col=columna_talla_5_19a)
-
-
-# Ojo, dividir para 12 las fechas pues se presentan en meses
-fechas_talla_5_19a = [fecha / 12 for fecha, _ in datos_talla_entre_5_19a]
-valores_talla_5_19a = [talla for _, talla in datos_talla_entre_5_19a]
-mapa_color_talla_5_19a = [asignar_color(x, y, "talla") for x, y in datos_talla_entre_5_19a]
-texto_hover_talla_5_19a = []
-for fecha, talla, valor_fecha in zip(display_fecha_talla_5_19a, valores_talla_5_19a, fechas_talla_5_19a):
-    if polinomio_talla_menos2_5_19a(valor_fecha) <= talla <= polinomio_talla_mas2_5_19a(valor_fecha):
-        estado = "Normal"
-    elif polinomio_talla_menos3_5_19a(valor_fecha) <= talla <= polinomio_talla_menos2_5_19a(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas2_5_19a(valor_fecha) <= talla <= polinomio_talla_mas3_5_19a(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_talla_mas3_5_19a(valor_fecha) <= talla:
-        estado = "Gigantismo"
-    elif talla < polinomio_talla_menos3_5_19a(valor_fecha):
-        estado = "Enanismo"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    texto_hover_talla_5_19a.append(f"Fecha: {fecha}<br>Talla: {talla} cm<br>Estado: {estado}")
-
-# Puntos de datos de talla 5 a 19 años
-add_puntos_datos(fig, fechas_talla_5_19a, valores_talla_5_19a, mapa_color_talla_5_19a, 'green', 'Datos talla 5-19 años', 
-                 texto_hover_talla_5_19a, fila_talla_5_19a, columna_talla_5_19a)
-
-# Guía central - Talla
-add_puntos_ayuda(fig, fechas_talla_5_19a, [polinomio_talla_5_19a(fecha) for fecha in fechas_talla_5_19a], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-
-# Guía inferior - Talla
-add_puntos_ayuda(fig, fechas_talla_5_19a, [polinomio_talla_menos2_5_19a(fecha) for fecha in fechas_talla_5_19a],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-
-# Guía superior - Talla
-add_puntos_ayuda(fig, fechas_talla_5_19a, [polinomio_talla_mas2_5_19a(fecha) for fecha in fechas_talla_5_19a],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_talla, fila_talla_5_19a, columna_talla_5_19a)
-
-# endregion
-
-# region IMC 0 a 5 años
-
-# Generar una lista de 100 nuevos valores de x
-imc_valores_x = np.linspace(min(meses_imc_0_24), max(meses_imc_0_24), 500)
-curva_imc_0_24 = polinomio_imc_0_24(imc_valores_x)
-curva_imc_mas1_0_24 = polinomio_imc_mas1_0_24(imc_valores_x)
-curva_imc_menos1_0_24 = polinomio_imc_menos1_0_24(imc_valores_x)
-curva_imc_mas2_0_24 = polinomio_imc_mas2_0_24(imc_valores_x)
-curva_imc_menos2_0_24 = polinomio_imc_menos2_0_24(imc_valores_x)
-curva_imc_mas3_0_24 = polinomio_imc_mas3_0_24(imc_valores_x)
-curva_imc_menos3_0_24 = polinomio_imc_menos3_0_24(imc_valores_x)
-
-imc_valores_x_24_60 = np.linspace(min(meses_imc_24_60), max(meses_imc_24_60), 500)
-curva_imc_24_60 = polinomio_imc_24_60(imc_valores_x_24_60 )
-curva_imc_mas1_24_60 = polinomio_imc_mas1_24_60(imc_valores_x_24_60 )
-curva_imc_menos1_24_60 = polinomio_imc_menos1_24_60(imc_valores_x_24_60 )
-curva_imc_mas2_24_60 = polinomio_imc_mas2_24_60(imc_valores_x_24_60 )
-curva_imc_menos2_24_60 = polinomio_imc_menos2_24_60(imc_valores_x_24_60 )
-curva_imc_mas3_24_60 = polinomio_imc_mas3_24_60(imc_valores_x_24_60 )
-curva_imc_menos3_24_60 = polinomio_imc_menos3_24_60(imc_valores_x_24_60 )
-
-formato_impresion_imc = '%{y:.2f} imc'
-
-add_grafico_curva(fig, imc_valores_x, curva_imc_0_24, "IMC 0 a 2 años", 
-                  color_ayuda_central, formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x, curva_imc_mas1_0_24, "IMC +1", 
-                  "orange", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x, curva_imc_menos1_0_24, "IMC -1", 
-                  "orange", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x, curva_imc_mas2_0_24, "IMC +2", 
-                  color_ayuda_limite, formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x, curva_imc_menos2_0_24, "IMC -2", 
-                  color_ayuda_limite, formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x, curva_imc_mas3_0_24, "IMC +3", 
-                  "black", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x, curva_imc_menos3_0_24, "IMC -3", 
-                  "black", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-
-# Relleno
-
-# Agregar primero la curva inferior sin relleno para -1 a +1
-fig.add_trace(go.Scatter(x=imc_valores_x, y=curva_imc_menos1_0_24, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_0_5, col=columna_imc_0_5)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x, y=curva_imc_mas1_0_24, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_0_5, col=columna_imc_0_5)
-
-# Agregar primero la curva inferior sin relleno para +1 +2
-fig.add_trace(go.Scatter(x=imc_valores_x, y=curva_imc_mas1_0_24, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_0_5, col=columna_imc_0_5)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x, y=curva_imc_mas2_0_24, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_0_5, col=columna_imc_0_5)
-
-# Agregar primero la curva inferior sin relleno para -2 -1
-fig.add_trace(go.Scatter(x=imc_valores_x, y=curva_imc_menos2_0_24, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_0_5, col=columna_imc_0_5)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x, y=curva_imc_menos1_0_24, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_0_5, col=columna_imc_0_5)
-
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_24_60, "IMC 0 a 2 años", 
-                  color_ayuda_central, formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_mas1_24_60, "IMC +1", 
-                  "orange", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_menos1_24_60, "IMC -1", 
-                  "orange", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_mas2_24_60, "IMC +2", 
-                  color_ayuda_limite, formato_impresion_imc, fila_imc_0_5, 1)
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_menos2_24_60, "IMC -2", 
-                  color_ayuda_limite, formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_mas3_24_60, "IMC +3", 
-                  "black", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-add_grafico_curva(fig, imc_valores_x_24_60, curva_imc_menos3_24_60, "IMC -3", 
-                  "black", formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-
-# Agregar primero la curva inferior sin relleno para -1 a +1
-fig.add_trace(go.Scatter(x=imc_valores_x_24_60, y=curva_imc_menos1_24_60, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_0_5, col=columna_imc_0_5)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x_24_60, y=curva_imc_mas1_24_60, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_0_5, col=columna_imc_0_5)
-
-# Agregar primero la curva inferior sin relleno para +1 +2
-fig.add_trace(go.Scatter(x=imc_valores_x_24_60, y=curva_imc_mas1_24_60, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_0_5, col=columna_imc_0_5)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x_24_60, y=curva_imc_mas2_24_60, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_0_5, col=columna_imc_0_5)
-
-# Agregar primero la curva inferior sin relleno para -2 -1
-fig.add_trace(go.Scatter(x=imc_valores_x_24_60, y=curva_imc_menos2_24_60, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_0_5, col=columna_imc_0_5)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x_24_60, y=curva_imc_menos1_24_60, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_0_5, col=columna_imc_0_5)
-
-fechas_imc_0_5 = [fecha for fecha, _ in datos_imc_entre_0_5]
-valores_imc_0_5 = [imc for _, imc in datos_imc_entre_0_5]
-# mapa_color_imc_0_5 = [asignar_color(x, y, "imc") for x, y in datos_imc_entre_0_5]
-mapa_color_imc_0_5 = "rgba(0, 0, 0, 0.75)"
-texto_hover_imc_0_5 = []
-
-for fecha, imc, valor_fecha in zip(display_fecha_imc_0_5, valores_imc_0_5, fechas_imc_0_5):
-    if valor_fecha <= 24:
-        if polinomio_imc_menos2_0_24(valor_fecha) <= imc <= polinomio_imc_mas2_0_24(valor_fecha):
-            estado = "Normal"
-        elif polinomio_imc_mas2_0_24(valor_fecha) <= imc <= polinomio_imc_mas3_0_24(valor_fecha):
-            estado = "Alerta"
-        elif polinomio_imc_menos3_0_24(valor_fecha) <= imc <= polinomio_imc_menos2_0_24(valor_fecha):
-            estado = "Alerta"
-        elif imc > polinomio_imc_mas3_0_24(valor_fecha):
-            estado = "IMC Alto"
-        elif imc < polinomio_imc_menos3_0_24(valor_fecha):
-            estado = "IMC Bajo"
-        else:
-            estado = "Desconocido"  # Para manejar cualquier otro caso
-    else:
-        if polinomio_imc_menos2_24_60(valor_fecha) <= imc <= polinomio_imc_mas2_24_60(valor_fecha):
-            estado = "Normal"
-        elif polinomio_imc_mas2_24_60(valor_fecha) <= imc <= polinomio_imc_mas3_24_60(valor_fecha):
-            estado = "Alerta"
-        elif polinomio_imc_menos3_24_60(valor_fecha) <= imc <= polinomio_imc_menos2_24_60(valor_fecha):
-            estado = "Alerta"
-        elif imc > polinomio_imc_mas3_24_60(valor_fecha):
-            estado = "IMC Alto"
-        elif imc < polinomio_imc_menos3_24_60(valor_fecha):
-            estado = "IMC Bajo"
-        else:
-            estado = "Desconocido"  # Para manejar cualquier otro caso
-    
-    texto_hover_imc_0_5.append(f"Fecha: {fecha}<br>IMC: {imc}<br>Estado: {estado}")
-
-
-# Puntos de datos de peso imc 0-5 años
-add_puntos_datos_imc(fig, fechas_imc_0_5, valores_imc_0_5, mapa_color_imc_0_5, 'Datos imc 0-5 años', 
-                 texto_hover_imc_0_5, fila_imc_0_5, columna_imc_0_5)
-
-# Guía central - imc
-add_puntos_ayuda(fig, fechas_imc_0_5, [polinomio_imc_24_60(fecha) if fecha > 24 else polinomio_imc_0_24(fecha) for fecha in fechas_imc_0_5], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-
-# Guía inferior - imc
-add_puntos_ayuda(fig, fechas_imc_0_5, [polinomio_imc_menos2_24_60(fecha) if fecha > 24 else polinomio_imc_menos2_0_24(fecha) for fecha in fechas_imc_0_5],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-
-# Guía superior - imc
-add_puntos_ayuda(fig, fechas_imc_0_5, [polinomio_imc_mas2_24_60(fecha) if fecha > 24 else polinomio_imc_mas2_0_24(fecha) for fecha in fechas_imc_0_5],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_imc, fila_imc_0_5, columna_imc_0_5)
-# endregion
-
-# region IMC 5 a 19 años
-
-imc_valores_x_5_19 = np.linspace(min(meses_imc_5_19), max(meses_imc_5_19), 500)
-curva_imc_5_19 = polinomio_imc_5_19(imc_valores_x_5_19 )
-curva_imc_mas1_5_19 = polinomio_imc_mas1_5_19(imc_valores_x_5_19)
-curva_imc_menos1_5_19 = polinomio_imc_menos1_5_19(imc_valores_x_5_19)
-curva_imc_mas2_5_19 = polinomio_imc_mas2_5_19(imc_valores_x_5_19)
-curva_imc_menos2_5_19 = polinomio_imc_menos2_5_19(imc_valores_x_5_19)
-curva_imc_mas3_5_19 = polinomio_imc_mas3_5_19(imc_valores_x_5_19)
-curva_imc_menos3_5_19 = polinomio_imc_menos3_5_19(imc_valores_x_5_19)
-
-formato_impresion_imc = '%{y:.2f} imc'
-
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_5_19, "IMC 0 a 2 años", 
-                  color_ayuda_central, formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_mas1_5_19, "IMC +1", 
-                  "orange", formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_menos1_5_19, "IMC -1", 
-                  "orange", formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_mas2_5_19, "IMC +2", 
-                  color_ayuda_limite, formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_menos2_5_19, "IMC -2", 
-                  color_ayuda_limite, formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_mas3_5_19, "IMC +3", 
-                  "black", formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-add_grafico_curva(fig, imc_valores_x_5_19, curva_imc_menos3_5_19, "IMC -3", 
-                  "black", formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-
-# Agregar primero la curva inferior sin relleno para -1 a +1
-fig.add_trace(go.Scatter(x=imc_valores_x_5_19, y=curva_imc_menos1_5_19, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_5_19, col=columna_imc_5_19)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x_5_19, y=curva_imc_mas1_5_19, fill='tonexty', fillcolor=color_relleno_completo, 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_5_19, col=columna_imc_5_19)
-
-# Agregar primero la curva inferior sin relleno para +1 +2
-fig.add_trace(go.Scatter(x=imc_valores_x_5_19, y=curva_imc_mas1_5_19, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_5_19, col=columna_imc_5_19)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x_5_19, y=curva_imc_mas2_5_19, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_5_19, col=columna_imc_5_19)
-
-# Agregar primero la curva inferior sin relleno para -2 -1
-fig.add_trace(go.Scatter(x=imc_valores_x_5_19, y=curva_imc_menos2_5_19, line=dict(color=color_relleno), 
-                         showlegend=False, hoverinfo='skip'), row=fila_imc_5_19, col=columna_imc_5_19)
-# Luego agregar la curva superior con relleno
-fig.add_trace(go.Scatter(x=imc_valores_x_5_19, y=curva_imc_menos1_5_19, fill='tonexty', fillcolor='rgba(252, 194, 3, 0.3)', 
-                         line=dict(color=color_relleno), showlegend=False, hoverinfo='skip'), 
-                         row=fila_imc_5_19, col=columna_imc_5_19)
-
-# Ojo, dividir para 12 las fechas pues se presentan en meses
-fechas_imc_5_19 = [fecha / 12 for fecha, _ in datos_imc_entre_5_19]
-valores_imc_5_19 = [imc for _, imc in datos_imc_entre_5_19]
-# mapa_color_imc_0_5 = [asignar_color(x, y, "imc") for x, y in datos_imc_entre_0_5]
-mapa_color_imc_5_19 = "rgba(0, 0, 0, 0.75)"
-texto_hover_imc_5_19 = []
-
-for fecha, imc, valor_fecha in zip(display_fecha_imc_5_19, valores_imc_5_19, fechas_imc_5_19):
-    if polinomio_imc_menos2_5_19(valor_fecha) <= imc <= polinomio_imc_mas2_5_19(valor_fecha):
-        estado = "Normal"
-    elif polinomio_imc_mas2_5_19(valor_fecha) <= imc <= polinomio_imc_mas3_5_19(valor_fecha):
-        estado = "Alerta"
-    elif polinomio_imc_menos3_5_19(valor_fecha) <= imc <= polinomio_imc_menos2_5_19(valor_fecha):
-        estado = "Alerta"
-    elif imc > polinomio_imc_mas3_5_19(valor_fecha):
-        estado = "IMC Alto"
-    elif imc < polinomio_imc_menos3_5_19(valor_fecha):
-        estado = "IMC Bajo"
-    else:
-        estado = "Desconocido"  # Para manejar cualquier otro caso
-    
-    texto_hover_imc_5_19.append(f"Fecha: {fecha}<br>IMC: {imc}<br>Estado: {estado}")
-
-# Puntos de datos de peso imc 0-5 años
-add_puntos_datos_imc(fig, fechas_imc_5_19, valores_imc_5_19, mapa_color_imc_5_19, 'Datos imc 5-19 años', 
-                 texto_hover_imc_5_19, fila_imc_5_19, columna_imc_5_19)
-
-# Guía central - imc
-add_puntos_ayuda(fig, fechas_imc_5_19, [polinomio_imc_5_19(fecha) for fecha in fechas_imc_5_19], 
-                 color_ayuda_central, 'Valor ideal', formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-
-# Guía inferior - imc
-add_puntos_ayuda(fig, fechas_imc_5_19, [polinomio_imc_menos2_5_19(fecha) for fecha in fechas_imc_5_19],
-                 color_ayuda_limite, 'Límite inferior', formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-
-# Guía superior - imc
-add_puntos_ayuda(fig, fechas_imc_5_19, [polinomio_imc_mas2_5_19(fecha) for fecha in fechas_imc_5_19],
-                 color_ayuda_limite, 'Límite superior', formato_impresion_imc, fila_imc_5_19, columna_imc_5_19)
-
-# endregion
-# Personalizar la escala de cada subplot # Para que minor funcione sse debe quitar tickvals
-# Curvas peso 0-6 meses
-fig.update_xaxes(title_text="Meses", range=[-0.1, 6.1], 
-                 row=fila_peso_0_6, col=columna_peso_0_6) 
-fig.update_yaxes(title_text="Peso (Kg)",  range=[1, 12], 
-                 gridwidth=1, row=fila_peso_0_6, col=columna_peso_0_6) 
-# Curvas talla 0-6 meses
-fig.update_xaxes(title_text="Meses", range=[-0.1, 6.1], 
-                 row=fila_talla_0_6, col=columna_talla_0_6) 
-fig.update_yaxes(title_text="Talla (cm)", range=[42, 75],
-                 row=fila_talla_0_6, col=columna_talla_0_6) 
-
-# Curvas peso 6-24 meses
-fig.update_xaxes(title_text="Meses", range=[5.9, 24.1], 
-                 row=fila_peso_6_24, col=columna_peso_6_24) 
-fig.update_yaxes(title_text="Peso (Kg)", range=[5, 17.5],
-                 row=fila_peso_6_24, col=columna_peso_6_24)  
-
-# Curvas talla 6-24 meses
-fig.update_xaxes(title_text="Meses", range=[5.9, 24.1], 
-                 row=fila_talla_6_24, col=columna_talla_6_24) 
-fig.update_yaxes(title_text="Talla (cm)", range=[55, 100],
-                 row=fila_talla_6_24, col=columna_talla_6_24)  
-
-# Curvas peso 24-60 meses
-fig.update_xaxes(title_text="Meses", range=[23.9, 60.1], 
-                 row=fila_peso_24_60, col=columna_peso_24_60) 
-fig.update_yaxes(title_text="Peso (Kg)", range=[7, 30],
-                 row=fila_peso_24_60, col=columna_peso_24_60)  
-
-# Curvas talla 24-60 meses
-fig.update_xaxes(title_text="Meses", range=[23.9, 60.1], 
-                 row=fila_talla_24_60, col=columna_talla_24_60) 
-fig.update_yaxes(title_text="Talla (cm)", range=[75, 125], 
-                 row=fila_talla_24_60, col=columna_talla_24_60) 
-
-# Curvas peso 5-10 años
-fig.update_xaxes(title_text="Años", range=[4.9, 10.1], 
-                 row=fila_peso_5_10a, col=columna_peso_5_10a) 
-fig.update_yaxes(title_text="Peso (kg)", range=[11, 60],
-                 row=fila_peso_5_10a, col=columna_peso_5_10a) 
-
-# Curvas talla 5-19 años
-fig.update_xaxes(title_text="Años", range=[4.95, 19.05], 
-                 row=fila_talla_5_19a, col=columna_talla_5_19a) 
-fig.update_yaxes(title_text="Talla (cm)", range=[90, 190],
-                 row=fila_talla_5_19a, col=columna_talla_5_19a) 
-  
-# minor=dict(ticklen=5, showgrid=True)
-
-# IMC 0-5 años
-fig.update_xaxes(title_text="Meses", range=[-0.1, 60.1], 
-                 row=fila_imc_0_5, col=columna_imc_0_5) 
-fig.update_yaxes(title_text="Índice de masa corporal (kg/m^2)", range=[9, 23], 
-                 row=fila_imc_0_5, col=columna_imc_0_5)  
-
-# IMC 5-19 años
-fig.update_xaxes(title_text="Años", range=[4.9, 19.1], 
-                 row=fila_imc_5_19, col=columna_imc_5_19) 
-fig.update_yaxes(title_text="Índice de masa corporal (kg/m^2)", range=[10, 40], 
-                 row=fila_imc_5_19, col=columna_imc_5_19)   
-
-# region Divisiones de ayuda
+def add_banda(fig, x, y_inferior, y_superior, color, row, col, traza=None):
+    # Una sola traza por banda: polígono cerrado que recorre la curva inferior de ida y la
+    # superior de vuelta, en vez de repetir la inferior como traza invisible con tonexty
+    x = np.asarray(x)
+    trace = (traza or go.Scatter)(
+        x=np.concatenate([x, x[::-1]]),
+        y=np.concatenate([np.asarray(y_inferior), np.asarray(y_superior)[::-1]]),
+        fill='toself',
+        fillcolor=color,
+        mode='lines',
+        line=dict(color=color_relleno, width=0),
+        showlegend=False,
+        hoverinfo='skip'
+    )
+    fig.add_trace(trace, row=row, col=col)
 
 # Función para crear las lineas y añadirlas al gráfico correspondiente
 def add_division(fig, x0, x1, y0, y1, row, col):
@@ -1523,28 +376,6 @@ def add_division(fig, x0, x1, y0, y1, row, col):
     )
     fig.add_shape(shape, row=row, col=col)
 
-# Divisiones de ayuda
-add_division(fig, 12, 12, 5, 18, fila_peso_6_24, columna_peso_6_24)
-add_division(fig, 24, 24, 5, 18, fila_peso_6_24, columna_peso_6_24)
-add_division(fig, 12, 12, 55, 100, fila_talla_6_24, columna_talla_6_24)
-add_division(fig, 24, 24, 55, 100, fila_talla_6_24, columna_talla_6_24)
-
-add_division(fig, 24, 24, 6, 31, fila_peso_24_60, columna_peso_24_60)
-add_division(fig, 36, 36, 6, 31, fila_peso_24_60, columna_peso_24_60)
-add_division(fig, 48, 48, 6, 31, fila_peso_24_60, columna_peso_24_60)
-add_division(fig, 60, 60, 6, 31, fila_peso_24_60, columna_peso_24_60)
-
-add_division(fig, 24, 24, 75, 125, fila_talla_24_60, columna_talla_24_60)
-add_division(fig, 36, 36, 75, 125, fila_talla_24_60, columna_talla_24_60)
-add_division(fig, 48, 48, 75, 125, fila_talla_24_60, columna_talla_24_60)
-add_division(fig, 60, 60, 75, 125, fila_talla_24_60, columna_talla_24_60)
-
-add_division(fig, 12, 12, 9, 23, fila_imc_0_5, columna_imc_0_5)
-add_division(fig, 24, 24, 9, 23, fila_imc_0_5, columna_imc_0_5)
-add_division(fig, 36, 36, 9, 23, fila_imc_0_5, columna_imc_0_5)
-add_division(fig, 48, 48, 9, 23, fila_imc_0_5, columna_imc_0_5)
-add_division(fig, 60, 60, 9, 23, fila_imc_0_5, columna_imc_0_5)
-
 # Textos
 def add_anotacion_figura(fig, texto, x, y, row, col):
     fig.add_annotation(
@@ -1578,164 +409,478 @@ def add_anotacion_eje_y_figura(fig, texto, x, y, row, col, color_flecha="green",
         ), row=row, col=col
     )
 
-add_anotacion_eje_y_figura(fig, "0", 6, polinomio_peso_0_6(6), fila_peso_0_6, columna_peso_0_6,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+2", 6, polinomio_peso_mas2_0_6(6), fila_peso_0_6, columna_peso_0_6,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 6, polinomio_peso_menos2_0_6(6), fila_peso_0_6, columna_peso_0_6,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 6, polinomio_peso_mas3_0_6(6), fila_peso_0_6, columna_peso_0_6,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 6, polinomio_peso_menos3_0_6(6), fila_peso_0_6, columna_peso_0_6,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_eje_y_figura(fig, "0", 6, polinomio_talla_0_6(6), fila_talla_0_6, columna_talla_0_6,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+2", 6, polinomio_talla_mas2_0_6(6), fila_talla_0_6, columna_talla_0_6,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 6, polinomio_talla_menos2_0_6(6), fila_talla_0_6, columna_talla_0_6,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 6, polinomio_talla_mas3_0_6(6), fila_talla_0_6, columna_talla_0_6,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 6, polinomio_talla_menos3_0_6(6), fila_talla_0_6, columna_talla_0_6,
-                           color_flecha="black", color_texto="black")
-
-
-add_anotacion_figura(fig, "1 año", 12, 5, fila_peso_6_24, columna_peso_6_24)
-add_anotacion_figura(fig, "2 años", 24, 5, fila_peso_6_24, columna_peso_6_24)
-add_anotacion_eje_y_figura(fig, "0", 24, polinomio_peso_6_24(24), fila_peso_6_24, columna_peso_6_24,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+2", 24, polinomio_peso_mas2_6_24(24), fila_peso_6_24, columna_peso_6_24,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 24, polinomio_peso_menos2_6_24(24), fila_peso_6_24, columna_peso_6_24,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 24, polinomio_peso_mas3_6_24(24), fila_peso_6_24, columna_peso_6_24,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 24, polinomio_peso_menos3_6_24(24), fila_peso_6_24, columna_peso_6_24,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_figura(fig, "2 años", 24, 7, fila_peso_24_60, columna_peso_24_60)
-add_anotacion_figura(fig, "3 años", 36, 7, fila_peso_24_60, columna_peso_24_60)
-add_anotacion_figura(fig, "4 años", 48, 7, fila_peso_24_60, columna_peso_24_60)
-add_anotacion_figura(fig, "5 años", 60, 7, fila_peso_24_60, columna_peso_24_60)
-add_anotacion_eje_y_figura(fig, "0", 60, polinomio_peso_24_60(60), fila_peso_24_60, columna_peso_24_60,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+2", 60, polinomio_peso_mas2_24_60(60), fila_peso_24_60, columna_peso_24_60,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 60, polinomio_peso_menos2_24_60(60), fila_peso_24_60, columna_peso_24_60,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 60, polinomio_peso_mas3_24_60(60), fila_peso_24_60, columna_peso_24_60,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 60, polinomio_peso_menos3_24_60(60), fila_peso_24_60, columna_peso_24_60,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_figura(fig, "1 año", 12, 55, fila_talla_6_24, columna_talla_6_24)
-add_anotacion_figura(fig, "2 años", 24, 55, fila_talla_6_24, columna_talla_6_24)
-add_anotacion_eje_y_figura(fig, "0", 24, polinomio_talla_6_24(24), fila_talla_6_24, columna_talla_6_24,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+2", 24, polinomio_talla_mas2_6_24(24), fila_talla_6_24, columna_talla_6_24,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 24, polinomio_talla_menos2_6_24(24), fila_talla_6_24, columna_talla_6_24,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 24, polinomio_talla_mas3_6_24(24), fila_talla_6_24, columna_talla_6_24,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 24, polinomio_talla_menos3_6_24(24), fila_talla_6_24, columna_talla_6_24,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_figura(fig, "2 años", 24, 75, fila_talla_24_60, columna_talla_24_60)
-add_anotacion_figura(fig, "3 años", 36, 75, fila_talla_24_60, columna_talla_24_60)
-add_anotacion_figura(fig, "4 años", 48, 75, fila_talla_24_60, columna_talla_24_60)
-add_anotacion_figura(fig, "5 años", 60, 75, fila_talla_24_60, columna_talla_24_60)
-add_anotacion_eje_y_figura(fig, "0", 60, polinomio_talla_24_60(60), fila_talla_24_60, columna_talla_24_60,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+2", 60, polinomio_talla_mas2_24_60(60), fila_talla_24_60, columna_talla_24_60,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 60, polinomio_talla_menos2_24_60(60), fila_talla_24_60, columna_talla_24_60,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 60, polinomio_talla_mas3_24_60(60), fila_talla_24_60, columna_talla_24_60,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 60, polinomio_talla_menos3_24_60(60), fila_talla_24_60, columna_talla_24_60,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_eje_y_figura(fig, "0", 10, polinomio_peso_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+1", 10, polinomio_peso_mas1_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "-1", 10, polinomio_peso_menos1_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "+2", 10, polinomio_peso_mas2_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 10, polinomio_peso_menos2_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 10, polinomio_peso_mas3_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 10, polinomio_peso_menos3_5_10a(10), fila_peso_5_10a, columna_peso_5_10a,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_eje_y_figura(fig, "0", 19, polinomio_talla_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+1", 19, polinomio_talla_mas1_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "-1", 19, polinomio_talla_menos1_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "+2", 19, polinomio_talla_mas2_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "-2", 19, polinomio_talla_menos2_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 19, polinomio_talla_mas3_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 19, polinomio_talla_menos3_5_19a(19), fila_talla_5_19a, columna_talla_5_19a,
-                           color_flecha="black", color_texto="black")
-
-
-add_anotacion_figura(fig, "1 año", 12, 9, fila_imc_0_5, columna_imc_0_5)
-add_anotacion_figura(fig, "2 años", 24, 9, fila_imc_0_5, columna_imc_0_5)
-add_anotacion_figura(fig, "3 años", 36, 9, fila_imc_0_5, columna_imc_0_5)
-add_anotacion_figura(fig, "4 años", 48, 9, fila_imc_0_5, columna_imc_0_5)
-add_anotacion_figura(fig, "5 años", 60, 9, fila_imc_0_5, columna_imc_0_5)
-add_anotacion_eje_y_figura(fig, "0", 60, polinomio_imc_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+1", 60, polinomio_imc_mas1_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "+1", 60, polinomio_imc_menos1_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "+2", 60, polinomio_imc_mas2_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+2", 60, polinomio_imc_menos2_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 60, polinomio_imc_mas3_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 60, polinomio_imc_menos3_24_60(60), fila_imc_0_5, columna_imc_0_5,
-                           color_flecha="black", color_texto="black")
-
-add_anotacion_eje_y_figura(fig, "0", 19, polinomio_imc_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha=color_ayuda_central, color_texto=color_ayuda_central)
-add_anotacion_eje_y_figura(fig, "+1", 19, polinomio_imc_mas1_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "+1", 19, polinomio_imc_menos1_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha="rgba(209, 150, 0, 1)", color_texto="rgba(209, 150, 0, 1)")
-add_anotacion_eje_y_figura(fig, "+2", 19, polinomio_imc_mas2_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+2", 19, polinomio_imc_menos2_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha=color_ayuda_limite, color_texto=color_ayuda_limite)
-add_anotacion_eje_y_figura(fig, "+3", 19, polinomio_imc_mas3_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha="black", color_texto="black")
-add_anotacion_eje_y_figura(fig, "-3", 19, polinomio_imc_menos3_5_19(19), fila_imc_5_19, columna_imc_5_19,
-                           color_flecha="black", color_texto="black")
-
-# Establecer el diseño general
-fig.update_layout(
-    title={
-        'text': "Curvas de Crecimiento",
-        'x': 0.5,  # Centrar el título horizontalmente
-    },
-    showlegend=True,
-    height=2400,  # Altura
-    width=1400, # Ancho
-)
+def nombre_curva(indicador, desviacion, rango):
+    return f"{indicador}{referencias.SUFIJOS_DESVIACION[desviacion]}_{rango}"
+
+def polinomio_curva(ref, indicador, desviacion, rango):
+    return getattr(ref, "polinomio_" + nombre_curva(indicador, desviacion, rango))
+
+def evaluar_guia(ref, indicador, desviacion, tablas, meses, x):
+    # Cada medición se evalúa con la tabla de su edad (el IMC de 0 a 5 años usa dos)
+    limites = [limite for _, _, limite in tablas]
+    indices = np.minimum(np.searchsorted(limites, meses, side='left'), len(tablas) - 1)
+    y = np.empty(len(x))
+    for indice, (_, rango, _) in enumerate(tablas):
+        mascara = indices == indice
+        if mascara.any():
+            y[mascara] = polinomio_curva(ref, indicador, desviacion, rango)(x[mascara])
+    return y
+
+def paneles_del_paciente(mediciones, hoy=None):
+    # Paneles con alguna medición y el de la edad actual
+    edad = ingesta.edad_actual_meses(mediciones, hoy)
+    elegidos = []
+    for panel in PANELES_GRAFICO:
+        meses, _, _, _ = ingesta.panel(mediciones, panel['indicador'], panel['rango'])
+        if len(meses) or (edad is not None and ingesta.panel_de_edad(panel['indicador'], edad) == panel['rango']):
+            elegidos.append(panel)
+    return elegidos
+
+def seleccionar_paneles(mediciones, paneles=None):
+    # None o 'todos': los diez paneles, 'auto': solo los del paciente, o una lista de ids
+    if paneles is None or paneles == 'todos':
+        return list(PANELES_GRAFICO)
+    if paneles == 'auto':
+        return paneles_del_paciente(mediciones) or list(PANELES_GRAFICO)
+    desconocidos = set(paneles) - set(IDS_PANELES)
+    if desconocidos:
+        raise ValueError(f"Paneles desconocidos: {', '.join(sorted(desconocidos))}")
+    return [panel for panel in PANELES_GRAFICO if id_panel(panel) in paneles]
+
+def agregar_panel(fig, ref, mediciones, panel, fila, columna, guias=False, traza=None):
+    indicador = panel['indicador']
+    divisor = 12 if panel['unidad'] == 'años' else 1
+    formato_impresion = FORMATOS_IMPRESION[indicador]
+
+    # Curvas de desviación estándar y bandas rellenas de cada tabla
+    for nombre_edad, rango, _ in panel['tablas']:
+        x_curva = ref.x_curvas[nombre_edad]
+        for desviacion in panel['desviaciones']:
+            nombre = panel['nombre'] if desviacion == 0 else NOMBRES_DESVIACION[desviacion]
+            add_grafico_curva(fig, x_curva, ref.curvas[nombre_curva(indicador, desviacion, rango)], nombre,
+                              COLORES_DESVIACION[abs(desviacion)], formato_impresion, fila, columna, traza)
+        for inferior, superior, color in panel['bandas']:
+            add_banda(fig, x_curva, ref.curvas[nombre_curva(indicador, inferior, rango)],
+                      ref.curvas[nombre_curva(indicador, superior, rango)], color, fila, columna, traza)
+
+    # Puntos de datos e información
+    meses, valores, fechas, dias = ingesta.panel(mediciones, indicador, panel['rango'])
+    x_datos = meses / divisor
+    with metricas.tramo("colores"):
+        mapa_color = colores.asignar_colores(ref, indicador, meses, valores, dias=dias)
+    with metricas.tramo("clasificacion"):
+        estados, puntajes = clasificacion.clasificar(ref, indicador, meses, valores, dias=dias)
+        nombres_estado = clasificacion.nombres_estado(indicador, estados)
+    texto_hover = [f"Fecha: {fecha}<br>{TEXTOS_HOVER[indicador].format(valor)}<br>Estado: {estado}"
+                   for fecha, valor, estado in zip(fechas, valores, nombres_estado)]
+    if clasificacion.leer_metodo() == 'lms':
+        # El puntaje z LMS de la OMS y su percentil
+        texto_hover = [texto if z != z else f"{texto}<br>Puntaje z: {z:+.2f} (percentil {p:.1f})"
+                       for texto, z, p in zip(texto_hover, puntajes.tolist(),
+                                              clasificacion.percentil(puntajes).tolist())]
+    if indicador == 'imc':
+        add_puntos_datos_imc(fig, x_datos, valores, mapa_color, panel['datos'], texto_hover, fila, columna, traza)
+    else:
+        add_puntos_datos(fig, x_datos, valores, mapa_color, 'green', panel['datos'], texto_hover, fila, columna, traza)
+
+    # Guías ocultas, solo se envían si se piden
+    if guias:
+        for desviacion, color, nombre in GUIAS:
+            add_puntos_ayuda(fig, x_datos, evaluar_guia(ref, indicador, desviacion, panel['tablas'], meses, x_datos),
+                             color, nombre, formato_impresion, fila, columna, traza)
+
+    # Escala del panel
+    fig.update_xaxes(title_text=panel['unidad'].capitalize(), range=list(panel['eje_x']), row=fila, col=columna)
+    fig.update_yaxes(title_text=TITULOS_EJE_Y[indicador], range=list(panel['eje_y']), row=fila, col=columna)
+
+    # Divisiones de ayuda y textos
+    for x, y0, y1 in panel['divisiones']:
+        add_division(fig, x, x, y0, y1, fila, columna)
+    for texto, x, y in panel['marcas']:
+        add_anotacion_figura(fig, texto, x, y, fila, columna)
+
+    # Etiqueta de cada curva en el borde derecho, con la última tabla del panel
+    _, rango_final, limite_final = panel['tablas'][-1]
+    x_final = limite_final / divisor
+    for desviacion in panel['desviaciones']:
+        color = COLORES_ETIQUETA[abs(desviacion)]
+        add_anotacion_eje_y_figura(fig, f"{desviacion:+d}" if desviacion else "0", x_final,
+                                   polinomio_curva(ref, indicador, desviacion, rango_final)(x_final), fila, columna,
+                                   color_flecha=color, color_texto=color)
+
+def tipo_traza(mediciones, webgl=UMBRAL_WEBGL):
+    # Con más mediciones que el umbral toda la figura pasa a WebGL, mezclar SVG y WebGL en
+    # un mismo panel cambia el orden en que se dibujan las trazas. None nunca usa WebGL
+    if webgl is not None and len(mediciones.valores) > webgl:
+        return go.Scattergl
+    return go.Scatter
+
+def construir_figura(resultados, genero=1, capa=None, guias=False, paneles=None, webgl=UMBRAL_WEBGL):
+    # capa=None construye la figura completa, 'paciente' solo las trazas del paciente
+    # (CapaPaciente) y 'referencia' solo curvas, rellenos y anotaciones del sexo
+    # guias=True agrega las guías ocultas (valor ideal y límites en cada medición)
+    # paneles elige qué paneles se construyen (ver seleccionar_paneles), los que quedan se
+    # acomodan de dos en dos. Las capas llevan siempre los diez, la capa del paciente se
+    # superpone a la de referencia con los mismos ejes
+    # webgl es el umbral de mediciones a partir del cual se usa Scattergl (ver tipo_traza)
+    # Ingesta columnar: un arreglo por columna, unidades y umbrales aplicados como
+    # operaciones vectoriales y el panel de cada medición asignado en una sola pasada
+    with metricas.tramo("ingesta"):
+        mediciones = ingesta.ingerir(resultados, genero)
+    genero = mediciones.genero
+
+    texto_titulo = "Niños" if genero == 1 else "Niñas"
+
+    # Tablas de referencia del sexo del paciente
+    ref = cargar_referencias(genero)
+
+    seleccion = list(PANELES_GRAFICO) if capa else seleccionar_paneles(mediciones, paneles)
+    # La capa de referencia no tiene mediciones y queda siempre en SVG
+    traza = tipo_traza(mediciones, webgl)
+    filas = (len(seleccion) + 1) // 2
+
+    if capa == CAPA_PACIENTE:
+        fig = CapaPaciente(genero, ref.version)
+    else:
+        # Crear subgráficos
+        fig = plotly_subplots.make_subplots(
+            rows=filas, cols=2,
+            vertical_spacing = SEPARACION_FILAS / filas, # Valores entre 0 y 1
+            horizontal_spacing = 0.1,  # Valores entre 0 y 1
+            subplot_titles=[panel['titulo'].format(texto_titulo) for panel in seleccion]
+        )
+
+    for posicion, panel in enumerate(seleccion):
+        agregar_panel(fig, ref, mediciones, panel, posicion // 2 + 1, posicion % 2 + 1, guias, traza)
+
+    # Establecer el diseño general
+    fig.update_layout(
+        title={
+            'text': "Curvas de Crecimiento",
+            'x': 0.5,  # Centrar el título horizontalmente
+        },
+        showlegend=True,
+        height=ALTO_FILA * filas,  # Altura
+        width=1400, # Ancho
+    )
 
-# endregion
-# Guardar el gráfico en un archivo HTML
-filename = 'grafico_curvas_plotly.html'
-# Para desactivar la barra de herramientas se incluye config
-pio.write_html(fig, file=filename, auto_open=False, config = {'displayModeBar': False})
+    if capa == CAPA_REFERENCIA:
+        # Sin las trazas del paciente, el navegador las superpone después
+        fig.data = [traza for traza in fig.data if traza.meta != CAPA_PACIENTE]
+
+    return fig
+
+# plotly.js servido una sola vez por el servidor web, el navegador lo guarda en caché y
+# los fragmentos solo traen el div y los datos de la figura. Se genera con
+# --exportar-plotlyjs, o se reemplaza por un paquete reducido con solo trazas scatter
+# (plotly-basic.min.js de plotly.js-basic-dist-min) indicando su ruta en config.ini. El
+# paquete básico no trae Scattergl, con UMBRAL_WEBGL activo hace falta plotly-gl2d:
+#   [salida]
+#   plotlyjs = js/plotly-basic.min.js
+RUTA_PLOTLYJS = 'js/plotly.min.js'
+
+# Capas de referencia: curvas, rellenos y anotaciones son iguales para todos los niños o
+# todas las niñas, se exportan una vez por sexo y versión como JSON estático
+#   [salida]
+#   referencias = js/referencias
+DIRECTORIO_REFERENCIAS = 'js/referencias'
+
+FORMATOS = ('html', 'fragmento', 'json', 'paciente')
+
+def leer_ruta_plotlyjs(ruta='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    return config.get('salida', 'plotlyjs', fallback=RUTA_PLOTLYJS)
+
+def leer_umbral_webgl(ruta='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    umbral = config.get('salida', 'webgl', fallback=str(UMBRAL_WEBGL)).strip()
+    return int(umbral) if umbral else None
+
+def leer_directorio_referencias(ruta='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    return config.get('salida', 'referencias', fallback=DIRECTORIO_REFERENCIAS)
+
+def extension(formato):
+    return 'json' if formato in ('json', 'paciente') else 'html'
+
+def nombre_capa_referencia(genero, version_referencias):
+    # El nombre cambia con las tablas y con el código, el servidor web puede cachearlo sin expiración
+    sexo = "hombre" if genero == 1 else "mujer"
+    return f"referencia_{sexo}.{version_referencias[:8]}{cache_graficos.VERSION_CODIGO[:8]}.json"
+
+def exportar_capa_referencia(genero, directorio=None):
+    directorio = directorio or leer_directorio_referencias()
+    ruta = os.path.join(directorio, nombre_capa_referencia(genero, cargar_referencias(genero).version))
+    if not os.path.exists(ruta):
+        os.makedirs(directorio, exist_ok=True)
+        escribir_atomico(pio.to_json(construir_figura([], genero, CAPA_REFERENCIA)), ruta)
+    return ruta
+
+def renderizar_html(fig):
+    # Para desactivar la barra de herramientas se incluye config
+    return pio.to_html(fig, full_html=True, config={'displayModeBar': False})
+
+def renderizar_fragmento(fig, src_plotlyjs=None):
+    # Solo el div de la figura, plotly.js se referencia con <script src> en vez de incrustarse
+    return pio.to_html(fig, full_html=False, include_plotlyjs=src_plotlyjs or leer_ruta_plotlyjs(),
+                       config={'displayModeBar': False})
+
+def renderizar(fig, formato='html', src_plotlyjs=None):
+    # html: página completa con plotly.js incluido, fragmento: div que usa el plotly.js
+    # servido aparte, json: solo la figura para que el navegador la dibuje, paciente: solo
+    # los puntos del paciente y el nombre de la capa de referencia que se les superpone
+    with metricas.tramo(f"renderizado {formato}"):
+        if formato == 'html':
+            return renderizar_html(fig)
+        if formato == 'fragmento':
+            return renderizar_fragmento(fig, src_plotlyjs)
+        if formato == 'paciente':
+            exportar_capa_referencia(fig.genero)
+            return fig.to_json()
+        return pio.to_json(fig)
+
+def capa_de_formato(formato):
+    return CAPA_PACIENTE if formato == 'paciente' else None
+
+def resumen_figura(fig):
+    # Cantidad de trazas, cuántas son WebGL y bytes del JSON de la figura
+    webgl = sum(1 for traza in fig.data if traza.type == 'scattergl')
+    return len(fig.data), webgl, len(pio.to_json(fig).encode('utf-8'))
+
+def tamanos_salida(resultados, src_plotlyjs=None, webgl=UMBRAL_WEBGL):
+    # Bytes y segundos de cada formato para el mismo paciente, y tamaño de lo que el
+    # navegador descarga una sola vez (plotly.js y la capa de referencia). Las figuras se
+    # resumen también forzando SVG y WebGL para comparar
+    tamanos = {}
+    for nombre, guias, umbral in (('figura', False, webgl), ('figura_con_guias', True, webgl),
+                                  ('figura_svg', False, None), ('figura_webgl', False, 0)):
+        trazas, trazas_webgl, tamano = resumen_figura(construir_figura(resultados, guias=guias, webgl=umbral))
+        tamanos[nombre] = (tamano, None, f"{trazas} trazas ({trazas_webgl} webgl)")
+    for formato in FORMATOS:
+        inicio = time.perf_counter()
+        figura = construir_figura(resultados, capa=capa_de_formato(formato), webgl=webgl)
+        contenido = renderizar(figura, formato, src_plotlyjs)
+        tamanos[formato] = (len(contenido.encode('utf-8')), time.perf_counter() - inicio, None)
+    genero = 2 if resultados and resultados[0][2] == 2 else 1
+    for nombre, ruta in (('plotlyjs', src_plotlyjs or leer_ruta_plotlyjs()),
+                         ('referencia', exportar_capa_referencia(genero))):
+        tamanos[nombre] = (os.path.getsize(ruta) if os.path.exists(ruta) else None, None, None)
+    return tamanos
+
+def exportar_plotlyjs(ruta=None):
+    # Copia el plotly.js que trae la librería de Python a la ruta servida por la web
+    from plotly.offline import get_plotlyjs
+    ruta = ruta or leer_ruta_plotlyjs()
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    return escribir_atomico(get_plotlyjs(), ruta)
+
+def generar_grafico(cedula, conn, capa=None, guias=False, paneles=None, webgl=UMBRAL_WEBGL):
+    with metricas.tramo("consulta"):
+        resultados = consultar_signos_vitales(conn, cedula)
+    with metricas.tramo("figura"):
+        return construir_figura(resultados, capa=capa, guias=guias, paneles=paneles, webgl=webgl)
+
+def variante_paneles(paneles):
+    # Parte de la clave de caché que depende de los paneles elegidos, en modo auto cambia
+    # cada día porque el panel de la edad actual puede cambiar sin consultas nuevas
+    if paneles is None or paneles == 'todos':
+        return ''
+    if paneles == 'auto':
+        return f"|auto:{np.datetime64('today', 'D')}"
+    return '|' + ','.join(panel for panel in IDS_PANELES if panel in paneles)
+
+def obtener_contenido(cedula, conn, formato='html', cache=None, src_plotlyjs=None, guias=False, paneles=None,
+                      webgl=UMBRAL_WEBGL):
+    # Con caché, si el paciente no tiene consultas nuevas se devuelve el resultado guardado
+    if cache is None:
+        return renderizar(generar_grafico(cedula, conn, capa_de_formato(formato), guias, paneles, webgl),
+                          formato, src_plotlyjs)
+    # El fragmento lleva la ruta de plotly.js, si cambia no sirve el guardado
+    variante = (src_plotlyjs or leer_ruta_plotlyjs()) if formato == 'fragmento' else ''
+    if guias:
+        variante += '|guias'
+    variante += f"|webgl:{webgl}"
+    if clasificacion.leer_metodo() != 'curvas':
+        variante += f"|puntaje:{clasificacion.leer_metodo()}"
+    # Con y sin rejilla los puntajes difieren en el redondeo, no comparten lo guardado
+    variante += f"|rejilla:{int(rejilla.leer_activa())}"
+    if capa_de_formato(formato) is None:
+        variante += variante_paneles(paneles)
+    with metricas.tramo("caché"):
+        clave = cache.clave(conn, cedula, formato, variante)
+        contenido = cache.obtener(clave, formato)
+    if contenido is None:
+        contenido = renderizar(generar_grafico(cedula, conn, capa_de_formato(formato), guias, paneles, webgl),
+                               formato, src_plotlyjs)
+        cache.guardar(clave, contenido, formato)
+    return contenido
+
+# Salidas: cada ejecución escribe en su propio destino para que dos consultas simultáneas
+# nunca compartan archivo
+
+def escribir_atomico(contenido, ruta):
+    # Se escribe en un temporal del mismo directorio y se renombra, quien lea la ruta
+    # ve el archivo anterior o el nuevo completo, nunca uno a medias
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix='.grafico_', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return ruta
+
+def ruta_unica(directorio, cedula, formato='html'):
+    os.makedirs(directorio, exist_ok=True)
+    nombre = re.sub(r'[^\w-]', '_', cedula) or 'sin_cedula'
+    return os.path.join(directorio, f"grafico_{nombre}_{uuid.uuid4().hex}.{extension(formato)}")
+
+def escribir_descriptor(contenido, fd):
+    with os.fdopen(fd, 'w', encoding='utf-8', closefd=fd > 2) as archivo:
+        archivo.write(contenido)
+        archivo.flush()
+
+def lista_paneles(texto):
+    # --paneles todos | auto | peso_0_6,talla_0_6,...
+    if texto in ('todos', 'auto'):
+        return texto
+    paneles = [panel.strip() for panel in texto.split(',') if panel.strip()]
+    desconocidos = [panel for panel in paneles if panel not in IDS_PANELES]
+    if desconocidos or not paneles:
+        raise argparse.ArgumentTypeError(f"paneles desconocidos: {', '.join(desconocidos) or repr(texto)} "
+                                         f"(válidos: todos, auto, {', '.join(IDS_PANELES)})")
+    return paneles
+
+def leer_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description='Curvas de crecimiento de un paciente')
+    parser.add_argument('cedula', nargs='?', default='')
+    parser.add_argument('--formato', choices=FORMATOS, default='html',
+                        help='Página HTML completa, fragmento que usa el plotly.js servido aparte, JSON de la '
+                             'figura o JSON con solo los puntos del paciente')
+    parser.add_argument('--plotlyjs', metavar='SRC',
+                        help='Ruta o URL de plotly.js para el fragmento (por defecto %s)' % RUTA_PLOTLYJS)
+    parser.add_argument('--exportar-plotlyjs', nargs='?', const='', metavar='RUTA',
+                        help='Escribe plotly.js en RUTA (o en la de --plotlyjs) y termina')
+    parser.add_argument('--exportar-referencias', nargs='?', const='', metavar='DIRECTORIO',
+                        help='Escribe las capas de referencia de ambos sexos (por defecto en %s) y termina'
+                             % DIRECTORIO_REFERENCIAS)
+    parser.add_argument('--reporte-tamano', action='store_true',
+                        help='Imprime en stderr los bytes de cada formato y las trazas de la figura para este paciente')
+    parser.add_argument('--guias', action='store_true',
+                        help='Incluye las guías ocultas (valor ideal y límites en cada medición)')
+    parser.add_argument('--paneles', type=lista_paneles, default='todos', metavar='PANELES',
+                        help='todos (por defecto), auto (los paneles con mediciones y el de la edad actual) '
+                             'o una lista separada por comas: ' + ', '.join(IDS_PANELES))
+    parser.add_argument('--webgl', type=int, metavar='MEDICIONES',
+                        help='Usa WebGL (Scattergl) con más mediciones que este umbral, 0 siempre, -1 nunca '
+                             '(por defecto [salida] webgl o %s)' % UMBRAL_WEBGL)
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument('--stdout', action='store_true', help='Escribe el resultado en la salida estándar')
+    destino.add_argument('--fd', type=int, help='Escribe el resultado en este descriptor de archivo')
+    destino.add_argument('--archivo', help='Ruta de salida (por defecto %s)' % filename)
+    destino.add_argument('--unico', nargs='?', const='graficos', metavar='DIRECTORIO',
+                         help='Escribe en un archivo nuevo dentro de DIRECTORIO e imprime su ruta')
+    parser.add_argument('--cache', metavar='DIRECTORIO', help='Directorio de la caché de gráficos')
+    parser.add_argument('--cache-capacidad', type=int, help='Máximo de gráficos en la caché')
+    parser.add_argument('--tiempos', action='store_true',
+                        help='Imprime en stderr el tiempo de cada importación y etapa, como python -X importtime')
+    parser.add_argument('--metricas', action='store_true',
+                        help='Escribe una línea JSON con el tiempo y la CPU de cada etapa '
+                             '(en stderr o en [metricas] registro)')
+    parser.add_argument('--memoria', action='store_true',
+                        help='Agrega a --metricas el pico de memoria de cada etapa (tracemalloc), implica --metricas. '
+                             'Hace el gráfico unas tres veces más lento, los tiempos medidos no son los reales')
+    parser.add_argument('--prometheus', metavar='RUTA',
+                        help='Archivo para el textfile collector de Prometheus, implica --metricas')
+    parser.add_argument('--perfil', metavar='PREFIJO',
+                        help='Perfila el gráfico completo con cProfile, escribe PREFIJO.pstats y PREFIJO.collapsed '
+                             '(pilas para flamegraph) e imprime las funciones más lentas')
+    parser.add_argument('--perfil-top', type=int, default=25, metavar='N',
+                        help='Funciones que imprime --perfil (por defecto 25)')
+    parser.add_argument('--sintetico', metavar='PERFIL',
+                        help='Usa un paciente sintético de sinteticos.py en vez de la base de datos: recien_nacido, '
+                             'lactante, preescolar, escolar o adolescente')
+    return parser.parse_args(argv)
+
+def generar_y_escribir(args, cache=None, webgl=UMBRAL_WEBGL, conn=None):
+    # Todo lo que hace la línea de comandos con una cédula, desde la conexión hasta escribir
+    # el resultado (lo que mide --perfil)
+    if conn is None:
+        with metricas.tramo("conexión"):
+            conn = conectar()
+    try:
+        if args.reporte_tamano:
+            tamanos = tamanos_salida(consultar_signos_vitales(conn, args.cedula), args.plotlyjs, webgl)
+            for formato, (tamano, segundos, trazas) in tamanos.items():
+                texto = 'no encontrado' if tamano is None else f'{tamano} bytes'
+                if segundos is not None:
+                    texto += f', {segundos:.3f} s'
+                if trazas is not None:
+                    texto += f', {trazas}'
+                print(f"{formato}: {texto}", file=sys.stderr)
+        contenido = obtener_contenido(args.cedula, conn, args.formato, cache, args.plotlyjs, args.guias,
+                                      args.paneles, webgl)
+    finally:
+        # Cerrar la conexión
+        conn.close()
+
+    with metricas.tramo("escritura"):
+        if args.stdout:
+            escribir_descriptor(contenido, sys.stdout.fileno())
+        elif args.fd is not None:
+            escribir_descriptor(contenido, args.fd)
+        elif args.unico:
+            print(escribir_atomico(contenido, ruta_unica(args.unico, args.cedula, args.formato)))
+        else:
+            # Guardar el gráfico en un archivo HTML
+            escribir_atomico(contenido, args.archivo or filename)
+
+if __name__ == '__main__':
+    # Obtener argumentos de la línea de comandos
+    args = leer_argumentos()
+    publicar = args.metricas or args.memoria or args.prometheus
+    if publicar:
+        metricas.activar(memoria=args.memoria, prometheus=args.prometheus)
+    else:
+        publicar = metricas.configurar()
+    if args.tiempos and not publicar:
+        metricas.activar()
+
+    if args.exportar_plotlyjs is not None:
+        print(exportar_plotlyjs(args.exportar_plotlyjs or args.plotlyjs))
+        sys.exit(0)
+    if args.exportar_referencias is not None:
+        for genero in (1, 2):
+            print(exportar_capa_referencia(genero, args.exportar_referencias or None))
+        sys.exit(0)
+
+    cache = cache_graficos.crear_cache(args.cache, args.cache_capacidad)
+    # -1 desactiva WebGL
+    webgl = leer_umbral_webgl() if args.webgl is None else args.webgl
+    webgl = None if webgl is not None and webgl < 0 else webgl
+
+    conexion = None
+    if args.sintetico:
+        # Paciente de sinteticos.py en una conexión en memoria, sin base de datos
+        import sinteticos
+        if args.sintetico not in sinteticos.PERFILES:
+            sys.exit(f"perfil sintético desconocido: {args.sintetico} (válidos: {', '.join(sinteticos.PERFILES)})")
+        conexion, args.cedula = sinteticos.conexion(args.sintetico)
+        print(f"paciente sintético {args.sintetico}: {args.cedula}", file=sys.stderr)
+
+    if args.perfil:
+        import perfilado
+        perfilado.perfilar(lambda: generar_y_escribir(args, cache, webgl, conexion), args.perfil, args.perfil_top)
+    else:
+        generar_y_escribir(args, cache, webgl, conexion)
+    if publicar:
+        metricas.publicar(metricas.tramos(), cedula=args.cedula, formato=args.formato)
+    if args.tiempos:
+        arranque.informe()
@@ -0,0 +1,148 @@
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+import clasificacion
+import curvas_de_crecimiento as curvas
+import ingesta
+
+# Extracción masiva de signos vitales
+# Lee peso, talla e IMC de todos los pacientes menores de 19 años con COPY ... TO STDOUT y
+# los entrega en bloques de tamaño fijo (consultas) como arreglos de NumPy con una posición
+# por medición, ya corregidos (talla en metros), filtrados por los umbrales y con su banda
+# de edad. La memoria queda acotada por el tamaño del bloque sin importar cuántas filas
+# tenga la tabla.
+# Uso:
+#   python extraccion.py                          -> resumen por indicador y banda de edad
+#   python extraccion.py --salida poblacion/      -> además un .npz por bloque
+
+TAMANO_BLOQUE = 100000
+
+# Una fila por consulta con las mismas columnas de signos que curvas_de_crecimiento.py
+# (el último guardado si un signo se repite), se pasan a una medición por signo en NumPy
+consulta_copia = f"""
+    COPY (
+        SELECT mc."FK_paciente",
+            CASE WHEN sud."FK_sexo" = 2 THEN 2 ELSE 1 END,
+            mc."con_fecha"::date - sud."usd_fecha_nacimiento"::date,{curvas.SIGNOS_POR_CONSULTA}
+        FROM seg_usuario_detalles sud
+        JOIN med_consultas mc ON mc."FK_paciente" = sud."PK_identificacion"
+        JOIN med_consulta_signos_vitales mcsv ON mcsv."PK_consulta" = mc."PK_consulta"
+        WHERE sud."usd_fecha_nacimiento" >= current_date - interval '19 years'
+        AND mcsv."FK_signo_vital" IN (3, 5, 7)
+        GROUP BY mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mc."con_fecha", sud."usd_fecha_nacimiento"
+    ) TO STDOUT
+"""
+
+# Columnas numéricas de cada línea del COPY (formato texto, separado por tabuladores):
+# sexo, días y un valor por signo de ingesta.SIGNOS_CONSULTA. La primera es la cédula
+COLUMNAS_NUMERICAS = tuple(range(1, 3 + len(ingesta.SIGNOS_CONSULTA)))
+
+
+def procesar_bloque(lineas):
+    # La cédula queda como texto del ancho que haga falta. sigv_resultado es texto libre:
+    # un valor que no es un número queda NaN y lo descarta mascara_plausible, sin abortar
+    # el bloque. \N es un signo que la consulta no tiene y no cuenta como leído
+    pacientes = np.array([linea.split('\t', 1)[0] for linea in lineas])
+    numeros = np.genfromtxt(lineas, delimiter='\t', dtype=float, usecols=COLUMNAS_NUMERICAS,
+                            missing_values='\\N', usemask=True, comments=None, ndmin=2)
+    por_consulta = len(ingesta.SIGNOS_CONSULTA)
+    presentes = ~np.ma.getmaskarray(numeros[:, 2:]).reshape(-1)
+    filas = np.repeat(np.arange(len(lineas)), por_consulta)[presentes]
+    signos = np.tile(np.array(ingesta.SIGNOS_CONSULTA, dtype=np.int8), len(lineas))[presentes]
+    valores = ingesta.corregir_unidades(signos, numeros[:, 2:].filled(np.nan).reshape(-1)[presentes])
+    dias = numeros[:, 1].filled(np.nan)[filas]
+
+    mascara = ingesta.mascara_plausible(signos, valores) & ~np.isnan(dias)
+    filas, signos, dias = filas[mascara], signos[mascara], dias[mascara].astype(np.int32)
+    meses = ingesta.dias_a_meses(dias)
+    return {
+        'paciente': pacientes[filas],
+        'sexo': numeros[:, 0].filled(1).astype(np.int8)[filas],
+        'dias': dias,
+        'meses': meses,
+        'signo': signos,
+        'valor': valores[mascara],
+        'banda': ingesta.bandas_edad(signos, meses),
+        'leidas': int(presentes.sum()),
+    }
+
+def extraer_bloques(conn, tamano_bloque=TAMANO_BLOQUE):
+    # copy_expert escribe en un archivo, se le da el extremo de escritura de una tubería y
+    # este generador lee del otro extremo de a tamano_bloque líneas. Si se deja de iterar
+    # antes del final, el COPY se interrumpe y la conexión debe descartarse.
+    lector_fd, escritor_fd = os.pipe()
+    errores = []
+
+    def copiar():
+        cursor = conn.cursor()
+        try:
+            with os.fdopen(escritor_fd, 'wb') as escritor:
+                cursor.copy_expert(consulta_copia, escritor)
+        except BaseException as error:
+            errores.append(error)
+        finally:
+            cursor.close()
+
+    hilo = threading.Thread(target=copiar, daemon=True)
+    hilo.start()
+    try:
+        with os.fdopen(lector_fd, 'r', encoding='utf-8', newline='\n', buffering=1 << 20) as lector:
+            while True:
+                lineas = list(itertools.islice(lector, tamano_bloque))
+                if not lineas:
+                    break
+                yield procesar_bloque(lineas)
+    finally:
+        hilo.join()
+    if errores:
+        raise errores[0]
+
+
+def resumir(bloques, salida=None):
+    # Cuenta mediciones por indicador y banda de edad, y opcionalmente guarda cada bloque
+    if salida:
+        os.makedirs(salida, exist_ok=True)
+    conteos = {}
+    leidas = validas = 0
+    for numero, bloque in enumerate(bloques, 1):
+        leidas += bloque['leidas']
+        validas += len(bloque['valor'])
+        for signo, indicador in ingesta.INDICADORES.items():
+            bandas = bloque['banda'][bloque['signo'] == signo]
+            conteo = np.bincount(bandas, minlength=len(clasificacion.RANGOS[indicador]) + 1)
+            conteos[indicador] = conteos.get(indicador, 0) + conteo
+        if salida:
+            arreglos = {clave: valor for clave, valor in bloque.items() if clave != 'leidas'}
+            np.savez(os.path.join(salida, f"bloque_{numero:05d}.npz"), **arreglos)
+    return leidas, validas, conteos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extracción masiva de signos vitales con COPY')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE, help='Consultas por bloque')
+    parser.add_argument('--salida', metavar='DIRECTORIO', help='Guarda cada bloque como .npz')
+    args = parser.parse_args(argv)
+
+    conn = curvas.conectar()
+    inicio = time.perf_counter()
+    try:
+        leidas, validas, conteos = resumir(extraer_bloques(conn, args.tamano_bloque), args.salida)
+    finally:
+        conn.close()
+    duracion = time.perf_counter() - inicio
+
+    print(f"{leidas} mediciones leídas, {validas} dentro de los umbrales, {duracion:.2f} s "
+          f"({leidas / duracion if duracion else 0:.0f} mediciones/s)", file=sys.stderr)
+    for indicador, conteo in conteos.items():
+        rangos = [rango for rango, _, _ in clasificacion.RANGOS[indicador]] + ['fuera']
+        print(indicador + ': ' + ', '.join(f"{rango}={int(n)}" for rango, n in zip(rangos, conteo)))
+
+
+if __name__ == '__main__':
+    main()
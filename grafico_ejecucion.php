@@ -12,32 +12,65 @@
         body {
             padding-top: 20px;
         }
+
+        .grafico {
+            width: 100%;
+            height: 700px;
+            overflow: auto;
+        }
     </style>
 </head>
 
 <body>
     <?php
-    $filename = 'grafico_curvas_plotly.html';
     if ($_SERVER['REQUEST_METHOD'] === 'POST') {
         // Recuperar la cédula del formulario
         $cedula = isset($_POST['cedula']) ? $_POST['cedula'] : '';
     }
 
-    // Ejecutar el script de Python al cargar la página
-    //exec("python curvas_de_crecimiento.py $cedula", $output, $return_var);
-    exec(".\\venv\\Scripts\\python.exe curvas_de_crecimiento.py $cedula", $output, $return_var);
+    // Primero se consulta al servicio de gráficos (servicio_graficos.py), que mantiene todo cargado en memoria
+    // Se piden solo los puntos del paciente (JSON). Las curvas de referencia de cada sexo están en
+    // js/referencias y plotly.js en js/plotly.min.js, el navegador los descarga una vez y los guarda
+    // en caché (se generan con --exportar-referencias y --exportar-plotlyjs)
+    $urlServicio = 'http://127.0.0.1:8050/grafico?formato=paciente&cedula=' . urlencode($cedula);
+    $contexto = stream_context_create(['http' => ['timeout' => 30, 'ignore_errors' => true]]);
+    $datosPaciente = @file_get_contents($urlServicio, false, $contexto);
+    $graficoOk = $datosPaciente !== false && isset($http_response_header) && strpos($http_response_header[0], '200') !== false;
+
+    if (!$graficoOk) {
+        // Si el servicio no está disponible se ejecuta el script de Python como antes
+        // Con --unico cada ejecución escribe su propio archivo e imprime la ruta, así dos
+        // consultas simultáneas nunca leen el gráfico de otro paciente
+        //exec("python curvas_de_crecimiento.py --formato paciente --unico " . escapeshellarg($cedula), $output, $return_var);
+        exec(".\\venv\\Scripts\\python.exe curvas_de_crecimiento.py --formato paciente --unico " . escapeshellarg($cedula), $output, $return_var);
 
-    // Verificar si la ejecución fue exitosa
-    if ($return_var === 0) {
-        // Obtener el contenido HTML renderizado
-        $htmlContent = file_get_contents($filename);
+        // Verificar si la ejecución fue exitosa
+        if ($return_var === 0 && !empty($output)) {
+            // Obtener los datos del paciente y borrar el archivo temporal
+            $archivoGrafico = trim(end($output));
+            $datosPaciente = file_get_contents($archivoGrafico);
+            unlink($archivoGrafico);
+            $graficoOk = $datosPaciente !== false;
+        }
+    }
 
-        // Mostrar el contenido HTML dentro de un iframe
-        echo '<iframe srcdoc="' . htmlspecialchars($htmlContent) . '" width="100%" height="700px"></iframe>';
+    if ($graficoOk) {
+        // El navegador dibuja la capa de referencia del sexo y le superpone los puntos del paciente
+        echo '<div class="grafico"><div id="grafico"></div></div>';
+        echo '<script src="js/plotly.min.js"></script>';
+        echo '<script>const datosPaciente = ' . $datosPaciente . ';</script>';
     } else {
         echo 'Error al ejecutar el script de Python.';
     }
     ?>
+    <?php if ($graficoOk) : ?>
+    <script>
+        fetch('js/referencias/' + datosPaciente.referencia)
+            .then(respuesta => respuesta.json())
+            .then(referencia => Plotly.newPlot('grafico', referencia.data.concat(datosPaciente.data),
+                                               referencia.layout, {displayModeBar: false}));
+    </script>
+    <?php endif; ?>
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js" integrity="sha384-C6RzsynM9kWDrMNeT87bh95OGNyZPhcTNXj1NW7RuBCsyN/o0jlpcV8Qyq46cDfL" crossorigin="anonymous"></script>
 </body>
 
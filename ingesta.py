@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import clasificacion
+
+# Ingesta columnar de signos vitales
+# Las mediciones llegan como arreglos paralelos (edad en días, signo vital, valor) y se
+# corrigen, filtran y asignan a su banda de edad con operaciones vectoriales, sin recorrer
+# las filas en Python.
+
+# Signos vitales que se grafican, con su código en med_consulta_signos_vitales
+INDICADORES = {3: "peso", 5: "talla", 7: "imc"}
+CODIGOS = {indicador: codigo for codigo, indicador in INDICADORES.items()}
+
+# Control de pesos
+umbral_peso_superior = 60
+umbral_peso_inferior = 1
+umbral_talla_superior = 200
+umbral_talla_inferior = 40
+umbral_imc_inferior = 9
+umbral_imc_superior = 40
+
+UMBRALES = {
+    3: (umbral_peso_inferior, umbral_peso_superior),
+    5: (umbral_talla_inferior, umbral_talla_superior),
+    7: (umbral_imc_inferior, umbral_imc_superior),
+}
+
+# Constante de días calculada visualmente, en 1 día hay 65/1988 meses
+MESES_POR_DIA = 65 / 1988
+
+# Orden de los signos vitales en las columnas de la consulta (una fila por consulta)
+SIGNOS_CONSULTA = (3, 5, 7)
+
+# Paneles del gráfico por indicador: (rango, límite superior en meses). Cada panel
+# incluye su límite superior y el primero también las edades menores
+PANELES = {
+    'peso': (('0_6', 6), ('6_24', 24), ('24_60', 60), ('5_10a', 120)),
+    'talla': (('0_6', 6), ('6_24', 24), ('24_60', 60), ('5_19a', 228)),
+    'imc': (('0_5', 60), ('5_19', 228)),
+}
+
+
+def dias_a_meses(dias):
+    return np.asarray(dias) * MESES_POR_DIA
+
+def corregir_unidades(signos, valores):
+    # Si la talla es menor que 3, asumimos que está en metros y se pasa a centímetros
+    metros = (signos == CODIGOS["talla"]) & (valores < 3)
+    return np.where(metros, np.round(valores * 100, 2), valores)
+
+def mascara_plausible(signos, valores):
+    # Valores dentro de los umbrales de su indicador, el resto se descarta
+    mascara = np.zeros(valores.shape, dtype=bool)
+    for signo, (minimo, maximo) in UMBRALES.items():
+        mascara |= (signos == signo) & (minimo <= valores) & (valores <= maximo)
+    return mascara
+
+def bandas_edad(signos, meses):
+    # Índice de la banda de clasificacion.RANGOS de cada medición, una pasada por indicador
+    bandas = np.full(meses.shape, -1, dtype=np.int8)
+    for signo, indicador in INDICADORES.items():
+        mascara = signos == signo
+        if mascara.any():
+            bandas[mascara] = clasificacion.banda_edad(indicador, meses[mascara])
+    return bandas
+
+def genero_resultados(resultados, genero=1):
+    # El sexo de la última fila, 2 es mujer y cualquier otro valor hombre
+    if not resultados:
+        return genero
+    return 2 if resultados[-1][2] == 2 else 1
+
+def ingerir(resultados, genero=1):
+    # Del resultado de la consulta a arreglos con una posición por medición válida:
+    # fecha de la consulta, edad en días y meses, signo vital y valor corregido
+    n = len(resultados)
+    columnas = list(zip(*resultados)) if n else [()] * (5 + len(SIGNOS_CONSULTA))
+    fechas = np.empty(n, dtype=object)
+    fechas[:] = columnas[3]
+    dias = (np.array(columnas[3], dtype='datetime64[D]') - np.array(columnas[4], dtype='datetime64[D]')).astype(np.int64)
+
+    # Cada consulta aporta una medición por signo vital, las vacías se descartan
+    valores = np.array(columnas[5:], dtype=object).T.reshape(-1)
+    presentes = np.not_equal(valores, None)
+    signos = np.tile(np.array(SIGNOS_CONSULTA, dtype=np.int8), n)[presentes]
+    valores = corregir_unidades(signos, valores[presentes].astype(float))
+    dias = np.repeat(dias, len(SIGNOS_CONSULTA))[presentes]
+    fechas = np.repeat(fechas, len(SIGNOS_CONSULTA))[presentes]
+
+    validas = mascara_plausible(signos, valores)
+    signos, valores, dias, fechas = signos[validas], valores[validas], dias[validas], fechas[validas]
+    meses = dias * MESES_POR_DIA
+
+    # Panel de cada medición, len(PANELES[indicador]) si queda fuera de todos
+    paneles = np.full(signos.shape, -1, dtype=np.int8)
+    for indicador, rangos in PANELES.items():
+        mascara = signos == CODIGOS[indicador]
+        paneles[mascara] = np.searchsorted([limite for _, limite in rangos], meses[mascara], side='left')
+
+    # Fecha de nacimiento de la última fila, para la edad actual
+    nacimiento = np.datetime64(resultados[-1][4], 'D') if n else None
+
+    return SimpleNamespace(genero=genero_resultados(resultados, genero), fechas=fechas, dias=dias,
+                           meses=meses, signos=signos, valores=valores, paneles=paneles, nacimiento=nacimiento)
+
+def indicador(mediciones, nombre):
+    # Meses, valores, fechas y días de todas las mediciones válidas de un indicador. Los
+    # días enteros indexan la rejilla diaria sin redondear los meses (ver rejilla.py)
+    mascara = mediciones.signos == CODIGOS[nombre]
+    return mediciones.meses[mascara], mediciones.valores[mascara], mediciones.fechas[mascara], mediciones.dias[mascara]
+
+def panel(mediciones, nombre, rango):
+    # Meses, valores, fechas y días de las mediciones que caen en un panel del gráfico
+    indice = [r for r, _ in PANELES[nombre]].index(rango)
+    mascara = (mediciones.signos == CODIGOS[nombre]) & (mediciones.paneles == indice)
+    return mediciones.meses[mascara], mediciones.valores[mascara], mediciones.fechas[mascara], mediciones.dias[mascara]
+
+def panel_de_edad(nombre, meses):
+    # Rango del panel que contiene una edad, None si queda fuera de todos
+    rangos = PANELES[nombre]
+    indice = int(np.searchsorted([limite for _, limite in rangos], meses, side='left'))
+    return rangos[indice][0] if indice < len(rangos) else None
+
+def edad_actual_meses(mediciones, hoy=None):
+    if mediciones.nacimiento is None:
+        return None
+    hoy = np.datetime64(hoy or 'today', 'D')
+    return float((hoy - mediciones.nacimiento).astype(np.int64) * MESES_POR_DIA)
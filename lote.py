@@ -0,0 +1,232 @@
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import arranque
+import base_datos
+import clasificacion
+import curvas_de_crecimiento as curvas
+import ingesta
+
+# Con matplotlib, solo se importa en los modos png y pdf (sus FORMATOS_ESTATICOS)
+reporte_estatico = arranque.ModuloDiferido('reporte_estatico')
+MODOS_ESTATICOS = ('png', 'pdf')
+
+# Modo por lotes
+# Genera los gráficos (o solo los puntajes) de muchas cédulas en una sola ejecución.
+# Los signos vitales se consultan por bloques con = ANY(%s) y el trabajo se reparte en
+# un ProcessPoolExecutor. En modo grafico los HTML usan un plotly.min.js escrito una vez
+# en el directorio de salida. Un paciente que falla se informa en stderr y el lote sigue,
+# el código de salida es 1 si alguno falló.
+# Uso:
+#   python lote.py --archivo cedulas.txt --salida graficos/
+#   python lote.py --archivo cedulas.txt --modo pdf --salida reportes/
+#   cat cedulas.txt | python lote.py --modo puntaje --salida puntajes.csv
+#   python lote.py --filtro-sql "sud.\"FK_clinica\" = 3" --procesos 8
+
+# Misma consulta que curvas_de_crecimiento.consulta_sql pero para un conjunto de pacientes,
+# con las mismas columnas de signos (el último guardado si un signo se repite)
+consulta_sql_lote = f"""
+    SELECT mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mc."con_fecha", sud."usd_fecha_nacimiento",{curvas.SIGNOS_POR_CONSULTA}
+    FROM seg_usuario_detalles sud
+    JOIN med_consultas mc ON mc."FK_paciente" = sud."PK_identificacion"
+    JOIN med_consulta_signos_vitales mcsv ON mcsv."PK_consulta" = mc."PK_consulta"
+    WHERE sud."PK_identificacion" = ANY(%s)
+    AND sud."usd_fecha_nacimiento" >= current_date - interval '19 years'
+    AND mcsv."FK_signo_vital" IN (3, 5, 7)
+    GROUP BY mc."PK_consulta", mc."FK_paciente", sud."FK_sexo", mc."con_fecha", sud."usd_fecha_nacimiento"
+    ORDER BY mc."FK_paciente", mc."con_fecha";
+"""
+base_datos.registrar_sentencia('signos_vitales_lote', consulta_sql_lote)
+
+# El filtro lo escribe quien ejecuta el lote (no viene de la web), se inserta tal cual
+consulta_sql_cedulas = """
+    SELECT DISTINCT sud."PK_identificacion"
+    FROM seg_usuario_detalles sud
+    JOIN med_consultas mc ON mc."FK_paciente" = sud."PK_identificacion"
+    WHERE sud."usd_fecha_nacimiento" >= current_date - interval '19 years'
+    AND ({filtro})
+    ORDER BY sud."PK_identificacion";
+"""
+
+# Tamaño de bloque por defecto: cédulas por consulta
+TAMANO_BLOQUE = 500
+
+
+def leer_cedulas(archivo):
+    # Sin repetidas y en el orden del archivo
+    cedulas = (linea.strip() for linea in archivo)
+    return list(dict.fromkeys(cedula for cedula in cedulas if cedula and not cedula.startswith('#')))
+
+def consultar_cedulas(conn, filtro):
+    cursor = conn.cursor()
+    try:
+        # Sin parámetros psycopg2 no interpreta los % del filtro
+        cursor.execute(consulta_sql_cedulas.format(filtro=filtro))
+        return [str(fila[0]) for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def consultar_signos_vitales_lote(conn, cedulas):
+    cursor = conn.cursor()
+    try:
+        base_datos.ejecutar(cursor, 'signos_vitales_lote', consulta_sql_lote, (list(cedulas),))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def agrupar_por_paciente(cedulas, filas):
+    # Las filas vienen ordenadas por paciente y fecha, se conserva ese orden en cada lista
+    por_paciente = {cedula: [] for cedula in cedulas}
+    for fila in filas:
+        por_paciente.setdefault(str(fila[1]), []).append(fila)
+    return por_paciente
+
+
+def nombre_archivo(cedula, extension='html'):
+    return re.sub(r'[^\w-]', '_', cedula) + '.' + extension
+
+def renderizar_paciente(trabajo):
+    # plotly.min.js no se incrusta: lo usan todos los gráficos desde el mismo directorio
+    cedula, resultados, directorio = trabajo
+    fig = curvas.construir_figura(resultados)
+    ruta = os.path.join(directorio, nombre_archivo(cedula))
+    curvas.pio.write_html(fig, file=ruta, auto_open=False, include_plotlyjs='directory',
+                          config={'displayModeBar': False})
+    return [(cedula, ruta)]
+
+def exportar_paciente(formato, trabajo):
+    # PNG o PDF con matplotlib, cada proceso reutiliza sus plantillas con las referencias
+    cedula, resultados, directorio = trabajo
+    ruta = os.path.join(directorio, nombre_archivo(cedula, formato))
+    return [(cedula, reporte_estatico.exportar(resultados, ruta, formato, cedula))]
+
+def puntuar_paciente(trabajo):
+    # Solo clasifica, sin construir la figura: una fila por medición válida
+    cedula, resultados, _ = trabajo
+    if not resultados:
+        return []
+    mediciones = ingesta.ingerir(resultados)
+    ref = curvas.cargar_referencias(mediciones.genero)
+
+    filas = []
+    for indicador in ingesta.CODIGOS:
+        meses, valores, fechas, dias = ingesta.indicador(mediciones, indicador)
+        estados, puntajes = clasificacion.clasificar(ref, indicador, meses, valores, dias=dias)
+        nombres = clasificacion.nombres_estado(indicador, estados)
+        for fecha, mes, valor, estado, puntaje in zip(fechas, meses.tolist(), valores.tolist(), nombres, puntajes.tolist()):
+            filas.append((cedula, fecha.isoformat(), indicador, valor, round(mes, 2), estado, round(puntaje, 3)))
+    return filas
+
+def precargar_referencias():
+    # Inicializador de cada proceso: las referencias quedan cargadas antes del primer paciente
+    curvas.cargar_referencias(1)
+    curvas.cargar_referencias(2)
+
+
+def informar_error(cedula, error, errores):
+    # El lote sigue con los demás pacientes, al final se informa cuántos fallaron
+    errores.append(cedula)
+    print(f"{cedula}: {type(error).__name__}: {error}", file=sys.stderr)
+
+def filas_de(futuros, errores):
+    for cedula, futuro in futuros:
+        try:
+            yield from futuro.result()
+        except Exception as error:
+            informar_error(cedula, error, errores)
+
+def ejecutar_lote(conn, cedulas, modo='grafico', salida=None, procesos=None, tamano_bloque=TAMANO_BLOQUE,
+                  errores=None):
+    # Los pacientes que fallan (datos inválidos, error al dibujar) o los bloques cuya consulta
+    # falla se agregan a errores y se informan en stderr, sin detener el lote
+    errores = [] if errores is None else errores
+    if modo in MODOS_ESTATICOS:
+        funcion = partial(exportar_paciente, modo)
+    else:
+        funcion = renderizar_paciente if modo == 'grafico' else puntuar_paciente
+    directorio = salida or '.'
+    if modo != 'puntaje':
+        os.makedirs(directorio, exist_ok=True)
+    if modo == 'grafico' and not os.path.exists(os.path.join(directorio, 'plotly.min.js')):
+        # Una sola copia para todo el lote, antes de que los procesos escriban gráficos
+        curvas.exportar_plotlyjs(os.path.join(directorio, 'plotly.min.js'))
+
+    bloques = [cedulas[i:i + tamano_bloque] for i in range(0, len(cedulas), tamano_bloque)]
+    with ProcessPoolExecutor(max_workers=procesos, initializer=precargar_referencias) as executor:
+        pendientes = []
+        for bloque in bloques:
+            try:
+                por_paciente = agrupar_por_paciente(bloque, consultar_signos_vitales_lote(conn, bloque))
+            except Exception as error:
+                for cedula in bloque:
+                    informar_error(cedula, error, errores)
+                continue
+            # Mientras los procesos trabajan en este bloque se consulta el siguiente
+            futuros = [(cedula, executor.submit(funcion, (cedula, resultados, directorio)))
+                       for cedula, resultados in por_paciente.items()]
+            yield from filas_de(pendientes, errores)
+            pendientes = futuros
+        yield from filas_de(pendientes, errores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Curvas de crecimiento por lotes')
+    origen = parser.add_mutually_exclusive_group()
+    origen.add_argument('--archivo', help='Archivo con una cédula por línea (por defecto stdin)')
+    origen.add_argument('--filtro-sql', help='Condición SQL sobre sud/mc para elegir los pacientes')
+    parser.add_argument('--modo', choices=('grafico', 'puntaje') + MODOS_ESTATICOS, default='grafico',
+                        help='grafico (HTML), puntaje (CSV), png o pdf (reporte estático)')
+    parser.add_argument('--salida', help='Directorio de los gráficos y reportes o archivo CSV de puntajes')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos del pool (por defecto, núcleos)')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args(argv)
+
+    # El lote usa una sola conexión a la vez, el pool aporta el timeout y la sentencia preparada
+    pool = base_datos.crear_pool(curvas.leer_configuracion(), maximo=1)
+    try:
+        with pool.conexion() as conn:
+            errores = procesar(conn, args)
+    finally:
+        pool.cerrar()
+    if errores:
+        sys.exit(1)
+
+
+def procesar(conn, args):
+    if args.filtro_sql:
+        cedulas = consultar_cedulas(conn, args.filtro_sql)
+    elif args.archivo:
+        with open(args.archivo, encoding='utf-8') as archivo:
+            cedulas = leer_cedulas(archivo)
+    else:
+        cedulas = leer_cedulas(sys.stdin)
+
+    # ejecutar_lote es un generador, el tiempo se mide aquí donde se consume entero
+    inicio = time.perf_counter()
+    errores = []
+    filas = ejecutar_lote(conn, cedulas, args.modo, args.salida, args.procesos, args.tamano_bloque, errores)
+    if args.modo != 'puntaje':
+        for _ in filas:
+            pass
+    else:
+        archivo = open(args.salida, 'w', newline='', encoding='utf-8') if args.salida else sys.stdout
+        try:
+            escritor = csv.writer(archivo)
+            escritor.writerow(('cedula', 'fecha', 'indicador', 'valor', 'meses', 'estado', 'puntaje_z'))
+            escritor.writerows(filas)
+        finally:
+            if archivo is not sys.stdout:
+                archivo.close()
+    duracion = time.perf_counter() - inicio
+    print(f"{len(cedulas)} pacientes en {duracion:.2f} s ({len(cedulas) / duracion if duracion else 0:.1f} pacientes/s)"
+          f", {len(errores)} con errores", file=sys.stderr)
+    return errores
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+-- Índices para la consulta de signos vitales de curvas_de_crecimiento.py y lote.py
+-- Las consultas de un paciente recorren med_consultas por "FK_paciente" ordenadas por
+-- fecha, y de cada consulta solo leen los signos 3, 5 y 7.
+-- CONCURRENTLY no bloquea las escrituras de la aplicación mientras se construyen, pero no
+-- puede ejecutarse dentro de una transacción: aplicar con
+--   psql -d <base> -f migraciones/001_indices_signos_vitales.sql
+-- sin --single-transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS med_consultas_paciente_fecha_idx
+    ON med_consultas ("FK_paciente", con_fecha);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS med_consulta_signos_vitales_consulta_signo_idx
+    ON med_consulta_signos_vitales ("PK_consulta", "FK_signo_vital");
+
+ANALYZE med_consultas;
+ANALYZE med_consulta_signos_vitales;
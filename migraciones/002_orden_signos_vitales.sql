@@ -0,0 +1,15 @@
+-- Orden de registro de los signos vitales
+-- Una consulta puede tener el mismo signo guardado más de una vez (una corrección). Las
+-- consultas de curvas_de_crecimiento.py, lote.py y extraccion.py usan el último guardado y
+-- para saber cuál es hace falta una columna que crezca con cada fila nueva: la posición
+-- física (ctid) no sirve, un UPDATE, un VACUUM que libera espacio o una reescritura de la
+-- tabla dejan filas nuevas en posiciones anteriores.
+-- Las filas que ya existen se numeran en el orden en que se recorre la tabla al agregar la
+-- columna, entre los duplicados ya guardados el elegido es arbitrario. Las filas nuevas
+-- siempre quedan después.
+-- Agregar la columna reescribe la tabla con un bloqueo exclusivo: aplicar en una ventana
+-- de mantenimiento y antes de desplegar las consultas que la usan:
+--   psql -d <base> -f migraciones/002_orden_signos_vitales.sql
+
+ALTER TABLE med_consulta_signos_vitales
+    ADD COLUMN IF NOT EXISTS "sigv_registro" bigint GENERATED BY DEFAULT AS IDENTITY;
@@ -0,0 +1,97 @@
+import cProfile
+import os
+import pstats
+import sys
+from collections import Counter
+
+# Perfil de un gráfico
+# curvas_de_crecimiento.py --perfil PREFIJO ejecuta el gráfico completo de una cédula
+# (conexión, consulta, figura, renderizado y escritura) bajo cProfile y escribe:
+#   PREFIJO.pstats     para pstats, snakeviz o gprof2dot
+#   PREFIJO.collapsed  pilas colapsadas ("a;b;c microsegundos") para flamegraph.pl,
+#                      speedscope o inferno
+# e imprime en stderr las funciones con más tiempo propio. Con --sintetico PERFIL no hace
+# falta la base de datos, el paciente sale de sinteticos.py.
+# cProfile solo guarda quién llama a quién, no las pilas completas: el tiempo de una función
+# llamada desde varios lugares se reparte entre ellos en proporción a lo que cada uno le
+# dedicó, como hacen flameprof y gprof2dot.
+# Las llamadas que no llegan a FRACCION_MINIMA del tiempo total no se abren en sus propias
+# pilas, su tiempo se suma al de quien las llama: el total se conserva y un gráfico de
+# plotly no produce decenas de miles de pilas de pocos microsegundos.
+# Uso:
+#   python curvas_de_crecimiento.py 1234567890 --perfil perfiles/lento
+#   python curvas_de_crecimiento.py --sintetico adolescente --perfil /tmp/adolescente --perfil-top 40
+#   flamegraph.pl perfiles/lento.collapsed > lento.svg
+
+TOP = 25
+# Fracción del tiempo total por debajo de la cual una llamada no se abre, como el
+# --minwidth de flamegraph.pl
+FRACCION_MINIMA = 0.0005
+
+
+def nombre_funcion(funcion):
+    # (archivo, línea, nombre) de pstats, los built-in tienen archivo '~'
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        texto = nombre
+    else:
+        texto = f"{os.path.basename(archivo)}:{nombre}:{linea}"
+    return texto.replace(';', ',')
+
+
+def pilas_colapsadas(estadisticas, fraccion_minima=FRACCION_MINIMA):
+    # pila -> microsegundos de tiempo propio, recorriendo el grafo de llamadas desde las
+    # funciones sin llamador. Las pilas iguales se suman en un Counter antes de escribir
+    datos = estadisticas.stats
+    llamadas = {}
+    for funcion, (_, _, _, _, llamadores) in datos.items():
+        for llamador, arista in llamadores.items():
+            llamadas.setdefault(llamador, []).append((funcion, arista[3]))
+
+    nombres = {funcion: nombre_funcion(funcion) for funcion in datos}
+    raices = [funcion for funcion, valores in datos.items() if not valores[4]]
+    minimo = fraccion_minima * sum(datos[funcion][3] for funcion in raices)
+    pilas = Counter()
+    # Recorrido en profundidad con una pila explícita, las de plotly superan el límite de recursión
+    pendientes = [((funcion,), nombres[funcion], datos[funcion][3]) for funcion in raices]
+    while pendientes:
+        camino, clave, acumulado = pendientes.pop()
+        funcion = camino[-1]
+        total = datos[funcion][3]
+        proporcion = acumulado / total if total else 0.0
+        propio = datos[funcion][2] * proporcion
+        for llamada, tiempo in llamadas.get(funcion, ()):
+            # Las llamadas recursivas ya están contadas en el tiempo de la función
+            if llamada in camino:
+                continue
+            if tiempo * proporcion < minimo:
+                propio += tiempo * proporcion
+                continue
+            pendientes.append((camino + (llamada,), clave + ';' + nombres[llamada], tiempo * proporcion))
+        pilas[clave] += propio * 1e6
+    return pilas
+
+def escribir_colapsadas(estadisticas, ruta, fraccion_minima=FRACCION_MINIMA):
+    pilas = pilas_colapsadas(estadisticas, fraccion_minima)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        for pila, microsegundos in sorted(pilas.items()):
+            if round(microsegundos):
+                archivo.write(f"{pila} {round(microsegundos)}\n")
+    return ruta
+
+
+def perfilar(funcion, prefijo, top=TOP, archivo=None):
+    # Ejecuta funcion() bajo cProfile, escribe PREFIJO.pstats y PREFIJO.collapsed aunque
+    # falle y devuelve lo que devuelva funcion
+    archivo = archivo or sys.stderr
+    directorio = os.path.dirname(os.path.abspath(prefijo))
+    os.makedirs(directorio, exist_ok=True)
+    perfil = cProfile.Profile()
+    try:
+        return perfil.runcall(funcion)
+    finally:
+        estadisticas = pstats.Stats(perfil, stream=archivo)
+        estadisticas.dump_stats(prefijo + '.pstats')
+        escribir_colapsadas(estadisticas, prefijo + '.collapsed')
+        estadisticas.sort_stats('tottime').print_stats(top)
+        print(f"perfil: {prefijo}.pstats {prefijo}.collapsed", file=archivo)
@@ -0,0 +1,358 @@
+import argparse
+import configparser
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+import zipfile
+from types import SimpleNamespace
+
+import numpy as np
+
+# Tablas de referencia compiladas
+# Las tablas de la OMS en datos/*.json se compilan una vez en un archivo binario por sexo
+# (datos/compilado/referencias_<sexo>.v<N>.npz) con los nodos, los coeficientes PCHIP
+# y las curvas ya evaluadas. El archivo se abre con mmap sin copiar nada y solo se vuelve
+# a compilar cuando cambian los JSON de origen o cuando config.ini pide otra tolerancia.
+# Sin tolerancia en config.ini se respeta la del archivo compilado, así la que se eligió
+# con --tolerancia se conserva.
+# Las curvas no usan una cantidad fija de puntos: por cada tabla se eligen los menos puntos
+# con los que la línea dibujada queda a menos de la tolerancia de todas las curvas PCHIP.
+# Si el JSON trae los parámetros L, M y S de la OMS (columnas <indicador>_L, _M y _S) se
+# guardan también en sus nodos, para el puntaje z con la fórmula de Box-Cox
+# (clasificacion.puntaje_lms). No se despejan de las curvas: las columnas de desviación
+# están redondeadas y el L que se obtiene de ellas puede tener hasta el signo cambiado.
+# Uso: python referencias.py [--tolerancia 0.01]  -> compila ambos sexos e informa los puntos
+
+VERSION_FORMATO = 4
+DIRECTORIO_DATOS = 'datos'
+DIRECTORIO_COMPILADO = os.path.join(DIRECTORIO_DATOS, 'compilado')
+# Antes cada curva tenía 500 puntos, se conserva para comparar en el informe
+PUNTOS_CURVA = 500
+# Malla fina sobre la que se mide el error del muestreo
+PUNTOS_DENSOS = 4001
+# Error máximo entre la línea dibujada y la curva, en unidades del indicador (kg, cm, kg/m2)
+# config.ini, sección opcional:
+#   [referencias]
+#   tolerancia = 0.01
+# Sin ella se conserva la del archivo compilado, esta es la de la primera compilación
+TOLERANCIA_CURVA = 0.01
+# Los datos de cada arreglo dentro del npz quedan alineados a este número de bytes
+ALINEACION = 64
+
+# Sufijo del nombre del polinomio -> clave en el JSON
+# Las tablas de 0 a 5 años usan _max/_min, las de 5 a 19 años e IMC usan _mas/_menos
+CLAVES_0_5 = {'': '{}', '_mas2': '{}_max', '_menos2': '{}_min', '_mas3': '{}_max3', '_menos3': '{}_min3'}
+CLAVES_5_19 = {'': '{}', '_mas1': '{}_mas1', '_menos1': '{}_menos1', '_mas2': '{}_mas2',
+               '_menos2': '{}_menos2', '_mas3': '{}_mas3', '_menos3': '{}_menos3'}
+
+# Desviación estándar -> sufijo del nombre del polinomio
+SUFIJOS_DESVIACION = {-3: '_menos3', -2: '_menos2', -1: '_menos1', 0: '', 1: '_mas1', 2: '_mas2', 3: '_mas3'}
+
+# (nombre de las edades, archivo, edad mínima, edad máxima, indicadores, rango, claves)
+# Se debe escoger los valores límite dado que la siguiente curva comienza en el límite
+TABLAS = [
+    ('meses_0_6', '{base}.json', None, 6, ('peso', 'talla'), '0_6', CLAVES_0_5),
+    ('meses_6_24', '{base}.json', 6, 24, ('peso', 'talla'), '6_24', CLAVES_0_5),
+    ('meses_24_60', '{base}.json', 24, 60, ('peso', 'talla'), '24_60', CLAVES_0_5),
+    ('year_5_10', '{base}_peso_5_10.json', 5, 10, ('peso',), '5_10a', CLAVES_5_19),
+    ('year_5_19', '{base}_talla_5_19.json', 5, 19, ('talla',), '5_19a', CLAVES_5_19),
+    ('meses_imc_0_24', 'imc_{base}_0_5.json', None, 24, ('imc',), '0_24', CLAVES_5_19),
+    ('meses_imc_24_60', 'imc_{base}_0_5.json', 24, 60, ('imc',), '24_60', CLAVES_5_19),
+    ('meses_imc_5_19', 'imc_{base}_5_19.json', None, None, ('imc',), '5_19', CLAVES_5_19),
+]
+
+
+def nombre_base(genero):
+    return "datos_hombre" if genero == 1 else "datos_mujer"
+
+
+def filtrar_datos(datos_a_filtrar, edad_min, edad_max=None):
+    if edad_max is None:
+        return [dato for dato in datos_a_filtrar if dato["edad"] <= edad_min]
+    else:
+        return [dato for dato in datos_a_filtrar if edad_min <= dato["edad"] <= edad_max]
+
+def obtener_array_clave(datos_filtrados, clave):
+    return np.array([dato[clave] for dato in datos_filtrados])
+
+def interpolacion(x_values, y_values):
+    # scipy solo hace falta al compilar, importarlo cuesta más que cargar las tablas
+    from scipy.interpolate import PchipInterpolator
+    interp_func = PchipInterpolator(x_values, y_values)
+    return interp_func
+
+
+def lms_tabla(datos, indicador):
+    # (3, nodos) con L, M y S de la tabla, None si el JSON no los trae
+    if f"{indicador}_L" not in datos[0]:
+        return None
+    return np.vstack([obtener_array_clave(datos, f"{indicador}_{parametro}") for parametro in 'LMS'])
+
+
+class PolinomioTramos:
+    # Un PCHIP compilado: mismos coeficientes c (grado, tramo) y nodos x que el PPoly de
+    # scipy y misma evaluación, fuera de los nodos se extrapola con el primer o último tramo
+
+    def __init__(self, c, x):
+        self.c = c
+        self.x = x
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        tramo = np.clip(np.searchsorted(self.x, x, side='right') - 1, 0, len(self.x) - 2)
+        dx = x - self.x[tramo]
+        y = self.c[0, tramo]
+        for coeficientes in self.c[1:]:
+            y = y * dx + coeficientes[tramo]
+        return y
+
+
+def muestreo_adaptativo(polinomios, x_min, x_max, tolerancia=TOLERANCIA_CURVA):
+    # Douglas-Peucker con error vertical sobre una malla fina: se parte de los extremos y
+    # se agrega el punto de mayor error de cada tramo hasta que ninguna curva se aleje más
+    # que la tolerancia de la recta entre dos puntos elegidos
+    x = np.linspace(x_min, x_max, PUNTOS_DENSOS)
+    y = np.vstack([polinomio(x) for polinomio in polinomios])
+    elegidos = np.zeros(len(x), dtype=bool)
+    elegidos[[0, -1]] = True
+    tramos = [(0, len(x) - 1)]
+    while tramos:
+        inicio, fin = tramos.pop()
+        if fin - inicio < 2:
+            continue
+        t = (x[inicio + 1:fin] - x[inicio]) / (x[fin] - x[inicio])
+        recta = y[:, [inicio]] + t * (y[:, [fin]] - y[:, [inicio]])
+        error = np.abs(y[:, inicio + 1:fin] - recta).max(axis=0)
+        peor = int(error.argmax())
+        if error[peor] > tolerancia:
+            medio = inicio + 1 + peor
+            elegidos[medio] = True
+            tramos += [(inicio, medio), (medio, fin)]
+    return x[elegidos]
+
+
+def leer_tolerancia(ruta='config.ini'):
+    # None si config.ini no la fija
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    return config.getfloat('referencias', 'tolerancia', fallback=None)
+
+
+def archivos_origen(genero):
+    base = nombre_base(genero)
+    archivos = []
+    for _, archivo, *_ in TABLAS:
+        ruta = os.path.join(DIRECTORIO_DATOS, archivo.format(base=base))
+        if ruta not in archivos:
+            archivos.append(ruta)
+    return archivos
+
+def huella_archivos(archivos):
+    # Huella barata (tamaño y fecha de modificación) para saber si hay que recompilar
+    huella = []
+    for ruta in archivos:
+        estado = os.stat(ruta)
+        huella.append([os.path.basename(ruta), estado.st_size, estado.st_mtime_ns])
+    return huella
+
+def ruta_compilado(genero):
+    sexo = "hombre" if genero == 1 else "mujer"
+    return os.path.join(DIRECTORIO_COMPILADO, f"referencias_{sexo}.v{VERSION_FORMATO}.npz")
+
+
+def compilar(genero, tolerancia=None):
+    if tolerancia is None:
+        tolerancia = leer_tolerancia()
+    if tolerancia is None:
+        tolerancia = TOLERANCIA_CURVA
+    archivos = archivos_origen(genero)
+    contenido = {ruta: open(ruta, 'rb').read() for ruta in archivos}
+    sha = hashlib.sha256()
+    for ruta in archivos:
+        sha.update(contenido[ruta])
+    # Las curvas dependen también del formato y de la tolerancia, entran en la versión
+    sha.update(f"v{VERSION_FORMATO}|{tolerancia!r}".encode('utf-8'))
+
+    arreglos = {}
+    muestreo = []
+    for nombre_edad, archivo, edad_min, edad_max, indicadores, rango, claves in TABLAS:
+        datos = json.loads(contenido[os.path.join(DIRECTORIO_DATOS, archivo.format(base=nombre_base(genero)))])["datos"]
+        if edad_min is None and edad_max is not None:
+            datos = filtrar_datos(datos, edad_max)
+        elif edad_min is not None:
+            datos = filtrar_datos(datos, edad_min, edad_max)
+        edades = obtener_array_clave(datos, "edad").astype(np.float64)
+        polinomios = {}
+        for indicador in indicadores:
+            for sufijo, clave in claves.items():
+                nombre = f"{indicador}{sufijo}_{rango}"
+                polinomios[nombre] = interpolacion(edades, obtener_array_clave(datos, clave.format(indicador)))
+            lms = lms_tabla(datos, indicador)
+            if lms is not None:
+                arreglos[f"{indicador}_{rango}.lms"] = lms
+        # Una sola x por tabla, compartida por todas sus curvas (los rellenos las emparejan)
+        x_curva = muestreo_adaptativo(list(polinomios.values()), min(edades), max(edades), tolerancia)
+        arreglos[f"{nombre_edad}.nodos"] = edades
+        arreglos[f"{nombre_edad}.x_curva"] = x_curva
+        for nombre, polinomio in polinomios.items():
+            arreglos[f"{nombre}.coeficientes"] = np.ascontiguousarray(polinomio.c)
+            arreglos[f"{nombre}.curva"] = polinomio(x_curva)
+        muestreo.append({'tabla': nombre_edad, 'puntos': len(x_curva), 'curvas': len(polinomios)})
+
+    meta = {
+        'version_formato': VERSION_FORMATO,
+        'genero': genero,
+        'sha256': sha.hexdigest(),
+        'huella': huella_archivos(archivos),
+        'tolerancia': tolerancia,
+        'muestreo': muestreo,
+    }
+    arreglos['__meta__'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+    ruta = ruta_compilado(genero)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    # Se escribe en un temporal y se renombra para que otro proceso nunca lea un archivo a medias
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            escribir_npz_alineado(archivo, arreglos)
+        # mkstemp crea el archivo solo para el dueño, lo deben poder leer otros procesos
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.remove(temporal)
+        raise
+    return ruta
+
+
+def escribir_npz_alineado(archivo, arreglos):
+    # npz sin compresión donde los datos de cada arreglo quedan alineados, así se pueden
+    # usar directamente desde el mmap. Se rellena el campo "extra" de cada cabecera zip.
+    with zipfile.ZipFile(archivo, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for nombre, arreglo in arreglos.items():
+            cuerpo = _npy_bytes(arreglo)
+            info = zipfile.ZipInfo(nombre + '.npy', date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_STORED
+            # Cabecera local: 30 bytes + nombre + extra, luego la cabecera npy (múltiplo de 64)
+            inicio = archivo.tell() + 30 + len(info.filename.encode('utf-8')) + 4
+            relleno = -inicio % ALINEACION
+            info.extra = struct.pack('<HH', 0xCAFE, relleno) + b'\0' * relleno
+            zf.writestr(info, cuerpo)
+
+def _npy_bytes(arreglo):
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, np.ascontiguousarray(arreglo), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def abrir_npz(ruta):
+    # Devuelve vistas de solo lectura sobre un único mmap del archivo, sin copiar los datos
+    mapa = np.memmap(ruta, dtype=np.uint8, mode='r')
+    arreglos = {}
+    with zipfile.ZipFile(ruta) as zf:
+        for info in zf.infolist():
+            cabecera = mapa[info.header_offset:info.header_offset + 30].tobytes()
+            n_nombre, n_extra = struct.unpack('<HH', cabecera[26:30])
+            inicio = info.header_offset + 30 + n_nombre + n_extra
+            lector = _LectorMapa(mapa, inicio)
+            version = np.lib.format.read_magic(lector)
+            if version == (1, 0):
+                forma, fortran, dtype = np.lib.format.read_array_header_1_0(lector)
+            else:
+                forma, fortran, dtype = np.lib.format.read_array_header_2_0(lector)
+            cantidad = int(np.prod(forma)) * dtype.itemsize
+            datos = mapa[lector.posicion:lector.posicion + cantidad]
+            arreglos[info.filename[:-4]] = datos.view(dtype).reshape(forma, order='F' if fortran else 'C')
+    return arreglos
+
+class _LectorMapa:
+    # Objeto tipo archivo mínimo para que numpy lea la cabecera npy desde el mmap
+    def __init__(self, mapa, posicion):
+        self.mapa = mapa
+        self.posicion = posicion
+
+    def read(self, n):
+        datos = self.mapa[self.posicion:self.posicion + n].tobytes()
+        self.posicion += n
+        return datos
+
+
+def leer_meta(arreglos):
+    return json.loads(arreglos['__meta__'].tobytes().decode('utf-8'))
+
+def cargar_compilado(genero):
+    ruta = ruta_compilado(genero)
+    archivos = archivos_origen(genero)
+    hay_origen = all(os.path.exists(archivo) for archivo in archivos)
+    tolerancia = leer_tolerancia()
+    if os.path.exists(ruta):
+        arreglos = abrir_npz(ruta)
+        meta = leer_meta(arreglos)
+        # Sin los JSON (por ejemplo en un despliegue) se confía en el archivo compilado
+        if not hay_origen or (meta['huella'] == huella_archivos(archivos)
+                              and tolerancia in (None, meta['tolerancia'])):
+            return arreglos
+        # Si solo cambiaron los JSON se conserva la tolerancia con la que se compiló
+        if tolerancia is None:
+            tolerancia = meta['tolerancia']
+    compilar(genero, tolerancia)
+    return abrir_npz(ruta)
+
+
+def cargar(genero):
+    # Arma el espacio de nombres que usa curvas_de_crecimiento: nodos (meses_*, year_*),
+    # polinomios PCHIP (polinomio_*), curvas ya evaluadas (curvas) y sus x (x_curvas), y
+    # los nodos con L, M y S de cada tabla (lms_*, tiene_lms si están todas). En lms guarda
+    # clasificacion sus tablas LMS de cada indicador ya unidas
+    arreglos = cargar_compilado(genero)
+    ref = SimpleNamespace(version=leer_meta(arreglos)['sha256'], curvas={}, x_curvas={}, lms={}, tiene_lms=True)
+    for nombre_edad, _, _, _, indicadores, rango, claves in TABLAS:
+        nodos = arreglos[f"{nombre_edad}.nodos"]
+        setattr(ref, nombre_edad, nodos)
+        ref.x_curvas[nombre_edad] = arreglos[f"{nombre_edad}.x_curva"]
+        for indicador in indicadores:
+            if f"{indicador}_{rango}.lms" in arreglos:
+                setattr(ref, f"lms_{indicador}_{rango}", (nodos, arreglos[f"{indicador}_{rango}.lms"]))
+            else:
+                ref.tiene_lms = False
+            for sufijo in claves:
+                nombre = f"{indicador}{sufijo}_{rango}"
+                # PchipInterpolator es un PPoly, con los coeficientes se evalúa sin recalcular ni importar scipy
+                setattr(ref, f"polinomio_{nombre}", PolinomioTramos(arreglos[f"{nombre}.coeficientes"], nodos))
+                ref.curvas[nombre] = arreglos[f"{nombre}.curva"]
+    return ref
+
+
+def informe_muestreo(meta):
+    # Puntos por tabla frente a los 500 fijos, y bytes de las curvas (x + y en float64)
+    lineas = []
+    total = total_fijo = 0
+    for tabla in meta['muestreo']:
+        bytes_tabla = 8 * tabla['puntos'] * (tabla['curvas'] + 1)
+        bytes_fijo = 8 * PUNTOS_CURVA * (tabla['curvas'] + 1)
+        total += bytes_tabla
+        total_fijo += bytes_fijo
+        lineas.append(f"  {tabla['tabla']}: {tabla['puntos']} puntos ({PUNTOS_CURVA} antes), "
+                      f"{tabla['curvas']} curvas, {bytes_tabla} bytes ({bytes_fijo} antes)")
+    lineas.append(f"  total: {total} bytes ({total_fijo} antes, tolerancia {meta['tolerancia']})")
+    return '\n'.join(lineas)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compila las tablas de referencia de la OMS')
+    parser.add_argument('--tolerancia', type=float, help='Error máximo de las curvas dibujadas (por defecto %s)'
+                        % TOLERANCIA_CURVA)
+    args = parser.parse_args()
+    configurada = leer_tolerancia()
+    if args.tolerancia is not None and configurada not in (None, args.tolerancia):
+        # cargar_compilado volvería a compilar con la de config.ini en la primera carga
+        parser.error(f"config.ini fija [referencias] tolerancia = {configurada}, "
+                     f"cámbiela ahí o quítela para usar --tolerancia {args.tolerancia}")
+    for genero in (1, 2):
+        ruta = compilar(genero, args.tolerancia)
+        print(ruta, file=sys.stderr)
+        print(informe_muestreo(leer_meta(abrir_npz(ruta))), file=sys.stderr)
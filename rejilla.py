@@ -0,0 +1,124 @@
+import configparser
+import glob
+import os
+import tempfile
+
+import numpy as np
+
+import clasificacion
+import ingesta
+import referencias
+
+# Rejilla diaria de referencia
+# Por sexo, una matriz float32 (indicador, día de edad, columna) con las curvas -3 a +3 y los
+# parámetros L, M y S ya evaluados en cada día desde el nacimiento hasta los 19 años
+# (6974 días con la constante de 65/1988 meses por día). Las edades de los pacientes son días
+# enteros, así que buscar una medición es indexar una fila: sin bandas de edad, sin pasar a
+# años y sin evaluar polinomios. Donde la tabla no trae las curvas +-1 (0 a 5 años) se
+# guarda el punto medio entre 0 y +-2, que da el mismo puntaje z. Fuera de las tablas de
+# un indicador las filas son NaN, y también las columnas L, M y S si las tablas no los traen.
+# Se compila una vez por versión de las referencias en datos/compilado/rejilla_<sexo>.v<N>.
+# <versión>.npy y se abre con mmap: todos los procesos (servicio, lotes, línea de
+# comandos) comparten las mismas páginas. Ocupa unos 840 KB por sexo.
+# config.ini, sección opcional:
+#   [referencias]
+#   rejilla = 1          ; 0 evalúa los polinomios de cada banda como antes
+
+VERSION_REJILLA = 1
+INDICADORES = ('peso', 'talla', 'imc')
+DESVIACIONES = np.arange(-3, 4, dtype=float)
+# Columnas: las siete curvas de -3 a +3 y después L, M y S
+COLUMNA_L = len(DESVIACIONES)
+COLUMNAS = COLUMNA_L + 3
+# Último día dentro de la banda de edad más alta (228 meses)
+DIAS = int(max(limite for rangos in clasificacion.RANGOS.values() for _, limite, _ in rangos)
+           / ingesta.MESES_POR_DIA) + 1
+
+
+def leer_activa(ruta='config.ini'):
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    return config.getboolean('referencias', 'rejilla', fallback=True)
+
+
+def construir(ref):
+    datos = np.full((len(INDICADORES), DIAS, COLUMNAS), np.nan, dtype=np.float32)
+    meses = np.arange(DIAS) * ingesta.MESES_POR_DIA
+    for numero, indicador in enumerate(INDICADORES):
+        bandas = clasificacion.banda_edad(indicador, meses)
+        for indice, (rango, _, divisor) in enumerate(clasificacion.RANGOS[indicador]):
+            mascara = bandas == indice
+            desviaciones, lineas = clasificacion.lineas_desviacion(ref, indicador, rango, meses[mascara] / divisor)
+            columnas = dict(zip(desviaciones.astype(int).tolist(), lineas))
+            for desviacion in (-1, 1):
+                if desviacion not in columnas:
+                    columnas[desviacion] = (columnas[0] + columnas[2 * desviacion]) / 2
+            for columna, desviacion in enumerate(DESVIACIONES.astype(int).tolist()):
+                datos[numero, mascara, columna] = columnas[desviacion]
+        if not ref.tiene_lms:
+            continue
+        edades, parametros = clasificacion.tabla_lms(ref, indicador)
+        dentro = meses <= edades[-1]
+        for columna, valores in enumerate(parametros):
+            datos[numero, dentro, COLUMNA_L + columna] = np.interp(meses[dentro], edades, valores)
+    return datos
+
+
+def ruta_rejilla(genero, version):
+    sexo = "hombre" if genero == 1 else "mujer"
+    return os.path.join(referencias.DIRECTORIO_COMPILADO, f"rejilla_{sexo}.v{VERSION_REJILLA}.{version[:16]}.npy")
+
+def compilar(genero, ref):
+    ruta = ruta_rejilla(genero, ref.version)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    # Temporal y renombrado, como el npz de referencias, nadie abre un archivo a medias
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            np.save(archivo, construir(ref), allow_pickle=False)
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.remove(temporal)
+        raise
+    # Las rejillas de versiones anteriores ya no se usan
+    for anterior in glob.glob(ruta_rejilla(genero, '*')):
+        if anterior != ruta:
+            try:
+                os.remove(anterior)
+            except OSError:
+                pass
+    return ruta
+
+
+class Rejilla:
+
+    def __init__(self, datos):
+        self.datos = datos
+
+    def filas(self, indicador, meses, dias=None):
+        # (mediciones, columnas) en float64. dias son las edades enteras de ingesta, sin
+        # ellos la edad en meses se redondea al día. Las edades negativas (consulta anterior
+        # al nacimiento) usan el día 0 como la primera banda
+        if dias is None:
+            dias = np.rint(np.asarray(meses, dtype=float) / ingesta.MESES_POR_DIA)
+        dias = np.asarray(dias).astype(np.intp)
+        filas = self.datos[INDICADORES.index(indicador), np.clip(dias, 0, DIAS - 1)].astype(np.float64)
+        filas[dias >= DIAS] = np.nan
+        return filas
+
+    def lineas(self, indicador, meses, dias=None):
+        # Como clasificacion.lineas_desviacion, las siete curvas para todas las edades
+        return DESVIACIONES, self.filas(indicador, meses, dias)[:, :COLUMNA_L].T
+
+    def lms(self, indicador, meses, dias=None):
+        return self.filas(indicador, meses, dias)[:, COLUMNA_L:].T
+
+
+def cargar(genero, ref=None):
+    # La rejilla del sexo en mmap de solo lectura, se compila si no existe la de esta versión
+    ref = ref or referencias.cargar(genero)
+    ruta = ruta_rejilla(genero, ref.version)
+    if not os.path.exists(ruta):
+        compilar(genero, ref)
+    return Rejilla(np.load(ruta, mmap_mode='r'))
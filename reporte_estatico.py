@@ -0,0 +1,221 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from PIL import Image
+
+import colores
+import curvas_de_crecimiento as curvas
+import ingesta
+
+# Reportes estáticos (PNG y PDF) con matplotlib
+# Dibuja los mismos paneles que el gráfico de Plotly (curvas de desviación estándar,
+# bandas, divisiones y puntos del paciente con su color) sin pasar por HTML, para imprimir,
+# enviar por correo o fax. Las curvas ya evaluadas de referencias se dibujan una sola vez
+# por proceso en una plantilla por sexo y selección de paneles, cada paciente solo agrega
+# sus puntos y se quitan al terminar.
+# Uso:
+#   python reporte_estatico.py 1234567890                    -> reporte_1234567890.png
+#   python reporte_estatico.py 1234567890 0987654321 --formato pdf --salida reportes/
+# Para miles de pacientes: python lote.py --modo pdf --salida reportes/
+
+FORMATOS_ESTATICOS = ('png', 'pdf')
+
+# Ancho de una hoja A4 en pulgadas y alto de cada fila de paneles
+ANCHO_HOJA = 8.27
+ALTO_FILA = 2.2
+DPI = 150
+# Compresión zlib del PNG: 1 es mucho más rápida que la de matplotlib (6) y pesa poco más
+COMPRESION_PNG = 1
+# El PDF lleva dos filas de paneles por página, el PNG todos en una sola imagen
+PANELES_POR_PAGINA = 4
+
+TAMANO_TEXTO = 7
+
+
+def color_mpl(color):
+    # Plotly acepta 'rgba(r, g, b, a)' con canales de 0 a 255, matplotlib no
+    coincidencia = re.fullmatch(r'rgba?\(([^)]*)\)', color.replace(' ', ''))
+    if not coincidencia:
+        return to_rgba(color)
+    canales = [float(canal) for canal in coincidencia.group(1).split(',')]
+    alfa = canales[3] if len(canales) == 4 else 1.0
+    return (canales[0] / 255, canales[1] / 255, canales[2] / 255, alfa)
+
+
+def dibujar_referencia(ax, ref, panel, texto_titulo):
+    # Curvas, bandas, divisiones, marcas y etiquetas de un panel, iguales para todo el sexo
+    indicador = panel['indicador']
+    divisor = 12 if panel['unidad'] == 'años' else 1
+    for nombre_edad, rango, _ in panel['tablas']:
+        x_curva = ref.x_curvas[nombre_edad]
+        for inferior, superior, color in panel['bandas']:
+            ax.fill_between(x_curva, ref.curvas[curvas.nombre_curva(indicador, inferior, rango)],
+                            ref.curvas[curvas.nombre_curva(indicador, superior, rango)],
+                            color=color_mpl(color), linewidth=0)
+        for desviacion in panel['desviaciones']:
+            ax.plot(x_curva, ref.curvas[curvas.nombre_curva(indicador, desviacion, rango)],
+                    color=color_mpl(curvas.COLORES_DESVIACION[abs(desviacion)]), linewidth=0.8)
+
+    for x, y0, y1 in panel['divisiones']:
+        ax.plot([x, x], [y0, y1], color=(0, 0, 0, 0.3), linewidth=1)
+    for texto, x, y in panel['marcas']:
+        ax.text(x, y, texto, ha='center', va='bottom', fontsize=TAMANO_TEXTO - 1)
+
+    _, rango_final, limite_final = panel['tablas'][-1]
+    x_final = limite_final / divisor
+    for desviacion in panel['desviaciones']:
+        y = float(curvas.polinomio_curva(ref, indicador, desviacion, rango_final)(x_final))
+        # Fuera del eje la etiqueta quedaría sobre el panel vecino
+        if not panel['eje_y'][0] <= y <= panel['eje_y'][1]:
+            continue
+        ax.annotate(f"{desviacion:+d}" if desviacion else "0", xy=(x_final, y), xytext=(3, 0),
+                    textcoords='offset points', va='center', fontsize=TAMANO_TEXTO - 1,
+                    color=color_mpl(curvas.COLORES_ETIQUETA[abs(desviacion)]), annotation_clip=False)
+
+    ax.set_xlim(*panel['eje_x'])
+    ax.set_ylim(*panel['eje_y'])
+    ax.set_title(panel['titulo'].format(texto_titulo), fontsize=TAMANO_TEXTO + 1)
+    ax.set_xlabel(panel['unidad'].capitalize(), fontsize=TAMANO_TEXTO)
+    ax.set_ylabel(curvas.TITULOS_EJE_Y[indicador], fontsize=TAMANO_TEXTO)
+    ax.tick_params(labelsize=TAMANO_TEXTO)
+    ax.grid(True, linewidth=0.3, alpha=0.5)
+
+
+class Plantilla:
+    # Figura con las referencias ya dibujadas, se reutiliza para cada paciente
+
+    def __init__(self, genero, paneles):
+        self.paneles = paneles
+        filas = (len(paneles) + 1) // 2
+        self.figura = Figure(figsize=(ANCHO_HOJA, ALTO_FILA * filas + 0.6))
+        FigureCanvasAgg(self.figura)
+        ejes = self.figura.subplots(filas, 2, squeeze=False).ravel()
+        ref = curvas.cargar_referencias(genero)
+        texto_titulo = "Niños" if genero == 1 else "Niñas"
+        self.ejes = []
+        for ax, panel in zip(ejes, paneles):
+            dibujar_referencia(ax, ref, panel, texto_titulo)
+            self.ejes.append(ax)
+        for ax in ejes[len(paneles):]:
+            ax.set_visible(False)
+        self.figura.subplots_adjust(left=0.08, right=0.95, top=1 - 0.6 / (ALTO_FILA * filas + 0.6),
+                                    bottom=0.35 / (ALTO_FILA * filas + 0.6), hspace=0.45, wspace=0.25)
+        self.fondo = None
+
+    def rasterizar(self, dpi):
+        # Las referencias se rasterizan una vez por resolución, cada PNG parte de esa imagen
+        if self.fondo is None or self.fondo[0] != dpi:
+            self.figura.set_dpi(dpi)
+            self.figura.canvas.draw()
+            self.fondo = (dpi, self.figura.canvas.copy_from_bbox(self.figura.bbox))
+        self.figura.canvas.restore_region(self.fondo[1])
+
+    def dibujar_paciente(self, ref, mediciones, titulo):
+        # Devuelve los artistas agregados para quitarlos después de guardar
+        artistas = [self.figura.suptitle(titulo, fontsize=TAMANO_TEXTO + 3)]
+        for ax, panel in zip(self.ejes, self.paneles):
+            indicador = panel['indicador']
+            meses, valores, _, dias = ingesta.panel(mediciones, indicador, panel['rango'])
+            if not len(meses):
+                continue
+            x = meses / (12 if panel['unidad'] == 'años' else 1)
+            mapa_color = [color_mpl(color) for color in colores.asignar_colores(ref, indicador, meses, valores, dias=dias)]
+            if indicador != 'imc':
+                artistas += ax.plot(x, valores, color='green', linewidth=0.8, zorder=3)
+            artistas.append(ax.scatter(x, valores, c=mapa_color, s=10, zorder=4, linewidths=0))
+        return artistas
+
+
+_plantillas = {}
+
+def plantilla(genero, paneles):
+    clave = (genero, tuple(curvas.id_panel(panel) for panel in paneles))
+    if clave not in _plantillas:
+        _plantillas[clave] = Plantilla(genero, paneles)
+    return _plantillas[clave]
+
+
+def paginas(mediciones, formato, paneles=None):
+    seleccion = curvas.seleccionar_paneles(mediciones, paneles)
+    if formato == 'png':
+        return [seleccion]
+    return [seleccion[i:i + PANELES_POR_PAGINA] for i in range(0, len(seleccion), PANELES_POR_PAGINA)]
+
+
+def exportar(resultados, ruta, formato='png', cedula='', paneles=None, dpi=DPI):
+    # Un PNG con todos los paneles o un PDF de varias páginas
+    mediciones = ingesta.ingerir(resultados)
+    ref = curvas.cargar_referencias(mediciones.genero)
+    titulo = "Curvas de Crecimiento" + (f" - {cedula}" if cedula else "")
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    temporal = os.path.join(directorio, f".{os.path.basename(ruta)}.{os.getpid()}.tmp")
+    try:
+        if formato == 'png':
+            lamina = plantilla(mediciones.genero, paginas(mediciones, formato, paneles)[0])
+            lamina.rasterizar(dpi)
+            artistas = lamina.dibujar_paciente(ref, mediciones, titulo)
+            try:
+                # Solo se dibujan los puntos del paciente sobre el fondo, sin redibujar la figura
+                for artista in artistas:
+                    lamina.figura.draw_artist(artista)
+                canvas = lamina.figura.canvas
+                imagen = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+                imagen.convert('RGB').save(temporal, format='png', dpi=(dpi, dpi), compress_level=COMPRESION_PNG)
+            finally:
+                for artista in artistas:
+                    artista.remove()
+        else:
+            with PdfPages(temporal) as pdf:
+                for pagina in paginas(mediciones, formato, paneles):
+                    lamina = plantilla(mediciones.genero, pagina)
+                    artistas = lamina.dibujar_paciente(ref, mediciones, titulo)
+                    try:
+                        pdf.savefig(lamina.figura)
+                    finally:
+                        for artista in artistas:
+                            artista.remove()
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return ruta
+
+
+def nombre_reporte(cedula, formato):
+    return 'reporte_' + re.sub(r'[^\w-]', '_', cedula) + '.' + formato
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reportes estáticos de curvas de crecimiento (PNG o PDF)')
+    parser.add_argument('cedulas', nargs='+')
+    parser.add_argument('--formato', choices=FORMATOS_ESTATICOS, default='png')
+    parser.add_argument('--salida', default='.', metavar='DIRECTORIO')
+    parser.add_argument('--paneles', type=curvas.lista_paneles, default='todos', metavar='PANELES',
+                        help='Igual que en curvas_de_crecimiento.py: todos, auto o una lista de ids')
+    parser.add_argument('--dpi', type=int, default=DPI, help='Resolución del PNG')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.salida, exist_ok=True)
+    conn = curvas.conectar()
+    inicio = time.perf_counter()
+    try:
+        for cedula in args.cedulas:
+            resultados = curvas.consultar_signos_vitales(conn, cedula)
+            ruta = os.path.join(args.salida, nombre_reporte(cedula, args.formato))
+            print(exportar(resultados, ruta, args.formato, cedula, args.paneles, args.dpi))
+    finally:
+        conn.close()
+    duracion = time.perf_counter() - inicio
+    print(f"{len(args.cedulas)} reportes en {duracion:.2f} s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
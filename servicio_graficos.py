@@ -0,0 +1,194 @@
+import argparse
+import configparser
+import json
+import os
+import socketserver
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import psycopg2
+
+import base_datos
+import cache_graficos
+import curvas_de_crecimiento as curvas
+import metricas
+
+# Servicio de gráficos
+# Proceso de larga duración que mantiene cargados los módulos, las tablas de referencia
+# y las interpolaciones, para no pagar el arranque de Python en cada consulta.
+# Uso:
+#   python servicio_graficos.py                       -> http://127.0.0.1:8050
+#   python servicio_graficos.py --socket /tmp/curvas.sock
+# Consulta:
+#   GET /grafico?cedula=<cédula>  -> HTML del gráfico
+#   GET /grafico?cedula=<cédula>&formato=fragmento -> solo el div, usa el plotly.js servido aparte
+#   GET /grafico?cedula=<cédula>&formato=paciente  -> JSON con los puntos del paciente, el
+#                                                     navegador los superpone a la capa de referencia
+#   GET /salud                    -> "ok"
+#   GET /cache                    -> aciertos y fallos de la caché (JSON)
+#   GET /pool                     -> uso y tiempos de espera del pool de conexiones (JSON)
+#   GET /metricas                 -> tiempos acumulados por etapa (y memoria con [metricas] memoria = 1), formato de Prometheus
+#                                    (con [metricas] activo = 1 en config.ini, ver metricas.py)
+# Cada consulta se atiende en su propio hilo, el pool limita cuántas usan la base de datos a la vez.
+
+HOST_POR_DEFECTO = '127.0.0.1'
+PUERTO_POR_DEFECTO = 8050
+
+TIPOS_CONTENIDO = {
+    'html': 'text/html; charset=utf-8',
+    'fragmento': 'text/html; charset=utf-8',
+    'paciente': 'application/json',
+}
+
+
+def leer_configuracion_servicio(ruta='config.ini'):
+    # La sección [servicio] es opcional, si no existe se usan los valores por defecto
+    config = configparser.ConfigParser()
+    config.read(ruta)
+    return {
+        'host': config.get('servicio', 'host', fallback=HOST_POR_DEFECTO),
+        'puerto': config.getint('servicio', 'puerto', fallback=PUERTO_POR_DEFECTO),
+        'socket': config.get('servicio', 'socket', fallback=None),
+    }
+
+
+class GeneradorGraficos:
+    # Toma una conexión del pool por consulta, las conexiones caídas se descartan en el pool
+
+    def __init__(self, pool, cache=None, webgl=curvas.UMBRAL_WEBGL):
+        self.pool = pool
+        self.cache = cache
+        self.webgl = webgl
+
+    def precargar(self):
+        # Se cargan las referencias de ambos sexos antes de atender la primera consulta
+        curvas.cargar_referencias(1)
+        curvas.cargar_referencias(2)
+        curvas.exportar_capa_referencia(1)
+        curvas.exportar_capa_referencia(2)
+        with self.pool.conexion():
+            pass
+
+    def html(self, cedula, formato='html'):
+        with metricas.solicitud(formato=formato):
+            try:
+                with self.pool.conexion() as conn:
+                    return curvas.obtener_contenido(cedula, conn, formato, self.cache, webgl=self.webgl)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # La conexión se cayó (reinicio de Postgres, timeout), se reintenta una vez con otra
+                with self.pool.conexion() as conn:
+                    return curvas.obtener_contenido(cedula, conn, formato, self.cache, webgl=self.webgl)
+
+    def cerrar(self):
+        self.pool.cerrar()
+
+
+class ManejadorGraficos(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/salud':
+            self.responder(200, 'ok', 'text/plain; charset=utf-8')
+            return
+        if url.path == '/cache':
+            cache = self.server.generador.cache
+            estadisticas = cache.estadisticas() if cache else {}
+            self.responder(200, json.dumps(estadisticas), 'application/json')
+            return
+        if url.path == '/pool':
+            self.responder(200, json.dumps(self.server.generador.pool.estadisticas()), 'application/json')
+            return
+        if url.path == '/metricas':
+            if not metricas.activo():
+                self.responder(404, 'Métricas desactivadas', 'text/plain; charset=utf-8')
+                return
+            self.responder(200, metricas.texto_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+            return
+        if url.path != '/grafico':
+            self.responder(404, 'Ruta no encontrada', 'text/plain; charset=utf-8')
+            return
+
+        parametros = parse_qs(url.query)
+        cedula = parametros.get('cedula', [''])[0]
+        formato = parametros.get('formato', ['html'])[0]
+        if formato not in TIPOS_CONTENIDO:
+            self.responder(400, 'Formato no soportado', 'text/plain; charset=utf-8')
+            return
+        try:
+            contenido = self.server.generador.html(cedula, formato)
+        except base_datos.PoolAgotado:
+            self.responder(503, 'Servicio ocupado, intente de nuevo', 'text/plain; charset=utf-8')
+            return
+        except Exception as error:
+            self.log_error('Error al generar el gráfico de %s: %r', cedula, error)
+            self.responder(500, 'Error al generar el gráfico', 'text/plain; charset=utf-8')
+            return
+        self.responder(200, contenido, TIPOS_CONTENIDO[formato])
+
+    def responder(self, estado, contenido, tipo):
+        cuerpo = contenido.encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def address_string(self):
+        # En un socket Unix no hay dirección de cliente
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class ServidorHTTP(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ServidorHTTPUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def crear_servidor(generador, host=HOST_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO, ruta_socket=None):
+    if ruta_socket:
+        if os.path.exists(ruta_socket):
+            os.remove(ruta_socket)
+        servidor = ServidorHTTPUnix(ruta_socket, ManejadorGraficos)
+    else:
+        servidor = ServidorHTTP((host, puerto), ManejadorGraficos)
+    servidor.generador = generador
+    return servidor
+
+
+def main(argv=None):
+    opciones = leer_configuracion_servicio()
+    parser = argparse.ArgumentParser(description='Servicio local de curvas de crecimiento')
+    parser.add_argument('--host', default=opciones['host'])
+    parser.add_argument('--puerto', type=int, default=opciones['puerto'])
+    parser.add_argument('--socket', default=opciones['socket'],
+                        help='Ruta de un socket Unix, reemplaza a host y puerto')
+    parser.add_argument('--cache', metavar='DIRECTORIO', help='Directorio de la caché de gráficos')
+    parser.add_argument('--cache-capacidad', type=int, help='Máximo de gráficos en la caché')
+    parser.add_argument('--conexiones', type=int, help='Máximo de conexiones del pool (por defecto [pool] maximo)')
+    args = parser.parse_args(argv)
+
+    metricas.configurar()
+    cache = cache_graficos.crear_cache(args.cache, args.cache_capacidad)
+    pool = base_datos.crear_pool(curvas.leer_configuracion(), args.conexiones)
+    generador = GeneradorGraficos(pool, cache, curvas.leer_umbral_webgl())
+    generador.precargar()
+
+    servidor = crear_servidor(generador, args.host, args.puerto, args.socket)
+    destino = args.socket or f'http://{args.host}:{args.puerto}'
+    print(f'Servicio de curvas de crecimiento escuchando en {destino}', file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        generador.cerrar()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
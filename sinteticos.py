@@ -0,0 +1,400 @@
+import argparse
+import datetime
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import psycopg2
+
+import base_datos
+import clasificacion
+import ingesta
+import referencias
+
+# Pacientes sintéticos
+# Historias de crecimiento generadas con las tablas de referencia: cada paciente sigue su
+# propio puntaje z de talla y de IMC, que deriva poco a poco entre visitas, y el peso sale
+# de los dos (IMC por talla al cuadrado). Las filas tienen el mismo formato que devuelve
+# curvas_de_crecimiento.consulta_sql (una por consulta, con peso, talla e IMC como texto) y
+# ConexionSimulada las entrega como si vinieran de Postgres, para medir sin base de datos.
+# La misma semilla da siempre los mismos pacientes.
+# Para pruebas de carga, poblacion() genera en bloques miles o millones de pacientes de
+# 0 a 19 años, con visitas a una frecuencia dada, ruido de medición, tallas escritas en
+# metros y valores atípicos (errores de digitación), y main() los carga con COPY en las
+# tablas que lee la consulta en un Postgres local, o los escribe en archivos para \copy.
+# Uso:
+#   python sinteticos.py --dsn "dbname=curvas_prueba" --crear-tablas --vaciar --pacientes 500000
+#   python sinteticos.py --salida poblacion/ --pacientes 1000 --metros 0.2 --atipicos 0.01
+# Con la misma semilla, número de pacientes y tamaño de bloque los valores son los mismos,
+# las fechas se cuentan hacia atrás desde hoy (o --hoy).
+
+# Perfiles de paciente: edad actual en días y número de visitas
+PERFILES = {
+    'recien_nacido': (20, 3),
+    'lactante': (365, 12),
+    'preescolar': (4 * 365, 30),
+    'escolar': (10 * 365, 80),
+    'adolescente': (6900, 200),
+}
+
+# Desviación estándar del puntaje z inicial y de su deriva entre visitas
+DISPERSION_Z = 1.0
+DERIVA_Z = 0.15
+
+# Primera cédula sintética, diez dígitos como las reales
+CEDULA_INICIAL = 9000000000
+# Primera cédula de poblacion(), no se cruza con las de historias()
+CEDULA_POBLACION = 9100000000
+
+# Población para pruebas de carga
+# Edad máxima en días, la consulta solo lee menores de 19 años
+EDAD_MAXIMA = 19 * 365 - 1
+# Visitas por año de edad (además de una al nacer o al registrarse)
+FRECUENCIA = 4.0
+# Coeficiente de variación del error de medición de peso y talla
+RUIDO = 0.01
+# Fracción de tallas registradas en metros (ingesta las pasa a centímetros)
+METROS = 0.1
+# Fracción de valores atípicos: el valor multiplicado o dividido por 10
+ATIPICOS = 0.002
+TAMANO_BLOQUE = 10000
+
+# Esquema mínimo con las columnas que leen las consultas, para una base local vacía
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS seg_usuario_detalles (
+        "PK_identificacion" varchar(20) PRIMARY KEY,
+        "FK_sexo" integer,
+        "usd_fecha_nacimiento" date
+    );
+    CREATE TABLE IF NOT EXISTS med_consultas (
+        "PK_consulta" bigint PRIMARY KEY,
+        "FK_paciente" varchar(20) NOT NULL,
+        "con_fecha" timestamp
+    );
+    CREATE TABLE IF NOT EXISTS med_consulta_signos_vitales (
+        "PK_consulta" bigint NOT NULL,
+        "FK_signo_vital" integer NOT NULL,
+        "sigv_resultado" varchar(20)
+    );
+    ALTER TABLE med_consulta_signos_vitales
+        ADD COLUMN IF NOT EXISTS "sigv_registro" bigint GENERATED BY DEFAULT AS IDENTITY;
+"""
+
+# Tabla -> columnas, en el orden de las líneas de cada COPY
+TABLAS = {
+    'seg_usuario_detalles': ('PK_identificacion', 'FK_sexo', 'usd_fecha_nacimiento'),
+    'med_consultas': ('PK_consulta', 'FK_paciente', 'con_fecha'),
+    'med_consulta_signos_vitales': ('PK_consulta', 'FK_signo_vital', 'sigv_resultado'),
+}
+
+MIGRACION_INDICES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migraciones',
+                                 '001_indices_signos_vitales.sql')
+
+
+def valor_en_z(ref, indicador, meses, z):
+    # Valor a z desviaciones estándar, interpolando entre las curvas vecinas de la tabla de
+    # cada edad (las de 0 a 5 años no tienen +-1). Fuera de +-3 se usa la curva +-3
+    valores = np.full(meses.shape, np.nan)
+    bandas = clasificacion.banda_edad(indicador, meses)
+    for indice, (rango, _, divisor) in enumerate(clasificacion.RANGOS[indicador]):
+        mascara = bandas == indice
+        if not mascara.any():
+            continue
+        desviaciones, lineas = clasificacion.lineas_desviacion(ref, indicador, rango, meses[mascara] / divisor)
+        zs = np.clip(z[mascara], desviaciones[0], desviaciones[-1])
+        superior = np.clip(np.searchsorted(desviaciones, zs, side='right'), 1, len(desviaciones) - 1)
+        inferior = superior - 1
+        columnas = np.arange(len(zs))
+        fraccion = (zs - desviaciones[inferior]) / (desviaciones[superior] - desviaciones[inferior])
+        valores[mascara] = (lineas[inferior, columnas]
+                            + fraccion * (lineas[superior, columnas] - lineas[inferior, columnas]))
+    return valores
+
+
+def trayectoria_z(generador, visitas):
+    # Puntaje z del paciente en cada visita: un valor inicial y una caminata aleatoria
+    return generador.normal(0, DISPERSION_Z) + np.cumsum(generador.normal(0, DERIVA_Z, visitas))
+
+
+def historia(cedula, genero, edad_dias, visitas, semilla=0, hoy=None):
+    # Filas de un paciente de edad_dias días hoy, con visitas consultas entre el nacimiento y hoy
+    generador = np.random.default_rng([semilla, int(cedula)])
+    hoy = hoy or datetime.date.today()
+    nacimiento = hoy - datetime.timedelta(days=edad_dias)
+    dias = np.sort(generador.choice(edad_dias + 1, size=min(visitas, edad_dias + 1), replace=False))
+    meses = dias * ingesta.MESES_POR_DIA
+
+    ref = referencias.cargar(genero)
+    talla = valor_en_z(ref, 'talla', meses, trayectoria_z(generador, len(dias)))
+    imc = valor_en_z(ref, 'imc', meses, trayectoria_z(generador, len(dias)))
+    peso = imc * (talla / 100) ** 2
+
+    filas = []
+    for numero, (dia, p, t, i) in enumerate(zip(dias.tolist(), peso.tolist(), talla.tolist(), imc.tolist()), 1):
+        filas.append((int(cedula) * 1000 + numero, cedula, genero, nacimiento + datetime.timedelta(days=dia),
+                      nacimiento, f"{p:.2f}", f"{t:.1f}", f"{i:.2f}"))
+    return filas
+
+
+def historias(perfil, cantidad=1, semilla=0, hoy=None):
+    # cedula -> filas de cantidad pacientes del perfil, niños y niñas alternados
+    edad_dias, visitas = PERFILES[perfil]
+    resultado = {}
+    for indice in range(cantidad):
+        cedula = str(CEDULA_INICIAL + list(PERFILES).index(perfil) * 100000 + indice)
+        resultado[cedula] = historia(cedula, 1 + indice % 2, edad_dias, visitas, semilla, hoy)
+    return resultado
+
+
+def atipicos(generador, valores, fraccion):
+    # Errores de digitación: la coma corrida un lugar a la derecha o a la izquierda
+    mascara = generador.random(valores.shape) < fraccion
+    factores = np.where(generador.random(valores.shape) < 0.5, 10.0, 0.1)
+    return np.where(mascara, valores * factores, valores)
+
+def bloque_poblacion(primero, cantidad, semilla=0, hoy=None, frecuencia=FRECUENCIA, ruido=RUIDO, metros=METROS,
+                     fraccion_atipicos=ATIPICOS, primera_consulta=1, primera_cedula=CEDULA_POBLACION):
+    # Pacientes primero..primero+cantidad-1 como líneas de COPY (texto separado por
+    # tabuladores) de cada tabla. Todo se calcula por arreglos, una llamada a valor_en_z por
+    # sexo e indicador para el bloque entero
+    generador = np.random.default_rng([semilla, primero])
+    hoy = np.datetime64(hoy or datetime.date.today(), 'D')
+    indices = np.arange(primero, primero + cantidad)
+    cedulas = (primera_cedula + indices).astype(str)
+    generos = 1 + indices % 2
+    edades = generador.integers(0, EDAD_MAXIMA + 1, cantidad)
+    nacimientos = hoy - edades
+
+    # Visitas: una más un proceso de Poisson a lo largo de la edad, en días al azar
+    visitas = 1 + generador.poisson(frecuencia * edades / 365.25)
+    paciente = np.repeat(np.arange(cantidad), visitas)
+    dias = np.floor(generador.random(len(paciente)) * (edades[paciente] + 1)).astype(np.int64)
+    orden = np.lexsort((dias, paciente))
+    dias = dias[orden]
+    meses = dias * ingesta.MESES_POR_DIA
+    inicio_paciente = np.concatenate(([0], np.cumsum(visitas)[:-1]))
+
+    # Puntaje z de talla e IMC: inicial por paciente y una caminata aleatoria que se
+    # reinicia en la primera visita de cada uno
+    zs = {}
+    for indicador in ('talla', 'imc'):
+        pasos = generador.normal(0, DERIVA_Z, len(paciente))
+        caminata = np.cumsum(pasos)
+        caminata -= np.repeat(caminata[inicio_paciente] - pasos[inicio_paciente], visitas)
+        zs[indicador] = np.repeat(generador.normal(0, DISPERSION_Z, cantidad), visitas) + caminata
+    talla = np.full(len(paciente), np.nan)
+    imc = np.full(len(paciente), np.nan)
+    for genero in (1, 2):
+        mascara = generos[paciente] == genero
+        ref = referencias.cargar(genero)
+        talla[mascara] = valor_en_z(ref, 'talla', meses[mascara], zs['talla'][mascara])
+        imc[mascara] = valor_en_z(ref, 'imc', meses[mascara], zs['imc'][mascara])
+
+    # Error de medición y de digitación en peso y talla, el IMC se calcula con los valores
+    # registrados como hace la aplicación
+    peso = imc * (talla / 100) ** 2 * (1 + generador.normal(0, ruido, len(paciente)))
+    talla = talla * (1 + generador.normal(0, ruido / 2, len(paciente)))
+    peso = atipicos(generador, peso, fraccion_atipicos)
+    talla = atipicos(generador, talla, fraccion_atipicos)
+    imc = peso / (talla / 100) ** 2
+    en_metros = generador.random(len(paciente)) < metros
+
+    consultas = primera_consulta + np.arange(len(paciente))
+    # Hora de la consulta entre las 7 y las 17
+    segundos = generador.integers(7 * 3600, 17 * 3600, len(paciente))
+    fechas = np.datetime_as_string((nacimientos[paciente] + dias).astype('datetime64[s]') + segundos, unit='s')
+
+    detalles = [f"{cedula}\t{genero}\t{nacimiento}\n" for cedula, genero, nacimiento
+                in zip(cedulas.tolist(), generos.tolist(), np.datetime_as_string(nacimientos).tolist())]
+    lineas_consultas = [f"{consulta}\t{cedula}\t{fecha}\n" for consulta, cedula, fecha
+                        in zip(consultas.tolist(), cedulas[paciente].tolist(), fechas.tolist())]
+    signos = []
+    for consulta, p, t, i, m in zip(consultas.tolist(), peso.tolist(), talla.tolist(), imc.tolist(),
+                                    en_metros.tolist()):
+        if p == p:
+            signos.append(f"{consulta}\t3\t{p:.2f}\n")
+        if t == t:
+            signos.append(f"{consulta}\t5\t{t / 100:.3f}\n" if m else f"{consulta}\t5\t{t:.1f}\n")
+        if i == i:
+            signos.append(f"{consulta}\t7\t{i:.2f}\n")
+    return {
+        'seg_usuario_detalles': ''.join(detalles),
+        'med_consultas': ''.join(lineas_consultas),
+        'med_consulta_signos_vitales': ''.join(signos),
+    }, len(paciente)
+
+def poblacion(pacientes, semilla=0, tamano_bloque=TAMANO_BLOQUE, primera_consulta=1, **opciones):
+    # Bloques de bloque_poblacion con números de consulta consecutivos
+    for primero in range(0, pacientes, tamano_bloque):
+        bloque, consultas = bloque_poblacion(primero, min(tamano_bloque, pacientes - primero), semilla,
+                                             primera_consulta=primera_consulta, **opciones)
+        primera_consulta += consultas
+        yield bloque
+
+
+class CursorSimulado:
+
+    def __init__(self, conexion):
+        self.connection = conexion
+        self.filas = []
+
+    def execute(self, consulta, parametros=None):
+        # La consulta se reconoce por su texto entre las registradas en base_datos
+        texto = consulta.string if hasattr(consulta, 'string') else str(consulta)
+        nombres = [nombre for nombre, registrada in base_datos.SENTENCIAS.items() if registrada == texto]
+        if not nombres or nombres[0] not in self.connection.CONSULTAS:
+            raise NotImplementedError(f"Consulta no simulada: {texto.strip()[:60]}")
+        self.filas = getattr(self.connection, nombres[0])(*parametros)
+
+    def fetchall(self):
+        filas, self.filas = self.filas, []
+        return filas
+
+    def fetchone(self):
+        return self.filas.pop(0) if self.filas else None
+
+    def close(self):
+        pass
+
+
+class ConexionSimulada:
+    # Responde en memoria las consultas de signos vitales (una cédula o un lote) y la de
+    # frescura de la caché, con historias de sinteticos.historias. Cada consulta se
+    # responde con el método de su nombre en base_datos.SENTENCIAS
+    CONSULTAS = ('signos_vitales', 'signos_vitales_lote', 'frescura')
+    closed = 0
+
+    def __init__(self, historias):
+        self.historias = historias
+
+    def cursor(self):
+        return CursorSimulado(self)
+
+    def close(self):
+        pass
+
+    def signos_vitales(self, cedula):
+        return list(self.historias.get(cedula, ()))
+
+    def signos_vitales_lote(self, cedulas):
+        return [fila for cedula in sorted(cedulas) for fila in self.historias.get(cedula, ())]
+
+    def frescura(self, cedula):
+        filas = self.historias.get(cedula)
+        if not filas:
+            return []
+        signos = sum(valor is not None for fila in filas for valor in fila[5:])
+        return [(filas[-1][2], max(fila[3] for fila in filas), max(fila[0] for fila in filas), signos)]
+
+
+def conexion(perfil, semilla=0):
+    # Conexión simulada con un solo paciente del perfil y su cédula
+    datos = historias(perfil, 1, semilla)
+    return ConexionSimulada(datos), next(iter(datos))
+
+
+def copiar(cursor, tabla, texto, congelar=False):
+    columnas = ', '.join(f'"{columna}"' for columna in TABLAS[tabla])
+    # FREEZE escribe las filas ya congeladas, sin el VACUUM posterior, pero solo se permite
+    # si la tabla se creó o se vació en la misma transacción
+    opciones = ' WITH (FREEZE)' if congelar else ''
+    cursor.copy_expert(f"COPY {tabla} ({columnas}) FROM STDIN{opciones}", io.StringIO(texto))
+
+def crear_indices(conn):
+    # Los índices de la migración se crean después de la carga, es mucho más rápido que
+    # mantenerlos fila por fila. CONCURRENTLY no admite transacciones: autocommit
+    with open(MIGRACION_INDICES, encoding='utf-8') as archivo:
+        lineas = [linea for linea in archivo if not linea.lstrip().startswith('--')]
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        for sentencia in ''.join(lineas).split(';'):
+            if sentencia.strip():
+                cursor.execute(sentencia)
+    finally:
+        cursor.close()
+
+def cargar(conn, pacientes, semilla=0, tamano_bloque=TAMANO_BLOQUE, crear_tablas=False, vaciar=False, **opciones):
+    # Genera y carga la población en una sola transacción, devuelve las filas por tabla.
+    # Sin vaciar, las consultas se numeran después de la última que ya exista
+    filas = dict.fromkeys(TABLAS, 0)
+    cursor = conn.cursor()
+    try:
+        if crear_tablas:
+            cursor.execute(ESQUEMA)
+        if vaciar:
+            cursor.execute(f"TRUNCATE {', '.join(TABLAS)}")
+        cursor.execute('SELECT COALESCE(MAX("PK_consulta"), 0) FROM med_consultas')
+        primera_consulta = cursor.fetchone()[0] + 1
+        for bloque in poblacion(pacientes, semilla, tamano_bloque, primera_consulta, **opciones):
+            for tabla, texto in bloque.items():
+                copiar(cursor, tabla, texto, congelar=vaciar)
+                filas[tabla] += texto.count('\n')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return filas
+
+def guardar(bloques, salida):
+    # Un archivo por tabla en el formato de COPY, para \copy tabla FROM 'archivo'
+    os.makedirs(salida, exist_ok=True)
+    filas = dict.fromkeys(TABLAS, 0)
+    archivos = {tabla: open(os.path.join(salida, f"{tabla}.tsv"), 'w', encoding='utf-8') for tabla in TABLAS}
+    try:
+        for bloque in bloques:
+            for tabla, texto in bloque.items():
+                archivos[tabla].write(texto)
+                filas[tabla] += texto.count('\n')
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pacientes sintéticos para pruebas de carga')
+    destino = parser.add_mutually_exclusive_group(required=True)
+    # No se lee config.ini a propósito: nunca se carga por error en la base de producción
+    destino.add_argument('--dsn', help='Base de datos local donde cargar con COPY, por ejemplo "dbname=curvas_prueba"')
+    destino.add_argument('--salida', metavar='DIRECTORIO', help='Escribe un archivo por tabla en vez de cargar')
+    parser.add_argument('--pacientes', type=int, default=10000)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--frecuencia', type=float, default=FRECUENCIA, help='Visitas por año de edad')
+    parser.add_argument('--ruido', type=float, default=RUIDO, help='Coeficiente de variación de peso y talla')
+    parser.add_argument('--metros', type=float, default=METROS, help='Fracción de tallas en metros')
+    parser.add_argument('--atipicos', type=float, default=ATIPICOS, help='Fracción de valores multiplicados o '
+                                                                          'divididos por 10')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE, help='Pacientes por bloque')
+    parser.add_argument('--hoy', type=datetime.date.fromisoformat, help='Fecha de referencia (por defecto hoy)')
+    parser.add_argument('--crear-tablas', action='store_true',
+                        help='Crea las tablas si no existen y, después de cargar, los índices de migraciones/')
+    parser.add_argument('--vaciar', action='store_true', help='Vacía las tres tablas antes de cargar')
+    args = parser.parse_args(argv)
+
+    opciones = dict(hoy=args.hoy, frecuencia=args.frecuencia, ruido=args.ruido, metros=args.metros,
+                    fraccion_atipicos=args.atipicos)
+    inicio = time.perf_counter()
+    if args.salida:
+        filas = guardar(poblacion(args.pacientes, args.semilla, args.tamano_bloque, **opciones), args.salida)
+    else:
+        conn = psycopg2.connect(args.dsn)
+        try:
+            filas = cargar(conn, args.pacientes, args.semilla, args.tamano_bloque, args.crear_tablas, args.vaciar,
+                           **opciones)
+            if args.crear_tablas:
+                crear_indices(conn)
+        finally:
+            conn.close()
+    duracion = time.perf_counter() - inicio
+    total = sum(filas.values())
+    print(', '.join(f"{tabla}: {n}" for tabla, n in filas.items()), file=sys.stderr)
+    print(f"{total} filas en {duracion:.2f} s ({total / duracion if duracion else 0:.0f} filas/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Los módulos están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import referencias  # noqa: E402
+
+# Tablas sintéticas con el formato de los JSON de la OMS, generadas con L y S conocidos
+# para poder comprobar los puntajes: (indicador, tabla) -> (L, S). Las columnas _L, _M y
+# _S se escriben solo si se piden, como en las tablas que no las traen
+LMS_CONOCIDOS = {
+    ('peso', '0_5'): (0.1, 0.11),
+    ('talla', '0_5'): (1.0, 0.04),
+    ('peso', '5_10'): (-0.5, 0.13),
+    ('talla', '5_19'): (1.0, 0.045),
+    ('imc', '0_5'): (-0.3, 0.08),
+    ('imc', '5_19'): (-1.5, 0.11),
+}
+
+
+def curva(mediana, l, s, z):
+    return float(mediana * (1 + l * s * z) ** (1 / l))
+
+def parametros(indicador, m, l, s, lms):
+    return {f'{indicador}_L': l, f'{indicador}_M': m, f'{indicador}_S': s} if lms else {}
+
+def tabla_anios(indicador, edades, mediana, l, s, lms):
+    filas = []
+    for edad in edades:
+        m = mediana(edad)
+        fila = {'edad': float(edad), indicador: m, **parametros(indicador, m, l, s, lms)}
+        for z, sufijo in referencias.SUFIJOS_DESVIACION.items():
+            if z:
+                fila[indicador + sufijo] = curva(m, l, s, z)
+        filas.append(fila)
+    return {'datos': filas}
+
+def escribir_tablas(directorio, lms=True):
+    for genero, factor in ((1, 1.0), (2, 0.95)):
+        base = referencias.nombre_base(genero)
+        filas = []
+        for meses in range(61):
+            peso = factor * (3.3 + 8 * np.log1p(meses / 3))
+            talla = factor * (50 + 22 * np.log1p(meses / 6))
+            fila = {'edad': meses, 'peso': peso, 'talla': talla,
+                    **parametros('peso', peso, *LMS_CONOCIDOS['peso', '0_5'], lms),
+                    **parametros('talla', talla, *LMS_CONOCIDOS['talla', '0_5'], lms)}
+            for z, sufijo in ((2, 'max'), (-2, 'min'), (3, 'max3'), (-3, 'min3')):
+                fila[f'peso_{sufijo}'] = curva(peso, *LMS_CONOCIDOS['peso', '0_5'], z)
+                fila[f'talla_{sufijo}'] = curva(talla, *LMS_CONOCIDOS['talla', '0_5'], z)
+            filas.append(fila)
+        tablas = {
+            f'{base}.json': {'datos': filas},
+            f'{base}_peso_5_10.json': tabla_anios('peso', np.round(np.arange(5, 10.01, 1 / 12), 4),
+                                                  lambda a: factor * (18 + 3 * (a - 5)), *LMS_CONOCIDOS['peso', '5_10'], lms),
+            f'{base}_talla_5_19.json': tabla_anios('talla', np.round(np.arange(5, 19.01, 1 / 12), 4),
+                                                   lambda a: factor * (110 + 5.5 * (a - 5)),
+                                                   *LMS_CONOCIDOS['talla', '5_19'], lms),
+            f'imc_{base}_0_5.json': tabla_anios('imc', range(61), lambda m: 13 + 4 * np.exp(-((m - 9) / 10) ** 2),
+                                                *LMS_CONOCIDOS['imc', '0_5'], lms),
+            f'imc_{base}_5_19.json': tabla_anios('imc', np.round(np.arange(5, 19.01, 1 / 12), 4),
+                                                 lambda a: 15.3 + 0.5 * (a - 5), *LMS_CONOCIDOS['imc', '5_19'], lms),
+        }
+        for nombre, contenido in tablas.items():
+            with open(os.path.join(directorio, nombre), 'w', encoding='utf-8') as archivo:
+                json.dump(contenido, archivo)
+
+
+@pytest.fixture(scope='session')
+def directorio_tablas(tmp_path_factory):
+    # Directorio de trabajo con datos/ como el del servidor, se compila una vez por sesión
+    raiz = tmp_path_factory.mktemp('referencias')
+    os.makedirs(raiz / referencias.DIRECTORIO_DATOS)
+    escribir_tablas(raiz / referencias.DIRECTORIO_DATOS)
+    return raiz
+
+@pytest.fixture(scope='session')
+def directorio_tablas_sin_lms(tmp_path_factory):
+    raiz = tmp_path_factory.mktemp('referencias_sin_lms')
+    os.makedirs(raiz / referencias.DIRECTORIO_DATOS)
+    escribir_tablas(raiz / referencias.DIRECTORIO_DATOS, lms=False)
+    return raiz
+
+@pytest.fixture
+def ref(directorio_tablas, monkeypatch):
+    # Las referencias se leen de datos/ relativo al directorio actual
+    monkeypatch.chdir(directorio_tablas)
+    return referencias.cargar(1)
@@ -0,0 +1,41 @@
+import pytest
+
+import base_datos
+
+
+class CursorRegistro:
+
+    def __init__(self, preparadas=()):
+        self.connection = type('Conexion', (), {'sentencias_preparadas': frozenset(preparadas)})()
+        self.ejecutadas = []
+
+    def execute(self, consulta, parametros=None):
+        self.ejecutadas.append((consulta, parametros))
+
+
+def test_texto_preparado():
+    consulta = 'SELECT * FROM t WHERE a = %s AND b = ANY(%s);\n'
+    assert base_datos.texto_preparado(consulta) == 'SELECT * FROM t WHERE a = $1 AND b = ANY($2)'
+
+def test_ejecutar_usa_la_sentencia_preparada():
+    cursor = CursorRegistro({'signos_vitales'})
+    base_datos.ejecutar(cursor, 'signos_vitales', 'SELECT %s', ('123',))
+    consulta, parametros = cursor.ejecutadas[0]
+    assert 'EXECUTE' in repr(consulta) and 'signos_vitales' in repr(consulta)
+    assert parametros == ('123',)
+
+def test_ejecutar_sin_preparar():
+    cursor = CursorRegistro()
+    base_datos.ejecutar(cursor, 'signos_vitales', 'SELECT %s', ('123',))
+    assert cursor.ejecutadas == [('SELECT %s', ('123',))]
+
+def test_pool_agotado():
+    # Sin conexiones abiertas (mínimo 0), solo se ocupa el único turno
+    pool = base_datos.PoolConexiones({'dbname': 'sin_servidor'}, minimo=0, maximo=1, espera_maxima=0.05)
+    assert pool.libres.acquire(timeout=1)
+    with pytest.raises(base_datos.PoolAgotado):
+        with pool.conexion():
+            pass
+    assert pool.estadisticas()['agotados'] == 1
+    pool.libres.release()
+    pool.cerrar()
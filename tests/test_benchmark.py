@@ -0,0 +1,40 @@
+import json
+
+import benchmark
+
+
+def test_medir_cuenta_llamadas():
+    llamadas = []
+    medida = benchmark.medir(lambda: llamadas.append(1), repeticiones=3, tiempo_minimo=0.001)
+    assert medida['repeticiones'] == 3 and medida['numero'] >= 1
+    assert medida['minimo'] <= medida['mediana']
+    assert len(llamadas) >= 3 * medida['numero']
+
+def test_etapas_se_ejecutan(ref):
+    etapas = benchmark.etapas('lactante')
+    assert set(etapas) == {'consulta', 'ingesta', 'referencias', 'interpolacion', 'clasificacion',
+                           'clasificacion_lms', 'colores', 'figura', 'write_html'}
+    assert etapas['consulta']()
+    for etapa in ('ingesta', 'interpolacion', 'clasificacion', 'clasificacion_lms', 'colores'):
+        etapas[etapa]()
+
+def test_sin_lms_no_se_mide(directorio_tablas_sin_lms, monkeypatch):
+    monkeypatch.chdir(directorio_tablas_sin_lms)
+    benchmark.curvas.cargar_referencias.cache_clear()
+    try:
+        assert 'clasificacion_lms' not in benchmark.etapas('lactante')
+    finally:
+        benchmark.curvas.cargar_referencias.cache_clear()
+
+def test_guardar_y_comparar(ref, tmp_path, capsys):
+    ruta = str(tmp_path / 'anterior.json')
+    benchmark.main(['--perfiles', 'lactante', '--etapas', 'ingesta', '--repeticiones', '2',
+                    '--tiempo-minimo', '0.001', '--guardar', ruta])
+    with open(ruta, encoding='utf-8') as archivo:
+        guardado = json.load(archivo)
+    assert set(guardado['resultados']['lactante']) == {'ingesta'}
+    assert guardado['entorno']['python']
+    benchmark.main(['--perfiles', 'lactante', '--etapas', 'ingesta', '--repeticiones', '2',
+                    '--tiempo-minimo', '0.001', '--comparar', ruta])
+    tabla = capsys.readouterr().out
+    assert 'anterior' in tabla and tabla.rstrip().endswith('x')
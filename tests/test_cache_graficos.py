@@ -0,0 +1,86 @@
+import datetime
+import os
+import threading
+
+import pytest
+
+import cache_graficos
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # La frescura sale de un diccionario en vez de la base de datos
+    frescura = {'1234567890': (1, datetime.date(2024, 3, 1), 41, 120)}
+    monkeypatch.setattr(cache_graficos, 'consultar_frescura', lambda conn, cedula: frescura.get(cedula))
+    monkeypatch.setattr(cache_graficos, 'version_referencias', lambda genero: 'referencias-1')
+    cache = cache_graficos.CacheGraficos(str(tmp_path))
+    cache.frescura = frescura
+    return cache
+
+
+def test_clave_estable(cache):
+    assert cache.clave(None, '1234567890') == cache.clave(None, '1234567890')
+    assert cache.clave(None, '1234567890') != cache.clave(None, '1234567890', formato='png')
+
+def test_clave_cambia_con_una_consulta_nueva(cache):
+    anterior = cache.clave(None, '1234567890')
+    cache.frescura['1234567890'] = (1, datetime.date(2024, 5, 2), 57, 123)
+    assert cache.clave(None, '1234567890') != anterior
+
+def test_clave_cambia_con_un_signo_nuevo_en_la_misma_consulta(cache):
+    anterior = cache.clave(None, '1234567890')
+    cache.frescura['1234567890'] = (1, datetime.date(2024, 3, 1), 41, 121)
+    assert cache.clave(None, '1234567890') != anterior
+
+def test_clave_cambia_con_la_version_del_codigo(cache, monkeypatch):
+    anterior = cache.clave(None, '1234567890')
+    monkeypatch.setattr(cache_graficos, 'VERSION_CODIGO', 'otra-version')
+    assert cache.clave(None, '1234567890') != anterior
+
+def test_clave_cambia_con_las_referencias(cache, monkeypatch):
+    anterior = cache.clave(None, '1234567890')
+    monkeypatch.setattr(cache_graficos, 'version_referencias', lambda genero: 'referencias-2')
+    assert cache.clave(None, '1234567890') != anterior
+
+def test_version_codigo():
+    assert cache_graficos.calcular_version_codigo() == cache_graficos.VERSION_CODIGO
+    assert len(cache_graficos.VERSION_CODIGO) == 16
+    # La rejilla diaria también decide los puntajes guardados
+    assert 'rejilla.py' in cache_graficos.MODULOS_CODIGO
+
+
+def test_obtener_y_guardar(cache):
+    clave = cache.clave(None, '1234567890')
+    assert cache.obtener(clave) is None
+    cache.guardar(clave, '<html></html>')
+    assert cache.obtener(clave) == '<html></html>'
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+def test_contadores_con_hilos(cache):
+    clave = cache.clave(None, '1234567890')
+    cache.guardar(clave, 'contenido')
+
+    def consultar():
+        for _ in range(2000):
+            cache.obtener(clave)
+            cache.obtener('0' * 64)
+
+    hilos = [threading.Thread(target=consultar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    estadisticas = cache.estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos']) == (16000, 16000)
+    assert estadisticas['tasa_aciertos'] == 0.5
+
+def test_desalojo_lru(tmp_path):
+    cache = cache_graficos.CacheGraficos(str(tmp_path), capacidad=2)
+    claves = [f'{numero:064x}' for numero in range(3)]
+    for numero, clave in enumerate(claves):
+        cache.guardar(clave, str(numero))
+        os.utime(cache.ruta(clave), ns=(numero * 10**9, numero * 10**9))
+    cache.guardar(f'{3:064x}', '3')
+    assert cache.obtener(claves[0]) is None and cache.obtener(claves[1]) is None
+    assert cache.obtener(claves[2]) == '2'
+    assert cache.desalojos == 2
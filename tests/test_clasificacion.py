@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+import clasificacion
+import referencias
+from conftest import LMS_CONOCIDOS, curva
+
+Z = np.array([-2.7, -1.0, 0.0, 0.4, 1.9, 2.9])
+
+
+@pytest.mark.parametrize('indicador, tabla, meses, mediana', [
+    ('peso', '0_5', 12.0, 3.3 + 8 * np.log1p(12 / 3)),
+    ('talla', '0_5', 30.0, 50 + 22 * np.log1p(30 / 6)),
+    ('peso', '5_10', 84.0, 18 + 3 * 2),
+    ('imc', '5_19', 120.0, 15.3 + 0.5 * 5),
+])
+def test_puntaje_lms_en_nodos_conocidos(ref, indicador, tabla, meses, mediana):
+    l, s = LMS_CONOCIDOS[indicador, tabla]
+    valores = [curva(mediana, l, s, z) for z in Z]
+    puntajes = clasificacion.puntaje_lms(ref, indicador, np.full(len(Z), meses), valores)
+    np.testing.assert_allclose(puntajes, Z, atol=1e-6)
+
+def test_cola_restringida_mas_alla_de_3(ref):
+    # Peso: fuera de +-3 el puntaje avanza en unidades de la distancia entre las curvas 2 y 3
+    mediana = 3.3 + 8 * np.log1p(12 / 3)
+    l, s = LMS_CONOCIDOS['peso', '0_5']
+    mas2, mas3 = curva(mediana, l, s, 2), curva(mediana, l, s, 3)
+    menos2, menos3 = curva(mediana, l, s, -2), curva(mediana, l, s, -3)
+    valores = [mas3 + 0.5 * (mas3 - mas2), menos3 - 0.25 * (menos2 - menos3), mas3, menos3]
+    puntajes = clasificacion.puntaje_lms(ref, 'peso', np.full(4, 12.0), valores)
+    np.testing.assert_allclose(puntajes, [3.5, -3.25, 3.0, -3.0], atol=1e-6)
+
+def test_talla_sin_cola_restringida(ref):
+    mediana = 50 + 22 * np.log1p(30 / 6)
+    l, s = LMS_CONOCIDOS['talla', '0_5']
+    valores = [curva(mediana, l, s, z) for z in (3.5, -4.0)]
+    puntajes = clasificacion.puntaje_lms(ref, 'talla', np.full(2, 30.0), valores)
+    np.testing.assert_allclose(puntajes, [3.5, -4.0], atol=1e-6)
+
+def test_puntaje_lms_fuera_de_las_tablas(ref):
+    puntajes = clasificacion.puntaje_lms(ref, 'peso', [130.0], [30.0])
+    assert np.isnan(puntajes).all()
+
+def test_lms_sin_columnas_de_la_oms(directorio_tablas_sin_lms, monkeypatch):
+    monkeypatch.chdir(directorio_tablas_sin_lms)
+    ref = referencias.cargar(1)
+    with pytest.raises(ValueError, match='metodo = lms'):
+        clasificacion.clasificar(ref, 'peso', [12.0], [10.0], 'lms')
+    estados, _ = clasificacion.clasificar(ref, 'peso', [12.0], [10.0], 'curvas')
+    assert estados[0] != clasificacion.DESCONOCIDO
+
+
+def test_estados_puntaje():
+    estados = clasificacion.estados_puntaje(np.array([0.0, 2.0, -2.5, 3.0, 3.1, -3.1, np.nan]))
+    esperados = [clasificacion.NORMAL, clasificacion.NORMAL, clasificacion.ALERTA, clasificacion.ALERTA,
+                 clasificacion.ALTO, clasificacion.BAJO, clasificacion.DESCONOCIDO]
+    np.testing.assert_array_equal(estados, esperados)
+
+
+def test_banda_edad_incluye_el_limite_superior():
+    bandas = clasificacion.banda_edad('peso', [0.0, 6.0, 6.01, 60.0, 120.0, 121.0])
+    np.testing.assert_array_equal(bandas, [0, 0, 1, 2, 3, 4])
+
+def test_puntaje_z_entre_curvas():
+    desviaciones = np.arange(-3, 4, dtype=float)
+    # Una sola edad, curvas separadas 1 kg desde 7 hasta 13
+    lineas = (10 + desviaciones)[:, None] * np.ones((1, 5))
+    valores = np.array([10.0, 11.5, 13.0, 14.5, 6.0])
+    np.testing.assert_allclose(clasificacion.puntaje_z(desviaciones, lineas, valores), [0, 1.5, 3, 4.5, -4])
+
+def test_estados_lineas():
+    desviaciones = np.array([-3, -2, 0, 2, 3], dtype=float)
+    lineas = np.array([7, 8, 10, 12, 13], dtype=float)[:, None] * np.ones((1, 6))
+    valores = np.array([10.0, 12.0, 12.5, 13.5, 7.5, 6.0])
+    esperados = [clasificacion.NORMAL, clasificacion.NORMAL, clasificacion.ALERTA, clasificacion.ALTO,
+                 clasificacion.ALERTA, clasificacion.BAJO]
+    np.testing.assert_array_equal(clasificacion.estados_lineas(desviaciones, lineas, valores), esperados)
+
+def test_clasificar_curvas_igual_que_punto_a_punto(ref):
+    # El motor vectorizado da lo mismo que evaluar las curvas de la banda de cada punto
+    generador = np.random.default_rng(3)
+    meses = generador.uniform(0, 119, 300)
+    valores = generador.uniform(2, 45, 300)
+    estados, puntajes = clasificacion.clasificar(ref, 'peso', meses, valores, 'curvas')
+    bandas = clasificacion.banda_edad('peso', meses)
+    for mes, valor, banda, estado, puntaje in zip(meses, valores, bandas, estados, puntajes):
+        rango, _, divisor = clasificacion.RANGOS['peso'][banda]
+        desviaciones, lineas = clasificacion.lineas_desviacion(ref, 'peso', rango, np.array([mes / divisor]))
+        assert estado == clasificacion.estados_lineas(desviaciones, lineas, np.array([valor]))[0]
+        assert puntaje == pytest.approx(clasificacion.puntaje_z(desviaciones, lineas, np.array([valor]))[0])
+
+def test_clasificar_fuera_de_las_tablas(ref):
+    estados, puntajes = clasificacion.clasificar(ref, 'peso', [130.0], [30.0], 'curvas')
+    assert estados[0] == clasificacion.DESCONOCIDO and np.isnan(puntajes[0])
@@ -0,0 +1,42 @@
+import numpy as np
+
+import clasificacion
+import colores
+
+
+def test_mitades():
+    # La mitad inferior va de -2 a 0 y la superior de 0 a +2, aunque no sean simétricas
+    inferior, ideal, superior = 8.0, 10.0, 14.0
+    v = np.array([8.0, 9.0, 10.0, 12.0, 14.0, 16.0])
+    np.testing.assert_allclose(colores.mitades(v, inferior, ideal, superior), [0.0, 0.25, 0.5, 0.75, 1.0, 1.25])
+
+def test_mitades_por_medicion():
+    posicion = colores.mitades(np.array([5.0, 30.0]), np.array([4.0, 20.0]), np.array([6.0, 25.0]),
+                               np.array([7.0, 35.0]))
+    np.testing.assert_allclose(posicion, [0.25, 0.75])
+
+
+def test_degradado():
+    assert len(colores.DEGRADADO) == colores.NIVELES
+    assert colores.DEGRADADO[0] == colores.start_color
+    assert colores.DEGRADADO[-1] == colores.end_color
+
+def test_asignar_colores(ref):
+    # Sobre la mediana el color del centro, fuera de las tablas el color sin referencia
+    meses = np.array([12.0, 12.0, 12.0, 130.0])
+    mediana = ref.polinomio_peso_6_24(12.0)
+    valores = np.array([mediana, ref.polinomio_peso_menos2_6_24(12.0) - 1, ref.polinomio_peso_mas2_6_24(12.0) + 1,
+                        30.0])
+    asignados = colores.asignar_colores(ref, 'peso', meses, valores, 'curvas')
+    assert asignados[0] == colores.DEGRADADO[colores.NIVELES // 2]
+    assert asignados[1] == colores.start_color
+    assert asignados[2] == colores.end_color
+    assert asignados[3] == colores.color_sin_referencia
+
+def test_posicion_lms_desde_el_puntaje(ref):
+    # -2 es 0, la mediana 0.5 y +2 es 1
+    edades, (l, m, s) = clasificacion.tabla_lms(ref, 'peso')
+    parametros = [float(np.interp(12.0, edades, serie)) for serie in (l, m, s)]
+    valores = clasificacion.valor_lms(*parametros, np.array([-2.0, 0.0, 2.0]))
+    posicion = colores.posicion_normalizada(ref, 'peso', np.full(3, 12.0), valores, 'lms')
+    np.testing.assert_allclose(posicion, [0, 0.5, 1], atol=1e-6)
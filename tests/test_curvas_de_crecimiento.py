@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import curvas_de_crecimiento as curvas
+import sinteticos
+
+
+@pytest.fixture
+def paciente(ref):
+    historias = sinteticos.historias('lactante', 1, 0)
+    return sinteticos.ConexionSimulada(historias), next(iter(historias))
+
+
+def test_escribir_atomico(tmp_path):
+    ruta = tmp_path / 'grafico.html'
+    ruta.write_text('anterior')
+    curvas.escribir_atomico('nuevo', str(ruta))
+    assert ruta.read_text() == 'nuevo'
+    assert os.listdir(tmp_path) == ['grafico.html']
+
+def test_ruta_unica(tmp_path):
+    rutas = {curvas.ruta_unica(str(tmp_path), '../12 34', 'json') for _ in range(20)}
+    assert len(rutas) == 20
+    for ruta in rutas:
+        assert os.path.dirname(ruta) == str(tmp_path)
+        assert os.path.basename(ruta).startswith('grafico____12_34_') and ruta.endswith('.json')
+
+def test_salida_unico(paciente, tmp_path, capsys):
+    conn, cedula = paciente
+    args = curvas.leer_argumentos([cedula, '--formato', 'json', '--unico', str(tmp_path)])
+    curvas.generar_y_escribir(args, conn=conn)
+    ruta = capsys.readouterr().out.strip()
+    assert os.path.dirname(ruta) == str(tmp_path)
+    with open(ruta, encoding='utf-8') as archivo:
+        assert json.load(archivo)['data']
+
+def test_salida_descriptor(paciente, tmp_path):
+    conn, cedula = paciente
+    lector, escritor = os.pipe()
+    args = curvas.leer_argumentos([cedula, '--formato', 'paciente', '--fd', str(escritor)])
+    curvas.generar_y_escribir(args, conn=conn)
+    with os.fdopen(lector, encoding='utf-8') as archivo:
+        assert json.load(archivo)['data']
+
+def test_salida_stdout(directorio_tablas):
+    # La línea de comandos completa, con un paciente sintético en vez de la base de datos
+    programa = os.path.join(os.path.dirname(os.path.abspath(curvas.__file__)), 'curvas_de_crecimiento.py')
+    salida = subprocess.run([sys.executable, programa, '--sintetico', 'lactante', '--formato', 'json', '--stdout'],
+                            cwd=directorio_tablas, capture_output=True, text=True, check=True).stdout
+    assert json.loads(salida)['data']
+
+
+def test_fragmento_usa_plotlyjs_servido(paciente):
+    conn, cedula = paciente
+    figura = curvas.generar_grafico(cedula, conn)
+    fragmento = curvas.renderizar(figura, 'fragmento', '/js/plotly.min.js')
+    assert 'src="/js/plotly.min.js"' in fragmento
+    assert '<html' not in fragmento
+    assert len(fragmento) * 5 < len(curvas.renderizar(figura, 'html'))
+
+def test_exportar_plotlyjs(tmp_path):
+    ruta = curvas.exportar_plotlyjs(str(tmp_path / 'js' / 'plotly.min.js'))
+    assert os.path.getsize(ruta) > 1_000_000
+
+
+def test_capas_paciente_y_referencia(paciente):
+    # La capa de referencia y la del paciente juntas tienen las trazas de la figura completa
+    conn, cedula = paciente
+    genero = 2 if conn.historias[cedula][0][2] == 2 else 1
+    completa = curvas.generar_grafico(cedula, conn)
+    referencia = curvas.construir_figura([], genero, curvas.CAPA_REFERENCIA)
+    capa = json.loads(curvas.renderizar(curvas.generar_grafico(cedula, conn, curvas.CAPA_PACIENTE), 'paciente'))
+    del_paciente = [traza for traza in completa.data if traza.meta == curvas.CAPA_PACIENTE]
+    assert len(capa['data']) == len(del_paciente) > 0
+    assert all(traza.meta != curvas.CAPA_PACIENTE for traza in referencia.data)
+    assert len(referencia.data) + len(del_paciente) == len(completa.data)
+    version = curvas.cargar_referencias(genero).version
+    assert capa['referencia'] == curvas.nombre_capa_referencia(genero, version)
+    ruta = os.path.join(curvas.leer_directorio_referencias(), capa['referencia'])
+    with open(ruta, encoding='utf-8') as archivo:
+        assert len(json.load(archivo)['data']) == len(referencia.data)
+
+
+def test_bandas_un_poligono_sin_guias_ocultas(paciente):
+    conn, cedula = paciente
+    figura = curvas.construir_figura(conn.historias[cedula])
+    rellenos = [traza for traza in figura.data if traza.fill]
+    bandas = sum(len(panel['tablas']) * len(panel['bandas']) for panel in curvas.PANELES_GRAFICO)
+    assert len(rellenos) == bandas
+    assert all(traza.fill == 'toself' for traza in rellenos)
+    # Cada polígono va por la curva inferior y vuelve por la superior
+    x = rellenos[0].x
+    assert len(x) % 2 == 0 and list(x[:len(x) // 2]) == list(x[len(x) // 2:][::-1])
+    assert all(traza.visible is not False for traza in figura.data)
+
+def test_guias_solo_si_se_piden(paciente):
+    conn, cedula = paciente
+    sin_guias = curvas.construir_figura(conn.historias[cedula])
+    con_guias = curvas.construir_figura(conn.historias[cedula], guias=True)
+    ocultas = [traza for traza in con_guias.data if traza.visible is False]
+    assert len(ocultas) == len(curvas.GUIAS) * len(curvas.PANELES_GRAFICO)
+    assert len(con_guias.data) - len(sin_guias.data) == len(ocultas)
+
+
+def test_seleccionar_paneles(paciente):
+    conn, cedula = paciente
+    mediciones = curvas.ingesta.ingerir(conn.historias[cedula])
+    assert curvas.seleccionar_paneles(mediciones) == list(curvas.PANELES_GRAFICO)
+    elegidos = curvas.seleccionar_paneles(mediciones, ['imc_0_5', 'peso_0_6'])
+    # En el orden de PANELES_GRAFICO, no en el pedido
+    assert [curvas.id_panel(panel) for panel in elegidos] == ['peso_0_6', 'imc_0_5']
+    with pytest.raises(ValueError):
+        curvas.seleccionar_paneles(mediciones, ['peso_0_6', 'peso_99'])
+
+def test_paneles_auto_del_paciente(paciente):
+    conn, cedula = paciente
+    mediciones = curvas.ingesta.ingerir(conn.historias[cedula])
+    automaticos = curvas.seleccionar_paneles(mediciones, 'auto')
+    assert 0 < len(automaticos) < len(curvas.PANELES_GRAFICO)
+    for panel in automaticos:
+        meses, _, _, _ = curvas.ingesta.panel(mediciones, panel['indicador'], panel['rango'])
+        edad = curvas.ingesta.edad_actual_meses(mediciones)
+        assert len(meses) or curvas.ingesta.panel_de_edad(panel['indicador'], edad) == panel['rango']
+
+def test_figura_con_paneles_elegidos(paciente):
+    conn, cedula = paciente
+    figura = curvas.construir_figura(conn.historias[cedula], paneles=['talla_0_6', 'imc_0_5', 'peso_6_24'])
+    textos = {anotacion.text for anotacion in figura.layout.annotations}
+    genero = 'Niñas' if conn.historias[cedula][0][2] == 2 else 'Niños'
+    titulos = {curvas.id_panel(panel): panel['titulo'].format(genero) for panel in curvas.PANELES_GRAFICO}
+    assert {id_ for id_, titulo in titulos.items() if titulo in textos} == {'talla_0_6', 'imc_0_5', 'peso_6_24'}
+    assert figura.layout.height == curvas.ALTO_FILA * 2
+
+def test_lista_paneles():
+    assert curvas.lista_paneles('auto') == 'auto'
+    assert curvas.lista_paneles(' peso_0_6, imc_5_19 ') == ['peso_0_6', 'imc_5_19']
+    for texto in ('peso_0_6,talla', ','):
+        with pytest.raises(argparse.ArgumentTypeError):
+            curvas.lista_paneles(texto)
+
+def test_variante_paneles():
+    assert curvas.variante_paneles(None) == curvas.variante_paneles('todos') == ''
+    assert curvas.variante_paneles(['imc_0_5', 'peso_0_6']) == '|peso_0_6,imc_0_5'
+    assert curvas.variante_paneles('auto').startswith('|auto:')
+
+
+def test_variante_con_y_sin_rejilla(monkeypatch):
+    # Lo guardado con la rejilla no se sirve al desactivarla
+    class CacheVariantes:
+        def __init__(self):
+            self.variantes = []
+
+        def clave(self, conn, cedula, formato, variante):
+            self.variantes.append(variante)
+            return variante
+
+        def obtener(self, clave, formato):
+            return 'guardado'
+
+    cache = CacheVariantes()
+    for activa in (True, False):
+        monkeypatch.setattr(curvas.rejilla, 'leer_activa', lambda ruta='config.ini': activa)
+        assert curvas.obtener_contenido('1234567890', None, cache=cache) == 'guardado'
+    assert cache.variantes[0] != cache.variantes[1]
+
+def test_tipo_traza_por_umbral(paciente):
+    conn, cedula = paciente
+    mediciones = curvas.ingesta.ingerir(conn.historias[cedula])
+    n = len(mediciones.valores)
+    assert curvas.tipo_traza(mediciones, n) is curvas.go.Scatter
+    assert curvas.tipo_traza(mediciones, n - 1) is curvas.go.Scattergl
+    assert curvas.tipo_traza(mediciones, None) is curvas.go.Scatter
+
+def test_figura_webgl_completa(paciente):
+    # Sobre el umbral pasa toda la figura, no solo los puntos del paciente
+    conn, cedula = paciente
+    figura = curvas.construir_figura(conn.historias[cedula], webgl=0)
+    assert {traza.type for traza in figura.data} == {'scattergl'}
+    svg = curvas.construir_figura(conn.historias[cedula], webgl=None)
+    assert {traza.type for traza in svg.data} == {'scatter'}
+    assert len(svg.data) == len(figura.data)
+
+def test_leer_umbral_webgl(tmp_path):
+    ruta = tmp_path / 'config.ini'
+    assert curvas.leer_umbral_webgl(str(ruta)) == curvas.UMBRAL_WEBGL
+    ruta.write_text('[salida]\nwebgl = 50\n', encoding='utf-8')
+    assert curvas.leer_umbral_webgl(str(ruta)) == 50
+    ruta.write_text('[salida]\nwebgl =\n', encoding='utf-8')
+    assert curvas.leer_umbral_webgl(str(ruta)) is None
+
+
+def test_psycopg2_diferido():
+    # Importar el módulo (y construir capas sin base de datos) no carga psycopg2
+    directorio = os.path.dirname(os.path.abspath(curvas.__file__))
+    codigo = 'import sys, curvas_de_crecimiento, lote, extraccion; print("psycopg2" in sys.modules)'
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=directorio, capture_output=True, text=True,
+                            check=True).stdout
+    assert salida.strip() == 'False'
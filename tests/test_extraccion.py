@@ -0,0 +1,52 @@
+import numpy as np
+
+import curvas_de_crecimiento as curvas
+import extraccion
+
+
+class CursorCopia:
+    def __init__(self, texto):
+        self.texto = texto
+
+    def copy_expert(self, consulta, archivo):
+        archivo.write(self.texto.encode('utf-8'))
+
+    def close(self):
+        pass
+
+class ConexionCopia:
+    def __init__(self, texto):
+        self.texto = texto
+
+    def cursor(self):
+        return CursorCopia(self.texto)
+
+
+def test_misma_regla_de_signos_repetidos():
+    assert curvas.SIGNOS_POR_CONSULTA in extraccion.consulta_copia
+
+def test_bloque_tolerante():
+    lineas = ['10\t2\t100\t10.5\t0.8\t\\N\n',
+              '11\t1\t400\tabc\t80\t15\n',
+              '12\t1\t\\N\t10\t80\t15\n']
+    bloque = extraccion.procesar_bloque(lineas)
+    # 'abc' y la consulta sin fecha se descartan sin abortar, \N no cuenta como leído
+    assert bloque['leidas'] == 8
+    assert bloque['paciente'].tolist() == ['10', '10', '11', '11']
+    assert bloque['signo'].tolist() == [3, 5, 5, 7]
+    assert bloque['valor'].tolist() == [10.5, 80.0, 80.0, 15.0]
+    assert bloque['sexo'].tolist() == [2, 2, 1, 1]
+    assert bloque['dias'].tolist() == [100, 100, 400, 400]
+
+def test_cedula_larga_no_se_trunca():
+    cedula = '9' * 60
+    bloque = extraccion.procesar_bloque([f'{cedula}\t1\t30\t4\t\\N\t\\N\n'])
+    assert bloque['paciente'].tolist() == [cedula]
+
+def test_extraer_bloques():
+    texto = ''.join(f'{i}\t1\t{30 + i}\t4\t52\t\\N\n' for i in range(5))
+    bloques = list(extraccion.extraer_bloques(ConexionCopia(texto), tamano_bloque=2))
+    assert [len(np.unique(bloque['paciente'])) for bloque in bloques] == [2, 2, 1]
+    leidas, validas, conteos = extraccion.resumir(iter(bloques))
+    assert (leidas, validas) == (10, 10)
+    assert conteos['peso'].sum() == 5 and conteos['imc'].sum() == 0
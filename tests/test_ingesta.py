@@ -0,0 +1,56 @@
+from datetime import date
+
+import numpy as np
+
+import ingesta
+
+PESO, TALLA, IMC = (ingesta.CODIGOS[indicador] for indicador in ('peso', 'talla', 'imc'))
+
+
+def test_corregir_unidades_talla_en_metros():
+    signos = np.array([PESO, TALLA, TALLA, IMC, TALLA])
+    valores = np.array([2.5, 1.234, 150.0, 1.5, 0.987])
+    np.testing.assert_array_equal(ingesta.corregir_unidades(signos, valores), [2.5, 123.4, 150.0, 1.5, 98.7])
+
+def test_mascara_plausible():
+    signos = np.array([PESO, PESO, PESO, TALLA, TALLA, TALLA, IMC, IMC, IMC, 9])
+    valores = np.array([1.0, 60.0, 60.5, 40.0, 39.9, 200.0, 9.0, 40.0, 41.0, 20.0])
+    esperada = [True, True, False, True, False, True, True, True, False, False]
+    np.testing.assert_array_equal(ingesta.mascara_plausible(signos, valores), esperada)
+
+
+def test_ingerir():
+    nacimiento = date(2020, 1, 1)
+    resultados = [
+        (1, '10', 1, date(2020, 1, 31), nacimiento, '4.2', '0.55', None),
+        (2, '10', 1, date(2020, 7, 1), nacimiento, '7.5', '200.5', '17'),
+        (3, '10', 2, date(2022, 1, 1), nacimiento, '12', '86', '16.2'),
+    ]
+    mediciones = ingesta.ingerir(resultados)
+    # La talla en metros se corrige, la de 200.5 queda fuera del umbral, el IMC vacío no cuenta
+    assert mediciones.genero == 2
+    assert mediciones.signos.tolist() == [PESO, TALLA, PESO, IMC, PESO, TALLA, IMC]
+    assert mediciones.valores.tolist() == [4.2, 55.0, 7.5, 17.0, 12.0, 86.0, 16.2]
+    assert mediciones.dias.tolist() == [30, 30, 182, 182, 731, 731, 731]
+    np.testing.assert_allclose(mediciones.meses, mediciones.dias * ingesta.MESES_POR_DIA)
+
+    meses, valores, fechas, dias = ingesta.indicador(mediciones, 'peso')
+    assert valores.tolist() == [4.2, 7.5, 12.0]
+    assert fechas.tolist() == [fila[3] for fila in resultados]
+    assert dias.tolist() == [30, 182, 731]
+    _, valores, _, dias = ingesta.panel(mediciones, 'peso', '6_24')
+    assert valores.tolist() == [12.0] and dias.tolist() == [731]
+    _, valores, _, _ = ingesta.panel(mediciones, 'imc', '0_5')
+    assert valores.tolist() == [17.0, 16.2]
+    assert ingesta.edad_actual_meses(mediciones, '2021-01-01') == 366 * ingesta.MESES_POR_DIA
+
+def test_ingerir_sin_resultados():
+    mediciones = ingesta.ingerir([], genero=2)
+    assert mediciones.genero == 2 and len(mediciones.valores) == 0
+    assert ingesta.edad_actual_meses(mediciones) is None
+
+def test_panel_de_edad():
+    assert ingesta.panel_de_edad('peso', 6) == '0_6'
+    assert ingesta.panel_de_edad('peso', 6.1) == '6_24'
+    assert ingesta.panel_de_edad('imc', 100) == '5_19'
+    assert ingesta.panel_de_edad('peso', 121) is None
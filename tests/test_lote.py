@@ -0,0 +1,62 @@
+import io
+import os
+
+import pytest
+
+import lote
+import sinteticos
+
+
+@pytest.fixture
+def cohorte(ref):
+    historias = sinteticos.historias('preescolar', 4, 0)
+    cedulas = list(historias)
+    # Un paciente con un valor que no es número
+    historias[cedulas[1]] = [fila[:5] + ('abc',) + fila[6:] for fila in historias[cedulas[1]]]
+    return sinteticos.ConexionSimulada(historias), cedulas
+
+
+def test_leer_cedulas():
+    archivo = io.StringIO('3\n# comentario\n\n1\n 3 \n2\n1\n')
+    assert lote.leer_cedulas(archivo) == ['3', '1', '2']
+
+def test_agrupar_por_paciente():
+    filas = [(1, '10', 1), (2, '10', 1), (3, '12', 2)]
+    assert lote.agrupar_por_paciente(['10', '11', '12'], filas) == {
+        '10': filas[:2], '11': [], '12': filas[2:]}
+
+
+def test_puntajes_sigue_con_un_paciente_invalido(cohorte):
+    conn, cedulas = cohorte
+    errores = []
+    filas = list(lote.ejecutar_lote(conn, cedulas, 'puntaje', procesos=2, tamano_bloque=3, errores=errores))
+    assert errores == [cedulas[1]]
+    assert {fila[0] for fila in filas} == set(cedulas) - {cedulas[1]}
+    assert {fila[2] for fila in filas} == {'peso', 'talla', 'imc'}
+
+def test_bloque_con_consulta_fallida(cohorte, monkeypatch):
+    conn, cedulas = cohorte
+    consultar = lote.consultar_signos_vitales_lote
+
+    def fallar_primer_bloque(conexion, bloque):
+        if cedulas[0] in bloque:
+            raise RuntimeError('consulta cancelada')
+        return consultar(conexion, bloque)
+
+    monkeypatch.setattr(lote, 'consultar_signos_vitales_lote', fallar_primer_bloque)
+    errores = []
+    filas = list(lote.ejecutar_lote(conn, cedulas, 'puntaje', procesos=1, tamano_bloque=2, errores=errores))
+    assert errores == [cedulas[0], cedulas[1]]
+    assert {fila[0] for fila in filas} == set(cedulas[2:])
+
+def test_graficos_comparten_plotlyjs(cohorte, tmp_path):
+    conn, cedulas = cohorte
+    salida = tmp_path / 'graficos'
+    rutas = list(lote.ejecutar_lote(conn, [cedulas[0], cedulas[2]], 'grafico', str(salida), procesos=1))
+    assert sorted(os.listdir(salida)) == sorted([lote.nombre_archivo(cedulas[0]), lote.nombre_archivo(cedulas[2]),
+                                                 'plotly.min.js'])
+    for _, ruta in rutas:
+        with open(ruta, encoding='utf-8') as archivo:
+            contenido = archivo.read()
+        assert 'src="plotly.min.js"' in contenido
+        assert len(contenido) < 1_000_000
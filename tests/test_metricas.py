@@ -0,0 +1,86 @@
+import json
+import time
+import tracemalloc
+
+import pytest
+
+import metricas
+
+
+@pytest.fixture
+def activas(monkeypatch, tmp_path):
+    # Estado global del módulo, se restaura al terminar cada prueba
+    monkeypatch.setattr(metricas, '_activo', False)
+    monkeypatch.setattr(metricas, '_memoria', False)
+    monkeypatch.setattr(metricas, '_registro', None)
+    monkeypatch.setattr(metricas, '_prometheus', None)
+    monkeypatch.setattr(metricas, 'ACUMULADOS', {})
+    monkeypatch.setattr(metricas, 'SOLICITUDES', {'total': 0})
+    metricas.activar(registro=str(tmp_path / 'registro.jsonl'), prometheus=str(tmp_path / 'curvas.prom'))
+    return tmp_path
+
+
+def test_desactivadas_no_miden(monkeypatch):
+    monkeypatch.setattr(metricas, '_activo', False)
+    assert metricas.tramo('figura') is metricas.tramo('consulta')
+    with metricas.solicitud(formato='html'):
+        pass
+
+def test_tramos_anidados(activas):
+    with metricas.solicitud():
+        with metricas.tramo('figura'):
+            with metricas.tramo('ingesta'):
+                time.sleep(0.01)
+            with metricas.tramo('ingesta'):
+                pass
+        medidas = list(metricas.tramos())
+    assert [(medida.profundidad, medida.etapa) for medida in medidas] == [(2, 'ingesta'), (2, 'ingesta'), (1, 'figura')]
+    figura = medidas[-1]
+    assert figura.propio == pytest.approx(figura.pared - medidas[0].pared - medidas[1].pared)
+    assert figura.memoria is None
+    resumen = metricas.resumen(medidas)
+    assert resumen['ingesta']['llamadas'] == 2
+    assert resumen['ingesta']['pared_ms'] >= 10
+
+def test_solicitud_publica_registro_y_prometheus(activas):
+    for _ in range(2):
+        with metricas.solicitud(formato='paciente', cedula='1'):
+            with metricas.tramo('consulta'):
+                pass
+    lineas = (activas / 'registro.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(lineas) == 2
+    linea = json.loads(lineas[0])
+    assert linea['formato'] == 'paciente' and set(linea['etapas']) == {'consulta', 'total'}
+    assert linea['pared_ms'] == linea['etapas']['total']['pared_ms']
+    texto = (activas / 'curvas.prom').read_text(encoding='utf-8')
+    assert 'curvas_solicitudes_total 2\n' in texto
+    assert 'curvas_etapa_llamadas_total{etapa="consulta"} 2\n' in texto
+    assert not list(activas.glob('.metricas_*'))
+
+def test_etiqueta_prometheus_escapada(activas):
+    metricas.acumular([metricas.Medida(0, 'renderizado "html"', 0.5, 0.25, 0.5, None)])
+    assert 'curvas_etapa_segundos_total{etapa="renderizado \\"html\\""} 0.5' in metricas.texto_prometheus()
+
+def test_pico_de_memoria(activas):
+    ya_activo = tracemalloc.is_tracing()
+    metricas.activar(memoria=True)
+    try:
+        with metricas.solicitud():
+            with metricas.tramo('reserva'):
+                bloque = bytearray(2_000_000)
+            medida = metricas.tramos()[-1]
+        del bloque
+        assert medida.memoria >= 2_000_000
+    finally:
+        if not ya_activo:
+            tracemalloc.stop()
+
+def test_configurar(monkeypatch, tmp_path):
+    for nombre, valor in (('_activo', False), ('_memoria', False), ('_registro', None), ('_prometheus', None)):
+        monkeypatch.setattr(metricas, nombre, valor)
+    ruta = tmp_path / 'config.ini'
+    ruta.write_text('[metricas]\nactivo = 0\n', encoding='utf-8')
+    assert not metricas.configurar(str(ruta))
+    ruta.write_text('[metricas]\nactivo = 1\nregistro = /tmp/registro.jsonl\n', encoding='utf-8')
+    assert metricas.configurar(str(ruta))
+    assert metricas._registro == '/tmp/registro.jsonl'
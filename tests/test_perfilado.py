@@ -0,0 +1,59 @@
+import cProfile
+import pstats
+
+import pytest
+
+import perfilado
+
+
+def hoja():
+    return sum(range(20000))
+
+def rama():
+    for _ in range(50):
+        hoja()
+
+def raiz():
+    rama()
+    hoja()
+    return 'listo'
+
+
+@pytest.fixture(scope='module')
+def estadisticas():
+    perfil = cProfile.Profile()
+    perfil.runcall(raiz)
+    return pstats.Stats(perfil)
+
+def funciones(pila):
+    return [marco.split(':')[1] if ':' in marco else marco for marco in pila.split(';')]
+
+def total_us(estadisticas):
+    return sum(valores[3] for valores in estadisticas.stats.values() if not valores[4]) * 1e6
+
+
+def test_pilas_por_caller(estadisticas):
+    pilas = perfilado.pilas_colapsadas(estadisticas, 0)
+    caminos = {tuple(funciones(pila)): us for pila, us in pilas.items() if 'raiz' in pila}
+    assert ('raiz', 'rama', 'hoja') in caminos and ('raiz', 'hoja') in caminos
+    assert caminos['raiz', 'rama', 'hoja'] > 20 * caminos['raiz', 'hoja']
+    assert sum(pilas.values()) == pytest.approx(total_us(estadisticas), rel=1e-6)
+
+def test_llamadas_pequenas_se_suman_al_llamador(estadisticas):
+    # hoja desde raiz es 1/51 del total: no se abre, su tiempo queda en raiz
+    pilas = perfilado.pilas_colapsadas(estadisticas, 0.1)
+    caminos = [tuple(funciones(pila)) for pila in pilas if 'raiz' in pila]
+    assert ('raiz', 'hoja') not in caminos and ('raiz', 'rama', 'hoja') in caminos
+    assert sum(pilas.values()) == pytest.approx(total_us(estadisticas), rel=1e-6)
+    assert len(pilas) < len(perfilado.pilas_colapsadas(estadisticas, 0))
+
+def test_perfilar_escribe_archivos(tmp_path):
+    salida = tmp_path / 'salida.txt'
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        assert perfilado.perfilar(raiz, str(tmp_path / 'perfiles' / 'raiz'), 5, archivo) == 'listo'
+    pstats.Stats(str(tmp_path / 'perfiles' / 'raiz.pstats'))
+    lineas = (tmp_path / 'perfiles' / 'raiz.collapsed').read_text(encoding='utf-8').splitlines()
+    pilas = [linea.rsplit(' ', 1)[0] for linea in lineas]
+    assert len(pilas) == len(set(pilas)) > 0
+    assert all(int(linea.rsplit(' ', 1)[1]) > 0 for linea in lineas)
+    assert 'raiz.collapsed' in salida.read_text(encoding='utf-8')
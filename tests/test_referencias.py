@@ -0,0 +1,107 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import referencias
+from conftest import LMS_CONOCIDOS, escribir_tablas
+
+
+def test_lms_compilado_de_las_tablas(ref):
+    nodos, lms = ref.lms_peso_5_10a
+    l, s = LMS_CONOCIDOS['peso', '5_10']
+    assert ref.tiene_lms
+    np.testing.assert_allclose(lms[0], l)
+    np.testing.assert_allclose(lms[2], s)
+    assert lms.shape == (3, len(nodos))
+
+def test_sin_columnas_lms(directorio_tablas_sin_lms, monkeypatch):
+    # No se despejan de las curvas redondeadas, simplemente no hay
+    monkeypatch.chdir(directorio_tablas_sin_lms)
+    ref = referencias.cargar(1)
+    assert not ref.tiene_lms
+    assert not hasattr(ref, 'lms_peso_0_6')
+
+
+@pytest.fixture
+def tablas_propias(tmp_path, monkeypatch):
+    # Copia propia de las tablas para poder modificarlas
+    os.makedirs(tmp_path / referencias.DIRECTORIO_DATOS)
+    escribir_tablas(tmp_path / referencias.DIRECTORIO_DATOS)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_compilado_se_reutiliza(tablas_propias):
+    ref = referencias.cargar(1)
+    ruta = referencias.ruta_compilado(1)
+    modificado = os.stat(ruta).st_mtime_ns
+    assert referencias.cargar(1).version == ref.version
+    assert os.stat(ruta).st_mtime_ns == modificado
+
+def test_compilado_se_rehace_si_cambian_las_tablas(tablas_propias):
+    version = referencias.cargar(1).version
+    ruta_json = os.path.join(referencias.DIRECTORIO_DATOS, 'datos_hombre_peso_5_10.json')
+    with open(ruta_json, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    datos['datos'][0]['peso'] += 0.1
+    with open(ruta_json, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo)
+    assert referencias.cargar(1).version != version
+
+def test_arreglos_alineados_y_de_solo_lectura(ref):
+    arreglos = referencias.abrir_npz(referencias.ruta_compilado(1))
+    for arreglo in arreglos.values():
+        assert arreglo.ctypes.data % referencias.ALINEACION == 0
+        assert not arreglo.flags.writeable
+
+def test_polinomio_compilado_igual_a_scipy(ref):
+    from scipy.interpolate import PchipInterpolator
+    with open(os.path.join(referencias.DIRECTORIO_DATOS, 'datos_hombre.json'), encoding='utf-8') as archivo:
+        datos = referencias.filtrar_datos(json.load(archivo)['datos'], 6, 24)
+    pchip = PchipInterpolator(referencias.obtener_array_clave(datos, 'edad'),
+                              referencias.obtener_array_clave(datos, 'peso_max'))
+    x = np.linspace(5, 25, 301)
+    np.testing.assert_allclose(ref.polinomio_peso_mas2_6_24(x), pchip(x, extrapolate=True))
+
+
+def test_muestreo_adaptativo_dentro_de_la_tolerancia():
+    polinomios = [np.sin, lambda x: 0.1 * x ** 2, np.exp]
+    tolerancia = 0.005
+    x = referencias.muestreo_adaptativo(polinomios, 0.0, 3.0, tolerancia)
+    assert x[0] == 0.0 and x[-1] == 3.0
+    assert np.all(np.diff(x) > 0)
+    densa = np.linspace(0.0, 3.0, referencias.PUNTOS_DENSOS)
+    for polinomio in polinomios:
+        assert np.abs(np.interp(densa, x, polinomio(x)) - polinomio(densa)).max() <= tolerancia
+    assert len(x) < referencias.PUNTOS_DENSOS / 10
+
+def test_muestreo_adaptativo_recta_solo_extremos():
+    x = referencias.muestreo_adaptativo([lambda x: 2 * x + 1], -1.0, 1.0)
+    np.testing.assert_array_equal(x, [-1.0, 1.0])
+
+
+def tolerancia_compilada(genero=1):
+    return referencias.leer_meta(referencias.abrir_npz(referencias.ruta_compilado(genero)))['tolerancia']
+
+def test_se_conserva_la_tolerancia_compilada(tablas_propias):
+    # Lo que compila python referencias.py --tolerancia no se descarta en la siguiente carga
+    referencias.compilar(1, 0.05)
+    assert referencias.cargar(1).version
+    assert tolerancia_compilada() == 0.05
+    # Si cambian los JSON se recompila con la misma tolerancia
+    ruta_json = os.path.join(referencias.DIRECTORIO_DATOS, 'imc_datos_hombre_0_5.json')
+    os.utime(ruta_json, ns=(0, 0))
+    referencias.cargar(1)
+    assert tolerancia_compilada() == 0.05
+
+def test_tolerancia_de_config_manda(tablas_propias):
+    referencias.compilar(1, 0.05)
+    (tablas_propias / 'config.ini').write_text('[referencias]\ntolerancia = 0.02\n', encoding='utf-8')
+    referencias.cargar(1)
+    assert tolerancia_compilada() == 0.02
+
+def test_primera_compilacion_por_defecto(tablas_propias):
+    referencias.cargar(1)
+    assert tolerancia_compilada() == referencias.TOLERANCIA_CURVA
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import clasificacion
+import ingesta
+import referencias
+import rejilla
+
+
+@pytest.fixture
+def ref_rejilla(ref):
+    con_rejilla = referencias.cargar(1)
+    con_rejilla.rejilla = rejilla.cargar(1, con_rejilla)
+    return con_rejilla
+
+
+@pytest.mark.parametrize('indicador', rejilla.INDICADORES)
+@pytest.mark.parametrize('metodo', clasificacion.METODOS)
+def test_rejilla_igual_a_los_polinomios(ref, ref_rejilla, indicador, metodo):
+    # Edades en días enteros, como las de los pacientes, valores entre -3.5 y +3.5
+    generador = np.random.default_rng(7)
+    dias = generador.integers(0, rejilla.DIAS, 2000)
+    meses = ingesta.dias_a_meses(dias)
+    edades, (l, m, s) = clasificacion.tabla_lms(ref, indicador)
+    dentro = meses <= edades[-1]
+    meses, dias = meses[dentro], dias[dentro]
+    valores = clasificacion.valor_lms(np.interp(meses, edades, l), np.interp(meses, edades, m),
+                                      np.interp(meses, edades, s), generador.uniform(-3.5, 3.5, len(meses)))
+    estados, puntajes = clasificacion.clasificar(ref, indicador, meses, valores, metodo)
+    estados_rejilla, puntajes_rejilla = clasificacion.clasificar(ref_rejilla, indicador, meses, valores, metodo, dias)
+    np.testing.assert_allclose(puntajes_rejilla, puntajes, atol=1e-3)
+    # Solo pueden cambiar los valores que quedan prácticamente sobre una curva
+    assert (estados_rejilla != estados).mean() < 0.005
+
+def test_dias_enteros_igual_a_meses_redondeados(ref_rejilla):
+    dias = np.arange(rejilla.DIAS)
+    meses = ingesta.dias_a_meses(dias)
+    np.testing.assert_array_equal(ref_rejilla.rejilla.filas('talla', meses, dias),
+                                  ref_rejilla.rejilla.filas('talla', meses))
+    np.testing.assert_array_equal(ref_rejilla.rejilla.lms('imc', meses, dias), ref_rejilla.rejilla.lms('imc', meses))
+
+def test_rejilla_fuera_de_las_tablas(ref_rejilla):
+    _, lineas = ref_rejilla.rejilla.lineas('peso', [121.0, 300.0])
+    assert np.isnan(lineas).all()
+    _, lineas = ref_rejilla.rejilla.lineas('peso', [121.0], [rejilla.DIAS])
+    assert np.isnan(lineas).all()
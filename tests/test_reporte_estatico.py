@@ -0,0 +1,50 @@
+import os
+
+import pytest
+from PIL import Image
+
+import reporte_estatico
+import sinteticos
+
+
+@pytest.fixture
+def pacientes(ref):
+    return list(sinteticos.historias('preescolar', 2, 0).values())
+
+
+def test_color_mpl():
+    assert reporte_estatico.color_mpl('rgba(255, 0, 51, 0.5)') == (1.0, 0.0, 0.2, 0.5)
+    assert reporte_estatico.color_mpl('rgb(0,255,0)') == (0.0, 1.0, 0.0, 1.0)
+    assert reporte_estatico.color_mpl('green') == pytest.approx((0.0, 0.5019, 0.0, 1.0), abs=1e-3)
+
+def test_nombre_reporte():
+    assert reporte_estatico.nombre_reporte('../12 34', 'pdf') == 'reporte____12_34.pdf'
+
+def test_png_sin_restos_del_paciente_anterior(pacientes, tmp_path):
+    # La plantilla se reutiliza: el segundo paciente no debe arrastrar los puntos del primero
+    primero = reporte_estatico.exportar(pacientes[0], str(tmp_path / 'a.png'), 'png')
+    reporte_estatico.exportar(pacientes[1], str(tmp_path / 'b.png'), 'png')
+    otra_vez = reporte_estatico.exportar(pacientes[0], str(tmp_path / 'c.png'), 'png')
+    with Image.open(primero) as imagen:
+        ancho, alto = imagen.size
+        assert ancho == round(reporte_estatico.ANCHO_HOJA * reporte_estatico.DPI)
+        pixeles = imagen.tobytes()
+    with Image.open(otra_vez) as imagen:
+        assert imagen.tobytes() == pixeles
+    with Image.open(tmp_path / 'b.png') as imagen:
+        assert imagen.tobytes() != pixeles
+    assert sorted(os.listdir(tmp_path)) == ['a.png', 'b.png', 'c.png']
+
+def test_pdf_por_paginas(pacientes, tmp_path):
+    ruta = reporte_estatico.exportar(pacientes[0], str(tmp_path / 'r.pdf'), 'pdf')
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    assert contenido.startswith(b'%PDF')
+    paginas = -(-len(reporte_estatico.curvas.PANELES_GRAFICO) // reporte_estatico.PANELES_POR_PAGINA)
+    assert f'/Count {paginas}'.encode() in contenido
+
+def test_paneles_elegidos(pacientes, tmp_path):
+    completo = reporte_estatico.exportar(pacientes[0], str(tmp_path / 'a.png'), 'png')
+    dos = reporte_estatico.exportar(pacientes[0], str(tmp_path / 'b.png'), 'png', paneles=['peso_0_6', 'talla_0_6'])
+    with Image.open(completo) as a, Image.open(dos) as b:
+        assert a.size[0] == b.size[0] and b.size[1] < a.size[1]
@@ -0,0 +1,76 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+import pytest
+
+import base_datos
+import servicio_graficos
+import sinteticos
+
+
+class PoolSimulado:
+    # Lo que usa el servicio de base_datos.PoolConexiones, con pacientes sintéticos
+
+    def __init__(self, historias, agotado=False):
+        self.conn = sinteticos.ConexionSimulada(historias)
+        self.agotado = agotado
+
+    @contextmanager
+    def conexion(self):
+        if self.agotado:
+            raise base_datos.PoolAgotado('sin conexiones')
+        yield self.conn
+
+    def estadisticas(self):
+        return {'maximo': 1, 'en_uso': 0}
+
+    def cerrar(self):
+        pass
+
+
+@pytest.fixture
+def servicio(ref):
+    historias = sinteticos.historias('escolar', 1, 0)
+    pool = PoolSimulado(historias)
+    servidor = servicio_graficos.crear_servidor(servicio_graficos.GeneradorGraficos(pool), '127.0.0.1', 0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield f'http://127.0.0.1:{servidor.server_address[1]}', next(iter(historias)), pool
+    servidor.shutdown()
+    servidor.server_close()
+
+def pedir(url):
+    try:
+        with urllib.request.urlopen(url, timeout=30) as respuesta:
+            return respuesta.status, respuesta.headers['Content-Type'], respuesta.read().decode('utf-8')
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers['Content-Type'], error.read().decode('utf-8')
+
+
+def test_salud_y_estadisticas(servicio):
+    base, _, _ = servicio
+    assert pedir(base + '/salud')[::2] == (200, 'ok')
+    assert json.loads(pedir(base + '/pool')[2]) == {'maximo': 1, 'en_uso': 0}
+    assert json.loads(pedir(base + '/cache')[2]) == {}
+
+def test_grafico_html(servicio):
+    base, cedula, _ = servicio
+    estado, tipo, cuerpo = pedir(f'{base}/grafico?cedula={cedula}')
+    assert estado == 200 and tipo.startswith('text/html')
+    assert 'Plotly.newPlot' in cuerpo
+
+def test_grafico_paciente(servicio):
+    base, cedula, _ = servicio
+    estado, tipo, cuerpo = pedir(f'{base}/grafico?cedula={cedula}&formato=paciente')
+    assert estado == 200 and tipo == 'application/json'
+    assert json.loads(cuerpo)['data']
+
+def test_errores(servicio):
+    base, cedula, pool = servicio
+    assert pedir(f'{base}/grafico?cedula={cedula}&formato=svg')[0] == 400
+    assert pedir(base + '/otra')[0] == 404
+    pool.agotado = True
+    assert pedir(f'{base}/grafico?cedula={cedula}')[0] == 503
@@ -0,0 +1,136 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import clasificacion
+import curvas_de_crecimiento as curvas
+import ingesta
+import sinteticos
+
+HOY = datetime.date(2026, 1, 15)
+
+
+def test_valor_en_z_sobre_las_curvas(ref):
+    # En las desviaciones de la tabla el valor es el de su curva
+    meses = np.array([1.0, 12.0, 40.0, 100.0, 200.0])
+    bandas = clasificacion.banda_edad('talla', meses)
+    for indice, (rango, _, divisor) in enumerate(clasificacion.RANGOS['talla']):
+        x = meses[bandas == indice]
+        if not len(x):
+            continue
+        desviaciones, lineas = clasificacion.lineas_desviacion(ref, 'talla', rango, x / divisor)
+        for fila, z in enumerate(desviaciones):
+            np.testing.assert_allclose(sinteticos.valor_en_z(ref, 'talla', x, np.full(x.shape, float(z))), lineas[fila])
+    # Fuera de +-3 se queda en la curva +-3
+    lejos = sinteticos.valor_en_z(ref, 'peso', meses[:3], np.full(3, 9.0))
+    tope = sinteticos.valor_en_z(ref, 'peso', meses[:3], np.full(3, 3.0))
+    np.testing.assert_allclose(lejos, tope)
+
+def test_historias_reproducibles(ref):
+    primera = sinteticos.historias('preescolar', 3, semilla=4, hoy=HOY)
+    assert primera == sinteticos.historias('preescolar', 3, semilla=4, hoy=HOY)
+    assert primera != sinteticos.historias('preescolar', 3, semilla=5, hoy=HOY)
+    edad_dias, visitas = sinteticos.PERFILES['preescolar']
+    for indice, (cedula, filas) in enumerate(primera.items()):
+        assert len(filas) == visitas
+        assert {fila[2] for fila in filas} == {1 + indice % 2}
+        assert filas[0][4] == HOY - datetime.timedelta(days=edad_dias)
+        assert [fila[3] for fila in filas] == sorted(fila[3] for fila in filas) and filas[-1][3] <= HOY
+
+def test_historias_plausibles(ref):
+    # Con la deriva por defecto casi todas las mediciones pasan los umbrales de ingesta
+    for perfil in sinteticos.PERFILES:
+        filas = next(iter(sinteticos.historias(perfil, 1, hoy=HOY).values()))
+        mediciones = ingesta.ingerir(filas)
+        assert len(mediciones.valores) >= 0.9 * 3 * len(filas)
+
+def test_bloque_poblacion(ref):
+    bloque, consultas = sinteticos.bloque_poblacion(0, 50, semilla=1, hoy=HOY, primera_consulta=10)
+    assert (bloque, consultas) == sinteticos.bloque_poblacion(0, 50, semilla=1, hoy=HOY, primera_consulta=10)
+    detalles = [linea.split('\t') for linea in bloque['seg_usuario_detalles'].splitlines()]
+    lineas_consultas = [linea.split('\t') for linea in bloque['med_consultas'].splitlines()]
+    signos = [linea.split('\t') for linea in bloque['med_consulta_signos_vitales'].splitlines()]
+    assert len(detalles) == 50 and len(lineas_consultas) == consultas
+    assert [int(fila[0]) for fila in lineas_consultas] == list(range(10, 10 + consultas))
+    assert {fila[0] for fila in lineas_consultas} >= {fila[0] for fila in signos}
+    nacimientos = {fila[0]: datetime.date.fromisoformat(fila[2]) for fila in detalles}
+    for _, cedula, fecha in lineas_consultas:
+        dia = datetime.datetime.fromisoformat(fecha).date()
+        assert nacimientos[cedula] <= dia <= HOY
+        assert (HOY - nacimientos[cedula]).days <= sinteticos.EDAD_MAXIMA
+    assert {fila[1] for fila in signos} == {'3', '5', '7'}
+
+def test_tallas_en_metros(ref):
+    bloque, _ = sinteticos.bloque_poblacion(0, 200, hoy=HOY, metros=0.5, fraccion_atipicos=0)
+    tallas = np.array([float(linea.split('\t')[2]) for linea in bloque['med_consulta_signos_vitales'].splitlines()
+                       if linea.split('\t')[1] == '5'])
+    assert 0.35 < np.mean(tallas < 3) < 0.65
+    sin_metros, _ = sinteticos.bloque_poblacion(0, 200, hoy=HOY, metros=0, fraccion_atipicos=0)
+    assert all(float(linea.split('\t')[2]) >= 3 for linea in sin_metros['med_consulta_signos_vitales'].splitlines()
+               if linea.split('\t')[1] == '5')
+
+def test_poblacion_por_bloques(ref, tmp_path):
+    filas = sinteticos.guardar(sinteticos.poblacion(25, tamano_bloque=10, hoy=HOY), str(tmp_path))
+    assert filas['seg_usuario_detalles'] == 25
+    consultas = [int(linea.split('\t')[0]) for linea in
+                 (tmp_path / 'med_consultas.tsv').read_text(encoding='utf-8').splitlines()]
+    assert consultas == list(range(1, filas['med_consultas'] + 1))
+
+
+class CursorCarga:
+    def __init__(self, registro, fallar=False):
+        self.registro = registro
+        self.fallar = fallar
+
+    def execute(self, consulta, parametros=None):
+        self.registro.append(consulta.split()[0])
+
+    def fetchone(self):
+        return (41,)
+
+    def copy_expert(self, consulta, archivo):
+        if self.fallar:
+            raise RuntimeError('COPY')
+        self.registro.append(consulta)
+
+    def close(self):
+        pass
+
+class ConexionCarga:
+    def __init__(self, fallar=False):
+        self.registro = []
+        self.fallar = fallar
+
+    def cursor(self):
+        return CursorCarga(self.registro, self.fallar)
+
+    def commit(self):
+        self.registro.append('commit')
+
+    def rollback(self):
+        self.registro.append('rollback')
+
+
+def test_cargar_con_copy(ref):
+    conn = ConexionCarga()
+    filas = sinteticos.cargar(conn, 5, hoy=HOY, vaciar=True)
+    assert filas['seg_usuario_detalles'] == 5
+    copias = [linea for linea in conn.registro if linea.startswith('COPY')]
+    assert len(copias) == 3 and all(copia.endswith('WITH (FREEZE)') for copia in copias)
+    assert conn.registro[0] == 'TRUNCATE' and conn.registro[-1] == 'commit'
+    conn = ConexionCarga(fallar=True)
+    with pytest.raises(RuntimeError):
+        sinteticos.cargar(conn, 5, hoy=HOY)
+    assert conn.registro[-1] == 'rollback'
+
+
+def test_conexion_simulada(ref):
+    conn, cedula = sinteticos.conexion('lactante')
+    filas = curvas.consultar_signos_vitales(conn, cedula)
+    assert filas == conn.historias[cedula]
+    sexo, fecha, consulta, signos = curvas.cache_graficos.consultar_frescura(conn, cedula)
+    assert (fecha, consulta) == (filas[-1][3], filas[-1][0]) and signos == 3 * len(filas)
+    assert curvas.consultar_signos_vitales(conn, '1') == []
+    with pytest.raises(NotImplementedError):
+        conn.cursor().execute('SELECT 1')